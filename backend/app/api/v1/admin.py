@@ -1,12 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException
-from firebase_admin import firestore
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
 from datetime import datetime
+import hmac
+import os
 from pydantic import BaseModel
 from typing import List, Optional
 
-from app.auth import get_current_user, User
+from app.api.v1.instrumentation import InstrumentedRoute
+from app.auth import get_current_user, User, revoke_user, token_cache
+from app.core.executors import run_io
+from app.core.metrics import registry
+from app.core.storage import get_storage
+from app.core.storage.cached import uncached
+from app.services.audit import get_audit_sink
+from app.services.backfill import backfill_published_dates
+from app.services.stats import get_stats, reconcile_stats
 
-router = APIRouter()
+router = APIRouter(route_class=InstrumentedRoute)
+
+# Token de /metrics (Prometheus no usa Firebase Auth). Vacío = endpoint desactivado (404)
+METRICS_TOKEN = os.getenv("SENTINEL_METRICS_TOKEN", "")
 
 # MODELO DE DATOS 
 class LogEntry(BaseModel):
@@ -17,10 +30,9 @@ class LogEntry(BaseModel):
 
 #  FUNCIÓN LOG 
 def log_action(username: str, action: str, details: str):
-    """Guarda una acción en la base de datos de auditoría."""
+    """Registra una acción de auditoría. Solo la anexa al spool local: no espera a la base de datos."""
     try:
-        db = firestore.client()
-        db.collection("system_logs").add({
+        get_audit_sink().record({
             "timestamp": datetime.utcnow(),
             "user": username,
             "action": action,
@@ -38,37 +50,104 @@ async def get_system_logs(current_user: User = Depends(get_current_user)):
     if current_user.role not in ["admin", "analyst"]:
         raise HTTPException(status_code=403, detail="Requiere privilegios de Staff")
 
-    db = firestore.client()
-    logs_ref = db.collection("system_logs").order_by("timestamp", direction=firestore.Query.DESCENDING).limit(50)
-    
-    results = []
-    for doc in logs_ref.stream():
-        data = doc.to_dict()
-        results.append(data)
-        
-    return results
+    return await run_io(get_storage().logs.recent, 50)
 
 # ESTADÍSTICAS 
 @router.get("/admin/stats")
 async def get_dashboard_stats(current_user: User = Depends(get_current_user)):
-    """Devuelve contadores rápidos para mostrar en el Dashboard"""
-    db = firestore.client()
-    
-    # Obtenemos todos los hallazgos para contar riesgos
-    findings_ref = db.collection("findings").stream()
-    
-    total_findings = 0
+    """Devuelve contadores rápidos para mostrar en el Dashboard (una sola lectura)"""
+    stats = await run_io(get_stats, get_storage())
+
     risk_counts = {"critical": 0, "high": 0, "medium": 0, "low": 0}
-    
-    for f in findings_ref:
-        total_findings += 1
-        data = f.to_dict()
-        risk = data.get("risk_level", "low")
+    for risk, count in (stats.get("risk_level") or {}).items():
         if risk in risk_counts:
-            risk_counts[risk] += 1
-            
+            risk_counts[risk] = count
+
     return {
-        "total_findings": total_findings,
+        "total_findings": stats.get("total", 0),
         "risk_distribution": risk_counts,
+        "status_distribution": stats.get("status", {}),
+        "source_distribution": stats.get("source_id", {}),
         "system_health": "ONLINE"
-    }
\ No newline at end of file
+    }
+
+@router.post("/admin/stats/reconcile")
+async def reconcile_dashboard_stats(current_user: User = Depends(get_current_user)):
+    """Recalcula los contadores a partir de la colección completa (corrige deriva)."""
+    if current_user.role not in ["admin", "analyst"]:
+        raise HTTPException(status_code=403, detail="Requiere privilegios de Staff")
+
+    stats = await run_io(reconcile_stats, uncached(get_storage()))
+    log_action(current_user.username, "RECONCILE_STATS",
+               f"Contadores recalculados: {stats['total']} hallazgos")
+    return {"message": "Stats reconciled", "total_findings": stats["total"]}
+
+@router.post("/admin/findings/backfill-dates")
+async def backfill_finding_dates(current_user: User = Depends(get_current_user)):
+    """Normaliza published_date en hallazgos antiguos (sin fecha o con la fecha en texto)."""
+    if current_user.role not in ["admin", "analyst"]:
+        raise HTTPException(status_code=403, detail="Requiere privilegios de Staff")
+
+    counts = await run_io(backfill_published_dates, uncached(get_storage()))
+    log_action(current_user.username, "BACKFILL_DATES",
+               f"published_date normalizado: {counts['missing']} sin fecha, {counts['converted']} en texto")
+    return {"message": "Finding dates normalized", **counts}
+
+# SESIONES
+@router.get("/admin/auth/cache")
+async def get_token_cache_metrics(current_user: User = Depends(get_current_user)):
+    """Aciertos/fallos de la caché de tokens verificados."""
+    if current_user.role not in ["admin", "analyst"]:
+        raise HTTPException(status_code=403, detail="Requiere privilegios de Staff")
+    return token_cache.metrics()
+
+@router.post("/admin/users/{user_id}/revoke")
+async def revoke_user_sessions(user_id: str, current_user: User = Depends(get_current_user)):
+    """Revoca las sesiones de un usuario (uid de Firebase o email) y lo saca de la caché. Solo admins."""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Requiere privilegios de administrador")
+
+    try:
+        evicted = await run_io(revoke_user, user_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"No se pudieron revocar las sesiones en Firebase: {e}")
+    log_action(current_user.username, "REVOKE_USER",
+               f"Sesiones revocadas: {user_id} ({evicted} en caché)")
+    return {"message": "User sessions revoked", "evicted": evicted}
+
+# BÚSQUEDA
+@router.post("/admin/search/reindex")
+async def reindex_search(current_user: User = Depends(get_current_user)):
+    """Sincroniza ya el índice de búsqueda con el almacenamiento."""
+    if current_user.role not in ["admin", "analyst"]:
+        raise HTTPException(status_code=403, detail="Requiere privilegios de Staff")
+    from app.services.search import get_search_index
+    index = get_search_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Search index disabled")
+    result = await run_io(index.sync, get_storage())
+    log_action(current_user.username, "REINDEX_SEARCH", f"Índice sincronizado: {result}")
+    return {"message": "Search index synced", **result}
+
+# PLANIFICADOR
+@router.get("/admin/polling")
+async def get_polling_state(current_user: User = Depends(get_current_user)):
+    """Intervalo, ritmo de publicación y próxima consulta de cada fuente."""
+    if current_user.role not in ["admin", "analyst"]:
+        raise HTTPException(status_code=403, detail="Requiere privilegios de Staff")
+    from app.services import scheduler
+    if scheduler.poller is None:
+        return []
+    return scheduler.poller.snapshot()
+
+# MÉTRICAS (Prometheus)
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(authorization: Optional[str] = Header(None)):
+    """Tiempos por etapa y fuente, latencia por ruta y llamadas al almacenamiento."""
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest((authorization or "").encode(), f"Bearer {METRICS_TOKEN}".encode()):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
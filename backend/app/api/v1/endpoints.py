@@ -1,16 +1,28 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
-from firebase_admin import firestore
 from pydantic import BaseModel
 from datetime import datetime
-from passlib.context import CryptContext
+from app.api.v1.instrumentation import InstrumentedRoute
 from app.auth import get_current_user, User
+from app.core.executors import iterate_io, route_limiter, run_cpu, run_io
+from app.core.storage import get_storage
+from app.services.findings_query import FindingFilters, MAX_PAGE_SIZE, fetch_page, make_summary
+from app.services.search import MAX_SEARCH_PAGE, decode_search_cursor, encode_search_cursor, get_search_index
+import json
 import random 
 
-from app.scrapers.social_media import SocialMediaIngestor
+router = APIRouter(route_class=InstrumentedRoute)
+_pwd_context = None
 
-router = APIRouter()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+def hash_password(password: str) -> str:
+    """passlib/bcrypt se cargan con el primer registro, no al importar la API."""
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context.hash(password)
 
 #  MODELOS 
 class SourceModel(BaseModel):
@@ -36,13 +48,13 @@ class ManualFinding(BaseModel):
 #  USUARIOS 
 @router.post("/register")
 async def register_user(user: UserCreate):
-    db = firestore.client()
-    existing = db.collection("users").where("username", "==", user.username).stream()
-    if any(existing):
+    storage = get_storage()
+    if await run_io(storage.users.find_by_username, user.username):
         raise HTTPException(status_code=400, detail="User already exists")
 
-    hashed_password = pwd_context.hash(user.password)
-    db.collection("users").add({
+    # bcrypt es CPU pura (~250 ms): en su propio pool, fuera del loop y de los hilos de E/S
+    hashed_password = await run_cpu(hash_password, user.password)
+    await run_io(storage.users.add, {
         "username": user.username,
         "hashed_password": hashed_password,
         "role": "analyst",
@@ -61,89 +73,160 @@ async def register_user(user: UserCreate):
 #  FUENTES 
 @router.get("/sources", response_model=List[dict])
 async def get_sources(current_user: User = Depends(get_current_user)):
-    db = firestore.client()
-    docs = db.collection("sources").stream()
-    return [{"id": doc.id, **doc.to_dict()} for doc in docs]
+    return await run_io(get_storage().sources.list)
 
 @router.post("/sources")
 async def add_source(source: SourceModel, current_user: User = Depends(get_current_user)):
-    db = firestore.client()
-    existing = db.collection("sources").where("url", "==", source.url).stream()
-    if any(existing):
+    storage = get_storage()
+    if await run_io(storage.sources.find_by_url, source.url):
         raise HTTPException(status_code=400, detail="URL already registered")
         
-    doc_ref = db.collection("sources").add(source.dict())
+    source_id = await run_io(storage.sources.add, source.dict())
     
-    return {"message": "Source added successfully", "id": doc_ref[1].id}
+    return {"message": "Source added successfully", "id": source_id}
 
 @router.delete("/sources/{source_id}")
 async def delete_source(source_id: str, current_user: User = Depends(get_current_user)):
-    db = firestore.client()
-    db.collection("sources").document(source_id).delete()
+    await run_io(get_storage().sources.delete, source_id)
     return {"message": "Source deleted"}
 
 #   HALLAZGOS
 @router.get("/findings")
-async def get_findings(current_user: User = Depends(get_current_user)):
-    db = firestore.client()
-    docs = db.collection("findings").stream()
-    results = []
-    for doc in docs:
-        data = doc.to_dict()
-        data["id"] = doc.id
-        results.append(data)
-    return results
+async def get_findings(
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    filters: FindingFilters = Depends(),
+    current_user: User = Depends(get_current_user),
+):
+    """Lista paginada por cursor (más recientes primero). Pasa `next_cursor` como `after` para seguir."""
+    try:
+        items, next_cursor = await run_io(fetch_page, get_storage(), filters, limit=limit, after=after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor}
+
+# Declarada antes de /findings/{finding_id} para que "search" no se tome como un ID
+@router.get("/findings/search")
+async def search_findings(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=MAX_SEARCH_PAGE),
+    cursor: Optional[str] = None,
+    filters: FindingFilters = Depends(),
+    current_user: User = Depends(get_current_user),
+):
+    """Búsqueda de texto en título y contenido, ordenada por relevancia. Pasa `next_cursor` como `cursor`."""
+    index = get_search_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Search index disabled")
+    try:
+        offset = decode_search_cursor(cursor) if cursor else 0
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    items, total = await run_io(index.search, q, filters, limit=limit, offset=offset)
+    end = offset + len(items)
+    return {"items": items, "total": total, "next_cursor": encode_search_cursor(end) if end < total else None}
+
+@router.get("/findings/{finding_id}")
+async def get_finding(finding_id: str, current_user: User = Depends(get_current_user)):
+    """Detalle completo de un hallazgo (contenido íntegro)."""
+    finding = await run_io(get_storage().findings.get, finding_id)
+    if finding is None:
+        raise HTTPException(status_code=404, detail="Finding not found")
+    return finding
 
 @router.patch("/findings/{finding_id}")
 async def update_finding_status(finding_id: str, update_data: FindingUpdate, current_user: User = Depends(get_current_user)):
-    db = firestore.client()
-    doc_ref = db.collection("findings").document(finding_id)
-    doc = doc_ref.get()
-    if not doc.exists:
-        raise HTTPException(status_code=404, detail="Finding not found")
-    
     update_dict = {k: v for k, v in update_data.dict().items() if v is not None}
-    doc_ref.update(update_dict)
+    # El backend aplica el cambio y ajusta los contadores en la misma transacción
+    if await run_io(get_storage().findings.update, finding_id, update_dict) is None:
+        raise HTTPException(status_code=404, detail="Finding not found")
 
     return {"message": "Finding updated successfully"}
 
 @router.delete("/findings/{finding_id}")
 async def delete_finding(finding_id: str, current_user: User = Depends(get_current_user)):
-    db = firestore.client()
     try:
         from app.api.v1.admin import log_action
         log_action(current_user.username, "DELETE_FINDING", f"Deleted finding ID: {finding_id}")
     except:
         pass
-        
-    db.collection("findings").document(finding_id).delete()
+
+
+    await run_io(get_storage().findings.delete, finding_id)
     return {"message": "Finding permanently deleted"}
 
 
 @router.post("/findings/manual")
 async def create_manual_finding(finding: ManualFinding, current_user: User = Depends(get_current_user)):
-    db = firestore.client()
-    
     new_doc = {
         "title": finding.title,
         "content": finding.content,
         "risk_level": finding.risk_level,
+        "summary": make_summary(finding.content),
         "url": finding.url or "N/A",
         "source_id": "human_intelligence", 
-        "published_date": datetime.utcnow().isoformat(),
+        "published_date": datetime.utcnow(),
         "status": "new",
         "sentiment": 0.0, 
         "created_by": current_user.username
     }
     
-    doc_ref = db.collection("findings").add(new_doc)
+    finding_id = (await run_io(get_storage().findings.create_many, [new_doc]))[0]
     
-    return {"message": "Manual entry registered", "id": doc_ref[1].id}
+    return {"message": "Manual entry registered", "id": finding_id}
+
+
+async def _bulk_body(ingestor, spool, username: str):
+    # El procesamiento dura lo que dure la respuesta: ocupa un hueco propio y
+    # cada lote (validar, deduplicar, analizar, escribir) va al pool de E/S
+    from app.services.bulk_ingest import BATCH_SIZE, RESULTS, CorruptBody, iter_lines
+    summary = dict.fromkeys(RESULTS, 0)
+    lines = 0
+    async with route_limiter.limit("POST /api/v1/findings/bulk [body]", reject=False):
+        try:
+            async for batch in iterate_io(iter_lines(spool), batch_size=BATCH_SIZE):
+                results = await run_io(ingestor.process, batch)
+                lines += len(results)
+                for result in results:
+                    summary[result["status"]] += 1
+                yield "".join(json.dumps(result) + "\n" for result in results)
+        except CorruptBody as e:
+            # Cuerpo gzip corrupto o truncado: lo anterior ya está guardado
+            yield json.dumps({"error": str(e)}) + "\n"
+        finally:
+            spool.close()
+            await run_io(ingestor.save)
+        yield json.dumps({"summary": {"lines": lines, **summary}}) + "\n"
+    try:
+        from app.api.v1.admin import log_action
+        log_action(username, "BULK_INGEST",
+                   f"Bulk ingest: {lines} lines, {summary['created']} created, {summary['updated']} updated")
+    except ImportError:
+        pass
+
+@router.post("/findings/bulk")
+async def bulk_ingest_findings(request: Request, current_user: User = Depends(get_current_user)):
+    """
+    Alta en bloque: cuerpo NDJSON con un Finding por línea, opcionalmente gzip.
+    Responde NDJSON: el resultado de cada línea ({"line", "status", "id", ...})
+    y al final {"summary": {...}}.
+    """
+    from app.services.bulk_ingest import BodyTooLarge, get_bulk_ingestor, spool_body
+    try:
+        spool = await spool_body(request.stream())
+    except BodyTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    try:
+        ingestor = await run_io(get_bulk_ingestor)
+    except Exception:
+        spool.close()
+        raise
+    return StreamingResponse(_bulk_body(ingestor, spool, current_user.username), media_type="application/x-ndjson")
 
 
 @router.post("/simulate/social")
 async def simulate_social_scan(current_user: User = Depends(get_current_user)):
-    db = firestore.client()
     created_count = 0
 
     threat_pool = [
@@ -198,7 +281,8 @@ async def simulate_social_scan(current_user: User = Depends(get_current_user)):
     ]
     selected_threats = random.sample(threat_pool, k=random.randint(1, 3))
 
-    # resultados en Firestore
+    # resultados en el almacenamiento (un solo lote con los contadores)
+    new_docs = []
     for item in selected_threats:
         # ID aleatorio visual
         random_id = random.randint(1000, 9999)
@@ -207,10 +291,12 @@ async def simulate_social_scan(current_user: User = Depends(get_current_user)):
         doc_data["title"] = f"{item['title']} (#{random_id})"
         doc_data["status"] = "new"
         doc_data["created_by"] = "simulated_ai_engine"
-        doc_data["published_date"] = datetime.utcnow().isoformat()
+        doc_data["summary"] = make_summary(item["content"])
+        doc_data["published_date"] = datetime.utcnow()
 
-        db.collection("findings").add(doc_data)
+        new_docs.append(doc_data)
         created_count += 1
+    await run_io(get_storage().findings.create_many, new_docs)
 
     return {"message": f"Scan completed. {created_count} new threats detected."}
 
@@ -0,0 +1,42 @@
+import time
+from typing import Callable
+
+from fastapi import HTTPException, Request, Response
+from fastapi.routing import APIRoute
+
+from app.core.executors import route_limiter
+from app.core.metrics import current_endpoint, http_request_seconds
+
+
+class InstrumentedRoute(APIRoute):
+    """
+    Ruta que mide su latencia y marca la petición con su plantilla de ruta
+    ("GET /findings/{finding_id}") para atribuir las llamadas al almacenamiento.
+    Se usa la plantilla y no la URL real para no disparar la cardinalidad.
+    También aplica el límite de peticiones simultáneas de la ruta (core/executors.py).
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        path = self.path_format
+
+        async def timed_handler(request: Request) -> Response:
+            route = f"{request.method} {path}"
+            # Sin reset: cada petición corre en su propia tarea, y así el cuerpo de un
+            # StreamingResponse (CSV) sigue atribuyéndose a esta ruta
+            current_endpoint.set(route)
+            start = time.perf_counter()
+            status = 500
+            try:
+                async with route_limiter.limit(route):
+                    response = await handler(request)
+                status = response.status_code
+                return response
+            except HTTPException as e:
+                status = e.status_code
+                raise
+            finally:
+                http_request_seconds.observe(time.perf_counter() - start,
+                                             method=request.method, route=path, status=status)
+
+        return timed_handler
@@ -1,82 +1,59 @@
 from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import StreamingResponse
-from datetime import datetime
-import pandas as pd
-from fpdf import FPDF
-import io
-from firebase_admin import firestore
+from fastapi.responses import FileResponse, StreamingResponse
+import asyncio
+import csv
 import traceback
-import re 
-import html 
+from app.api.v1.instrumentation import InstrumentedRoute
 from app.auth import get_current_user, User
 from app.api.v1.admin import log_action
+from app.core.executors import iterate_io, route_limiter, run_io
+from app.core.storage import get_storage
+from app.services.findings_query import FindingFilters, iter_findings
+from app.services.report_jobs import report_jobs
+from app.utils.text import clean_text
 
-router = APIRouter()
-
-def clean_text(text):
-    """
-    Limpia el texto para que sea 100% compatible con FPDF (Latin-1)
-    y elimina etiquetas HTML (divs, br, p).
-    """
-    if text is None:
-        return ""
-    
-    text = str(text)
-
-    # 1. ELIMINAR ETIQUETAS HTML
-    text = re.sub('<[^<]+?>', '', text)
-
-    # 2. LIMPIAR ENTIDADES HTML
-    text = html.unescape(text)
-
-    # 3. REEMPLAZAR CARACTERES RAROS
-    replacements = {
-        '\u2018': "'",  
-        '\u2019': "'",  
-        '\u201c': '"',  
-        '\u201d': '"',  
-        '\u2013': '-',  
-        '\u2014': '-', 
-        '…': '...'      
-    }
-    
-    for k, v in replacements.items():
-        text = text.replace(k, v)
-
-    # 4. LIMPIAR ESPACIOS EXTRA Y SALTOS DE LINEA
-    text = " ".join(text.split())
-
-    # 5. ENCODING FINAL PARA FPDF
-    return text.encode('latin-1', 'replace').decode('latin-1')
+router = APIRouter(route_class=InstrumentedRoute)
 
 #    EXPORTAR CSV
+CSV_FIELDS = ["published_date", "title", "risk_level", "source_id", "url"]
+CSV_HEADER = ["Fecha", "Titulo", "Riesgo", "Fuente", "URL"]
+
+class _LineBuffer:
+    """csv.writer escribe aquí y devolvemos cada línea tal cual, sin acumular."""
+    def write(self, value):
+        return value
+
+def stream_findings_csv(storage, filters: FindingFilters):
+    """Genera el CSV fila a fila con un recorrido del almacenamiento (memoria constante)."""
+    writer = csv.writer(_LineBuffer())
+    yield writer.writerow(CSV_HEADER)
+
+    empty = True
+    for d in iter_findings(storage, filters, fields=CSV_FIELDS):
+        empty = False
+        yield writer.writerow([
+            d.get("published_date", ""),
+            clean_text(d.get("title", "Sin Título")),
+            d.get("risk_level", "low"),
+            d.get("source_id", ""),
+            d.get("url", "")
+        ])
+
+    if empty:
+        yield writer.writerow(["No hay datos disponibles"])
+
+async def _csv_body(storage, filters: FindingFilters):
+    # El recorrido dura lo que dure la descarga: ocupa un hueco de exportación y
+    # lee por lotes en el pool de E/S, así no acapara hilos ni bloquea el loop
+    async with route_limiter.limit("GET /api/v1/export/csv [body]", reject=False):
+        async for lines in iterate_io(stream_findings_csv(storage, filters)):
+            yield "".join(lines)
+
 @router.get("/export/csv")
-async def export_findings_csv(current_user: User = Depends(get_current_user)):
+async def export_findings_csv(filters: FindingFilters = Depends(), current_user: User = Depends(get_current_user)):
     try:
-        db = firestore.client()
-        findings_ref = db.collection("findings")
-        docs = findings_ref.stream()
-
-        data = []
-        for doc in docs:
-            d = doc.to_dict()
-            clean_row = {
-                "Fecha": d.get("published_date", ""),
-                "Titulo": clean_text(d.get("title", "Sin Título")),
-                "Riesgo": d.get("risk_level", "low"),
-                "Fuente": d.get("source_id", ""),
-                "URL": d.get("url", "")
-            }
-            data.append(clean_row)
-
-        if not data:
-            data = [{"Info": "No hay datos disponibles"}]
-
-        df = pd.DataFrame(data)
-        stream = io.StringIO()
-        df.to_csv(stream, index=False)
-        
-        response = StreamingResponse(iter([stream.getvalue()]), media_type="text/csv")
+        storage = get_storage()
+        response = StreamingResponse(_csv_body(storage, filters), media_type="text/csv")
         response.headers["Content-Disposition"] = "attachment; filename=intelligence_report.csv"
         return response
 
@@ -84,74 +61,54 @@ async def export_findings_csv(current_user: User = Depends(get_current_user)):
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
-#    EXPORTAR PDF
+#    EXPORTAR PDF (trabajos en segundo plano)
+def _pdf_response(job):
+    return FileResponse(job.path, media_type="application/pdf", filename="report_critical.pdf")
+
+@router.post("/export/pdf/jobs", status_code=202)
+async def create_pdf_job(current_user: User = Depends(get_current_user)):
+    """Encola el reporte de hallazgos críticos. Consultar con GET /export/pdf/jobs/{job_id}."""
+    job = await run_io(report_jobs.submit, get_storage(), current_user.username)
+    log_action(
+        username=current_user.username,
+        action="EXPORT_PDF",
+        details="Exportó reporte de hallazgos críticos."
+    )
+    return job.to_dict()
+
+@router.get("/export/pdf/jobs/{job_id}")
+async def get_pdf_job(job_id: str, current_user: User = Depends(get_current_user)):
+    job = report_jobs.get(job_id)
+    if not job or job.username != current_user.username:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@router.get("/export/pdf/jobs/{job_id}/download")
+async def download_pdf_job(job_id: str, current_user: User = Depends(get_current_user)):
+    job = report_jobs.get(job_id)
+    if not job or job.username != current_user.username:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status == "error":
+        raise HTTPException(status_code=500, detail=f"Error interno: {job.error}")
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"Report not ready ({job.status})")
+    return _pdf_response(job)
+
 @router.get("/export/pdf")
 async def export_findings_pdf(current_user: User = Depends(get_current_user)):
+    """Descarga directa (compatibilidad): crea el trabajo y espera sin bloquear el event loop."""
     try:
-        db = firestore.client()
-        # Traer todo para evitar errores de índices
-        docs = db.collection("findings").stream()
-        
-        data = []
-        for doc in docs:
-            d = doc.to_dict()
-            # Filtro manual de riesgo en Python
-            if d.get("risk_level") in ["high", "critical"]:
-                data.append(d)
-
-        # Configurar PDF
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_font("Arial", size=12)
-
-        # Título
-        pdf.set_font("Arial", "B", 16)
-        pdf.cell(200, 10, txt="Reporte - SENTINEL", ln=1, align="C")
-        
-        # Subtítulo 
-        user_clean = clean_text(current_user.username)
-        pdf.set_font("Arial", size=10)
-        pdf.cell(200, 10, txt=f"Generado por: {user_clean}", ln=1, align="C")
-        pdf.ln(10)
-
-        if not data:
-            pdf.cell(200, 10, txt="Sin amenazas criticas.", ln=1, align="L")
-        else:
-            for item in data:
-                # LIMPIEZA A LO QUE VA AL PDF
-                title = clean_text(item.get('title', 'Sin Titulo'))
-                risk = clean_text(item.get('risk_level', 'UNKNOWN')).upper()
-                
-                # Content estará limpio de HTML
-                content = clean_text(item.get('content', ''))[:300] + "..."
-
-                # Título de la noticia
-                pdf.set_font("Arial", "B", 12)
-                pdf.set_text_color(190, 0, 0)
-                pdf.multi_cell(0, 10, txt=f"[{risk}] {title}")
-                
-                # Contenido
-                pdf.set_font("Arial", size=10)
-                pdf.set_text_color(0, 0, 0)
-                pdf.multi_cell(0, 6, txt=content)
-                pdf.ln(5)
-                
-                pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-                pdf.ln(5)
-        
+        job = await run_io(report_jobs.submit, get_storage(), current_user.username)
+        await asyncio.wrap_future(job.future)
+
         log_action(
             username=current_user.username,
             action="EXPORT_PDF",
             details="Exportó reporte de hallazgos críticos."
         ) 
-        # binaria segura
-        return StreamingResponse(
-            io.BytesIO(pdf.output(dest='S').encode('latin-1', 'replace')),
-            media_type="application/pdf",
-            headers={"Content-Disposition": "attachment; filename=report_critical.pdf"}
-        )
+        return _pdf_response(job)
 
     except Exception as e:
         print(f"❌ Error PDF: {e}")
         traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Error interno: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error interno: {str(e)}")
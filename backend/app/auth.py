@@ -2,29 +2,156 @@ from firebase_admin import auth
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
+from collections import OrderedDict
+import hashlib
+import threading
+import time
+
+from app.core.executors import run_io
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Vida máxima de un ID token de Firebase: una revocación más antigua ya no afecta a ningún token válido
+MAX_TOKEN_LIFETIME = 3600.0
+
 class User(BaseModel):
     username: str
     role: str = "analyst"
 
+class TokenCache:
+    """
+    Caché LRU de tokens ya verificados, indexada por el hash del token (nunca el token en claro).
+    Cada entrada caduca en el `exp` del propio token, o antes si max_ttl es menor.
+    """
+
+    def __init__(self, max_size: int = 10_000, max_ttl: float = 300.0):
+        self.max_size = max_size
+        self.max_ttl = max_ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # uid/email -> instante de la revocación: tokens emitidos antes no valen aunque lleguen en caché
+        self._revoked: dict = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str):
+        key = self._key(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_revoked(entry[1]):
+                del self._entries[key]
+                entry = None
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, token: str, decoded: dict):
+        expires_at = min(float(decoded.get("exp", 0)), time.time() + self.max_ttl)
+        if expires_at <= time.time():
+            return
+        with self._lock:
+            if self._is_revoked(decoded):
+                return
+            key = self._key(token)
+            self._entries[key] = (expires_at, decoded)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _is_revoked(self, decoded: dict) -> bool:
+        # Bajo self._lock
+        issued = float(decoded.get("iat", 0))
+        return any(issued < self._revoked.get(user_id, 0)
+                   for user_id in (decoded.get("uid"), decoded.get("email")) if user_id)
+
+    def is_revoked(self, decoded: dict) -> bool:
+        """True si el token se emitió antes de una revocación de su usuario."""
+        with self._lock:
+            return self._is_revoked(decoded)
+
+    def evict_user(self, *user_ids: str) -> int:
+        """Revoca y elimina todas las entradas de un usuario (uid y/o email). Devuelve cuántas."""
+        now = time.time()
+        with self._lock:
+            # Revocaciones más antiguas que la vida de un token ya no sirven para nada
+            self._revoked = {k: t for k, t in self._revoked.items() if now - t < MAX_TOKEN_LIFETIME}
+            for user_id in user_ids:
+                self._revoked[user_id] = now
+            keys = [k for k, (_, decoded) in self._entries.items()
+                    if set(user_ids) & {decoded.get("uid"), decoded.get("email")}]
+            for k in keys:
+                del self._entries[k]
+            return len(keys)
+
+    def metrics(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+        }
+
+token_cache = TokenCache()
+
+def revoke_user(user_id: str) -> int:
+    """
+    Hook de revocación: invalida los refresh tokens en Firebase (un email se
+    resuelve antes a su uid) y rechaza en este proceso los tokens ya emitidos,
+    estén o no en caché. LookupError si el usuario no existe; los errores de
+    Firebase se propagan sin revocar nada en local.
+    """
+    try:
+        user = auth.get_user_by_email(user_id) if "@" in user_id else auth.get_user(user_id)
+    except auth.UserNotFoundError:
+        raise LookupError(f"Usuario no encontrado: {user_id}")
+    auth.revoke_refresh_tokens(user.uid)
+    return token_cache.evict_user(*[i for i in (user.uid, user.email) if i])
+
+def role_of(decoded_token: dict) -> str:
+    """Rol según los custom claims de Firebase (`admin: true` o `role: "admin"`); por defecto analyst."""
+    if decoded_token.get("admin") is True or decoded_token.get("role") == "admin":
+        return "admin"
+    return "analyst"
+
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     try:
-        # VERIFICAR EL TOKEN CON GOOGLE FIREBASE
-        decoded_token = auth.verify_id_token(token)
-        
+        cached = token_cache.get(token)
+        # VERIFICAR EL TOKEN CON GOOGLE FIREBASE (solo si no está en caché)
+        # (puede descargar las claves públicas de Google: fuera del event loop).
+        # check_revoked: un token de un usuario revocado no vuelve a entrar en la caché
+        decoded_token = cached or await run_io(auth.verify_id_token, token, check_revoked=True)
+        if token_cache.is_revoked(decoded_token):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Sesión revocada")
+
         # Obtenemos el email del usuario
         email = decoded_token.get("email")
-        
-        # Validamos si verificó el email 
+
+        # Validamos si verificó el email
         if not decoded_token.get("email_verified"):
              raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Email no verificado",
             )
 
-        return User(username=email, role="analyst")
+        # Solo se cachean tokens que pasaron todas las comprobaciones
+        if cached is None:
+            token_cache.put(token, decoded_token)
+        return User(username=email, role=role_of(decoded_token))
 
     except Exception as e:
         print(f"Error Auth: {e}")
@@ -32,4 +159,4 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Credenciales inválidas o expiradas",
             headers={"WWW-Authenticate": "Bearer"},
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,132 @@
+"""
+Ejecución del trabajo bloqueante de la API fuera del event loop.
+
+Las rutas son `async def`, pero el almacenamiento (Firestore, SQLite), la
+verificación de tokens y bcrypt son síncronos: ejecutados directamente, una
+consulta lenta congela todas las peticiones del worker de uvicorn.
+
+  - run_io(): llamadas al almacenamiento y a red, en un pool de hilos acotado.
+  - run_cpu(): trabajo de CPU (bcrypt) en su propio pool, para que no ocupe
+    los hilos de E/S ni al revés.
+  - route_limiter: máximo de peticiones simultáneas por ruta. Las rutas pesadas
+    (exportaciones, reconciliación) tienen pocos huecos y no pueden acaparar el
+    pool de E/S; si no hay hueco en QUEUE_TIMEOUT segundos se responde 503.
+"""
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, Iterator, List, TypeVar
+
+from fastapi import HTTPException
+
+from app.core.metrics import registry
+
+T = TypeVar("T")
+
+IO_THREADS = int(os.getenv("SENTINEL_IO_THREADS", "32"))
+CPU_THREADS = int(os.getenv("SENTINEL_CPU_THREADS", str(max(1, os.cpu_count() or 2))))
+QUEUE_TIMEOUT = float(os.getenv("SENTINEL_ROUTE_QUEUE_TIMEOUT", "10"))
+
+# Peticiones simultáneas por ruta ("MÉTODO /plantilla" completa, con el prefijo /api/v1).
+# El resto de rutas usa DEFAULT_ROUTE_LIMIT
+DEFAULT_ROUTE_LIMIT = 32
+ROUTE_LIMITS: Dict[str, int] = {
+    "GET /api/v1/export/csv": 2,
+    # Cuerpos CSV en curso: la ruta termina al devolver el StreamingResponse, el recorrido después
+    "GET /api/v1/export/csv [body]": 2,
+    "GET /api/v1/export/pdf": 2,
+    "POST /api/v1/export/pdf/jobs": 4,
+    "POST /api/v1/admin/stats/reconcile": 1,
+    "POST /api/v1/admin/search/reindex": 1,
+    "POST /api/v1/register": 4,
+    # Subida del cuerpo a disco; el procesamiento por lotes ocupa el hueco [body]
+    "POST /api/v1/findings/bulk": 4,
+    "POST /api/v1/findings/bulk [body]": 2,
+}
+
+io_pool = ThreadPoolExecutor(max_workers=IO_THREADS, thread_name_prefix="sentinel-io")
+cpu_pool = ThreadPoolExecutor(max_workers=CPU_THREADS, thread_name_prefix="sentinel-cpu")
+
+route_in_flight = registry.gauge("sentinel_http_in_flight", "Peticiones en curso por ruta", ["route"])
+route_rejected_total = registry.counter(
+    "sentinel_http_rejected_total", "Peticiones rechazadas (503) por ruta saturada", ["route"])
+
+
+async def _run(pool: ThreadPoolExecutor, fn: Callable[..., T], *args, **kwargs) -> T:
+    # Se copia el contexto: las métricas de almacenamiento siguen atribuyéndose a la ruta
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, fn, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(pool, call)
+
+
+async def run_io(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Ejecuta una llamada bloqueante de E/S (almacenamiento, red) en el pool de E/S."""
+    return await _run(io_pool, fn, *args, **kwargs)
+
+
+async def run_cpu(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Ejecuta trabajo de CPU (bcrypt) en su propio pool."""
+    return await _run(cpu_pool, fn, *args, **kwargs)
+
+
+def _take(iterator: Iterator[T], size: int) -> List[T]:
+    batch = []
+    for item in iterator:
+        batch.append(item)
+        if len(batch) >= size:
+            break
+    return batch
+
+
+async def iterate_io(iterator: Iterator[T], batch_size: int = 500) -> AsyncIterator[List[T]]:
+    """
+    Recorre un iterador bloqueante (p. ej. un recorrido paginado del almacenamiento)
+    por lotes en el pool de E/S: un salto de hilo por lote, no por elemento.
+    """
+    while True:
+        batch = await run_io(_take, iterator, batch_size)
+        if not batch:
+            return
+        yield batch
+
+
+class RouteLimiter:
+    """Semáforo por ruta. Se crean al primer uso, dentro del loop de la petición."""
+
+    def __init__(self, limits: Dict[str, int], default: int = DEFAULT_ROUTE_LIMIT,
+                 queue_timeout: float = QUEUE_TIMEOUT):
+        self.limits = limits
+        self.default = default
+        self.queue_timeout = queue_timeout
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _semaphore(self, route: str) -> asyncio.Semaphore:
+        if route not in self._semaphores:
+            self._semaphores[route] = asyncio.Semaphore(self.limits.get(route, self.default))
+        return self._semaphores[route]
+
+    @asynccontextmanager
+    async def limit(self, route: str, reject: bool = True):
+        """
+        Ocupa un hueco de la ruta. Con reject=False espera sin límite: un cuerpo
+        de respuesta ya empezado no puede convertirse en un 503.
+        """
+        semaphore = self._semaphore(route)
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=self.queue_timeout if reject else None)
+        except asyncio.TimeoutError:
+            route_rejected_total.inc(route=route)
+            raise HTTPException(status_code=503, detail="Server busy, retry later",
+                                headers={"Retry-After": "5"})
+        route_in_flight.inc(route=route)
+        try:
+            yield
+        finally:
+            route_in_flight.dec(route=route)
+            semaphore.release()
+
+
+route_limiter = RouteLimiter(ROUTE_LIMITS)
@@ -0,0 +1,50 @@
+import os
+import threading
+
+from app.core.storage.base import Storage
+
+# Backend seleccionado por entorno: firestore (por defecto) | memory | sqlite
+STORAGE_BACKEND = os.getenv("SENTINEL_STORAGE", "firestore").lower()
+SQLITE_PATH = os.getenv("SENTINEL_SQLITE_PATH", os.path.join(os.getenv("SENTINEL_DATA_DIR", "data"), "sentinel.db"))
+
+_storage = None
+_lock = threading.Lock()
+
+
+def create_storage(backend: str = STORAGE_BACKEND, **options) -> Storage:
+    """Crea un backend nuevo. Los imports son perezosos: memory/sqlite no necesitan Firebase."""
+    if backend == "memory":
+        from app.core.storage.memory_backend import MemoryStorage
+        return MemoryStorage()
+    if backend == "sqlite":
+        from app.core.storage.sqlite_backend import SQLiteStorage
+        return SQLiteStorage(options.get("path", SQLITE_PATH))
+    if backend == "firestore":
+        from app.core.database import get_db
+        from app.core.storage.firestore_backend import FirestoreStorage
+        return FirestoreStorage(options.get("db") or get_db())
+    raise ValueError(f"Backend de almacenamiento desconocido: {backend}")
+
+
+def get_storage() -> Storage:
+    """Backend compartido por toda la aplicación (API, scheduler, scanner)."""
+    global _storage
+    if _storage is None:
+        with _lock:
+            if _storage is None:
+                from app.core.storage.instrumented import InstrumentedStorage
+                from app.services.search import get_search_index
+                storage = create_storage()
+                index = get_search_index()
+                if index is not None:
+                    from app.core.storage.indexed import IndexedStorage
+                    storage = IndexedStorage(storage, index)
+                _storage = InstrumentedStorage(storage)
+                print(f"🗄️ Almacenamiento: {_storage.name}")
+    return _storage
+
+
+def set_storage(storage: Storage):
+    """Sustituye el backend global (benchmarks, pruebas de carga)."""
+    global _storage
+    _storage = storage
@@ -0,0 +1,176 @@
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# (doc_id, data, merge) tal como los acumula FindingWriter
+FindingWrite = Tuple[str, Dict, bool]
+
+
+def date_key(value) -> str:
+    """Clave ordenable para published_date (datetime con/sin zona o string ISO)."""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.isoformat()
+    return str(value or "")
+
+
+def project(data: Dict, fields: Optional[Iterable[str]]) -> Dict:
+    if not fields:
+        return dict(data)
+    return {f: data[f] for f in fields if f in data}
+
+
+def matches(data: Dict, filters) -> bool:
+    """Aplica FindingFilters en memoria (backends sin motor de consultas propio)."""
+    for field in ("risk_level", "status", "source_id"):
+        value = getattr(filters, field)
+        if value and data.get(field) != value:
+            return False
+    published = date_key(data.get("published_date"))
+    if filters.date_from and published < date_key(filters.date_from):
+        return False
+    if filters.date_to and published > date_key(filters.date_to):
+        return False
+    return True
+
+
+def merge_doc(current: Optional[Dict], data: Dict, merge: bool) -> Dict:
+    """Semántica de set(): merge=True fusiona campos (y mapas anidados), merge=False reemplaza."""
+    if not merge or current is None:
+        return dict(data)
+    merged = dict(current)
+    for key, value in data.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_doc(merged[key], value, True)
+        else:
+            merged[key] = value
+    return merged
+
+
+class SourceRepository(ABC):
+    @abstractmethod
+    def list(self) -> List[Dict]:
+        """Todas las fuentes, cada una con su "id"."""
+
+    @abstractmethod
+    def find_by_url(self, url: str) -> Optional[Dict]: ...
+
+    @abstractmethod
+    def add(self, data: Dict) -> str: ...
+
+    @abstractmethod
+    def update(self, source_id: str, data: Dict): ...
+
+    @abstractmethod
+    def delete(self, source_id: str): ...
+
+
+class FindingRepository(ABC):
+    """
+    Hallazgos + contadores del dashboard. Las operaciones de escritura aplican
+    el delta de contadores en la misma transacción/lote que el documento.
+    """
+
+    # False si published_date se guarda siempre como texto ISO (SQLite): ahí un
+    # string no es un dato antiguo que haya que convertir (services/backfill.py)
+    native_dates = True
+
+    @abstractmethod
+    def get(self, finding_id: str) -> Optional[Dict]: ...
+
+    @abstractmethod
+    def page(self, filters, limit: int, after: Optional[Dict],
+             fields: Optional[List[str]]) -> List[Dict]:
+        """
+        Página ordenada por (published_date, id) descendente. `after` es el cursor
+        decodificado {"published_date", "__name__"}. Cada item lleva su "id".
+        """
+
+    @abstractmethod
+    def stream(self, fields: Optional[List[str]] = None,
+               risk_levels: Optional[List[str]] = None,
+               source_id: Optional[str] = None) -> Iterator[Dict]:
+        """Recorrido completo (opcionalmente filtrado por riesgo o fuente, y proyectado)."""
+
+    @abstractmethod
+    def upsert_many(self, writes: List[FindingWrite], stats_delta: Dict[str, int]):
+        """Escribe un lote de forma atómica junto con el delta de contadores."""
+
+    @abstractmethod
+    def create_many(self, docs: List[Dict]) -> List[str]:
+        """Altas con ID generado (actualiza los contadores)."""
+
+    @abstractmethod
+    def update(self, finding_id: str, changes: Dict) -> Optional[Dict]:
+        """Actualiza campos. Devuelve el documento anterior, o None si no existe."""
+
+    @abstractmethod
+    def delete(self, finding_id: str) -> Optional[Dict]:
+        """Borra. Devuelve el documento anterior, o None si no existía."""
+
+    @abstractmethod
+    def get_stats(self) -> Optional[Dict]:
+        """Documento de contadores materializados, o None si aún no existe."""
+
+    def watch(self, on_change: Callable[[List[Tuple[str, Optional[Dict]]]], None]) -> Optional[Callable[[], None]]:
+        """
+        Escucha cambios de la colección: on_change([(id, datos o None si se borró), ...]).
+        La primera llamada trae la colección entera. Devuelve la función para dejar
+        de escuchar, o None si el backend no tiene listeners (se consulta periódicamente).
+        """
+        return None
+
+    @abstractmethod
+    def set_stats(self, snapshot: Dict):
+        """Reemplaza los contadores (reconciliación)."""
+
+
+class LogRepository(ABC):
+    @abstractmethod
+    def add_many(self, entries: List[Dict]): ...
+
+    def add(self, entry: Dict):
+        self.add_many([entry])
+
+    @abstractmethod
+    def recent(self, limit: int = 50) -> List[Dict]:
+        """Últimas entradas, más recientes primero."""
+
+
+class UserRepository(ABC):
+    @abstractmethod
+    def find_by_username(self, username: str) -> Optional[Dict]: ...
+
+    @abstractmethod
+    def add(self, data: Dict) -> str: ...
+
+
+class LeaseRepository(ABC):
+    """
+    Arrendamientos con caducidad (coordinación entre workers). Las horas son
+    epoch de cada proceso: se asume reloj sincronizado (NTP) con desfase << ttl.
+    """
+
+    @abstractmethod
+    def acquire(self, key: str, owner: str, ttl: float, info: Optional[Dict] = None) -> bool:
+        """Toma o renueva `key` si está libre, caducada o ya es de `owner`. Atómico."""
+
+    @abstractmethod
+    def release(self, key: str, owner: str):
+        """Libera `key` solo si sigue siendo de `owner`."""
+
+    @abstractmethod
+    def live(self, prefix: str) -> List[Dict]:
+        """Arrendamientos vigentes cuya clave empieza por `prefix` ({key, owner, expires_at, info})."""
+
+
+class Storage:
+    """Agrupa los repositorios de un backend concreto."""
+    name = "base"
+
+    sources: SourceRepository
+    findings: FindingRepository
+    logs: LogRepository
+    users: UserRepository
+    leases: LeaseRepository
@@ -0,0 +1,84 @@
+from typing import Dict, Iterator, List, Optional
+
+from app.core.storage.base import FindingWrite, Storage
+from app.services.findings_cache import FindingsCache, cache_reads_total
+
+
+class _CachedFindingRepository:
+    """
+    Sirve page/stream/get_stats desde FindingsCache cuando está lista y tiene
+    los campos pedidos; si no, delega en el backend. Las escrituras van al
+    backend y, una vez confirmadas, se aplican a la caché.
+    """
+
+    def __init__(self, findings, cache: FindingsCache):
+        self._findings = findings
+        self._cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self._findings, name)
+
+    def page(self, filters, limit: int, after: Optional[Dict],
+             fields: Optional[List[str]]) -> List[Dict]:
+        if self._cache.covers(fields):
+            cache_reads_total.inc(operation="page", result="hit")
+            return self._cache.page(filters, limit, after, fields)
+        cache_reads_total.inc(operation="page", result="miss")
+        return self._findings.page(filters, limit, after, fields)
+
+    def stream(self, fields: Optional[List[str]] = None,
+               risk_levels: Optional[List[str]] = None,
+               source_id: Optional[str] = None) -> Iterator[Dict]:
+        if self._cache.covers(fields):
+            cache_reads_total.inc(operation="stream", result="hit")
+            return self._cache.stream(fields, risk_levels, source_id)
+        cache_reads_total.inc(operation="stream", result="miss")
+        return self._findings.stream(fields, risk_levels, source_id)
+
+    def get_stats(self) -> Optional[Dict]:
+        if self._cache.ready:
+            cache_reads_total.inc(operation="get_stats", result="hit")
+            return self._cache.stats()
+        cache_reads_total.inc(operation="get_stats", result="miss")
+        return self._findings.get_stats()
+
+    def upsert_many(self, writes: List[FindingWrite], stats_delta: Dict[str, int]):
+        self._findings.upsert_many(writes, stats_delta)
+        for doc_id, data, merge in writes:
+            self._cache.apply_write(doc_id, data, merge)
+
+    def create_many(self, docs: List[Dict]) -> List[str]:
+        ids = self._findings.create_many(docs)
+        for doc_id, data in zip(ids, docs):
+            self._cache.apply_write(doc_id, data, False)
+        return ids
+
+    def update(self, finding_id: str, changes: Dict) -> Optional[Dict]:
+        old = self._findings.update(finding_id, changes)
+        if old is not None:
+            self._cache.apply_write(finding_id, changes, True)
+        return old
+
+    def delete(self, finding_id: str) -> Optional[Dict]:
+        old = self._findings.delete(finding_id)
+        self._cache.apply_delete(finding_id)
+        return old
+
+
+class CachedStorage(Storage):
+    """Backend cuyas lecturas de hallazgos de la API salen de la caché en memoria (services/findings_cache.py)."""
+
+    def __init__(self, storage: Storage, cache: FindingsCache):
+        self.inner = storage
+        self.cache = cache
+        self.name = storage.name
+        self.sources = storage.sources
+        self.findings = _CachedFindingRepository(storage.findings, cache)
+        self.logs = storage.logs
+        self.users = storage.users
+        self.leases = storage.leases
+
+
+def uncached(storage: Storage) -> Storage:
+    """El backend sin caché (reconciliación: tiene que contar lo que hay de verdad)."""
+    return storage.inner if isinstance(storage, CachedStorage) else storage
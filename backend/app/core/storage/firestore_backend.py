@@ -0,0 +1,251 @@
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from firebase_admin import firestore
+
+from app.core.storage.base import (
+    FindingRepository, FindingWrite, LeaseRepository, LogRepository, SourceRepository, Storage,
+    UserRepository,
+)
+from app.services.stats import counter_delta, merge_deltas, update_delta
+
+STATS_COLLECTION = "stats"
+STATS_DOC = "findings"
+
+
+def _increments(delta: Dict[str, int]) -> Dict:
+    """Convierte {"risk_level.high": 1} en el dict anidado con firestore.Increment para set(merge=True)."""
+    data = {"updated_at": datetime.utcnow()}
+    for path, value in delta.items():
+        if "." in path:
+            group, key = path.split(".", 1)
+            data.setdefault(group, {})[key] = firestore.Increment(value)
+        else:
+            data[path] = firestore.Increment(value)
+    return data
+
+
+class FirestoreSourceRepository(SourceRepository):
+    def __init__(self, db):
+        self.collection = db.collection("sources")
+
+    def list(self) -> List[Dict]:
+        return [{"id": doc.id, **doc.to_dict()} for doc in self.collection.stream()]
+
+    def find_by_url(self, url: str) -> Optional[Dict]:
+        for doc in self.collection.where("url", "==", url).limit(1).stream():
+            return {"id": doc.id, **doc.to_dict()}
+        return None
+
+    def add(self, data: Dict) -> str:
+        return self.collection.add(data)[1].id
+
+    def update(self, source_id: str, data: Dict):
+        self.collection.document(source_id).update(data)
+
+    def delete(self, source_id: str):
+        self.collection.document(source_id).delete()
+
+
+class FirestoreFindingRepository(FindingRepository):
+    def __init__(self, db):
+        self.db = db
+        self.collection = db.collection("findings")
+        self.stats_ref = db.collection(STATS_COLLECTION).document(STATS_DOC)
+
+    def _apply_delta(self, batch, delta: Dict[str, int]):
+        # Funciona igual con un WriteBatch o con una Transaction abierta
+        if delta:
+            batch.set(self.stats_ref, _increments(delta), merge=True)
+
+    def get(self, finding_id: str) -> Optional[Dict]:
+        doc = self.collection.document(finding_id).get()
+        return {"id": doc.id, **doc.to_dict()} if doc.exists else None
+
+    def _query(self, filters):
+        """
+        Filtros en servidor. backend/firestore.indexes.json declara un índice
+        compuesto por cada combinación de igualdades (riesgo, estado, fuente)
+        + published_date; el mismo índice sirve con o sin rango de fechas.
+        Los documentos sin published_date no aparecen: ver services/backfill.py.
+        """
+        query = self.collection
+        for field in ("risk_level", "status", "source_id"):
+            value = getattr(filters, field)
+            if value:
+                query = query.where(field, "==", value)
+        if filters.date_from:
+            query = query.where("published_date", ">=", filters.date_from)
+        if filters.date_to:
+            query = query.where("published_date", "<=", filters.date_to)
+        return (query.order_by("published_date", direction=firestore.Query.DESCENDING)
+                     .order_by("__name__", direction=firestore.Query.DESCENDING))
+
+    def page(self, filters, limit: int, after: Optional[Dict],
+             fields: Optional[List[str]]) -> List[Dict]:
+        query = self._query(filters)
+        if fields:
+            query = query.select(fields)
+        if after:
+            query = query.start_after(after)
+        return [{"id": doc.id, **doc.to_dict()} for doc in query.limit(limit).stream()]
+
+    def stream(self, fields: Optional[List[str]] = None,
+               risk_levels: Optional[List[str]] = None,
+               source_id: Optional[str] = None) -> Iterator[Dict]:
+        query = self.collection
+        if source_id:
+            query = query.where("source_id", "==", source_id)
+        if risk_levels:
+            query = query.where("risk_level", "in", risk_levels)
+        if fields:
+            query = query.select(fields)
+        for doc in query.stream():
+            yield {"id": doc.id, **(doc.to_dict() or {})}
+
+    def upsert_many(self, writes: List[FindingWrite], stats_delta: Dict[str, int]):
+        batch = self.db.batch()
+        for doc_id, data, merge in writes:
+            batch.set(self.collection.document(doc_id), data, merge=merge)
+        self._apply_delta(batch, stats_delta)
+        batch.commit()
+
+    def create_many(self, docs: List[Dict]) -> List[str]:
+        batch = self.db.batch()
+        ids = []
+        for data in docs:
+            ref = self.collection.document()
+            batch.set(ref, data)
+            ids.append(ref.id)
+        self._apply_delta(batch, merge_deltas(*(counter_delta(None, d) for d in docs)))
+        batch.commit()
+        return ids
+
+    def update(self, finding_id: str, changes: Dict) -> Optional[Dict]:
+        doc_ref = self.collection.document(finding_id)
+
+        # Transacción: el cambio y los contadores se aplican juntos
+        @firestore.transactional
+        def apply_update(transaction):
+            doc = doc_ref.get(transaction=transaction)
+            if not doc.exists:
+                return None
+            old = doc.to_dict()
+            transaction.update(doc_ref, changes)
+            self._apply_delta(transaction, update_delta(old, changes))
+            return old
+
+        return apply_update(self.db.transaction())
+
+    def delete(self, finding_id: str) -> Optional[Dict]:
+        doc_ref = self.collection.document(finding_id)
+
+        @firestore.transactional
+        def apply_delete(transaction):
+            doc = doc_ref.get(transaction=transaction)
+            if not doc.exists:
+                return None
+            old = doc.to_dict()
+            transaction.delete(doc_ref)
+            self._apply_delta(transaction, counter_delta(old, None))
+            return old
+
+        return apply_delete(self.db.transaction())
+
+    def get_stats(self) -> Optional[Dict]:
+        doc = self.stats_ref.get()
+        return doc.to_dict() if doc.exists else None
+
+    def watch(self, on_change):
+        def callback(docs, changes, read_time):
+            on_change([(change.document.id,
+                        None if change.type.name == "REMOVED" else change.document.to_dict())
+                       for change in changes])
+
+        return self.collection.on_snapshot(callback).unsubscribe
+
+    def set_stats(self, snapshot: Dict):
+        self.stats_ref.set(snapshot)
+
+
+class FirestoreLogRepository(LogRepository):
+    def __init__(self, db):
+        self.db = db
+        self.collection = db.collection("system_logs")
+
+    def add_many(self, entries: List[Dict]):
+        if len(entries) == 1:
+            self.collection.add(entries[0])
+            return
+        batch = self.db.batch()
+        for entry in entries:
+            batch.set(self.collection.document(), entry)
+        batch.commit()
+
+    def recent(self, limit: int = 50) -> List[Dict]:
+        query = self.collection.order_by("timestamp", direction=firestore.Query.DESCENDING).limit(limit)
+        return [doc.to_dict() for doc in query.stream()]
+
+
+class FirestoreUserRepository(UserRepository):
+    def __init__(self, db):
+        self.collection = db.collection("users")
+
+    def find_by_username(self, username: str) -> Optional[Dict]:
+        for doc in self.collection.where("username", "==", username).limit(1).stream():
+            return {"id": doc.id, **doc.to_dict()}
+        return None
+
+    def add(self, data: Dict) -> str:
+        return self.collection.add(data)[1].id
+
+
+class FirestoreLeaseRepository(LeaseRepository):
+    def __init__(self, db):
+        self.db = db
+        self.collection = db.collection("leases")
+
+    def acquire(self, key: str, owner: str, ttl: float, info: Optional[Dict] = None) -> bool:
+        doc_ref = self.collection.document(key)
+
+        @firestore.transactional
+        def apply_acquire(transaction):
+            now = time.time()
+            doc = doc_ref.get(transaction=transaction)
+            if doc.exists:
+                current = doc.to_dict()
+                if current["owner"] != owner and current["expires_at"] > now:
+                    return False
+            transaction.set(doc_ref, {"key": key, "owner": owner, "expires_at": now + ttl, "info": info or {}})
+            return True
+
+        return apply_acquire(self.db.transaction())
+
+    def release(self, key: str, owner: str):
+        doc_ref = self.collection.document(key)
+
+        @firestore.transactional
+        def apply_release(transaction):
+            doc = doc_ref.get(transaction=transaction)
+            if doc.exists and doc.to_dict().get("owner") == owner:
+                transaction.delete(doc_ref)
+
+        apply_release(self.db.transaction())
+
+    def live(self, prefix: str) -> List[Dict]:
+        now = time.time()
+        query = self.collection.where("key", ">=", prefix).where("key", "<", prefix + "\uf8ff")
+        return [d for d in (doc.to_dict() for doc in query.stream()) if d["expires_at"] > now]
+
+
+class FirestoreStorage(Storage):
+    name = "firestore"
+
+    def __init__(self, db):
+        self.db = db
+        self.sources = FirestoreSourceRepository(db)
+        self.findings = FirestoreFindingRepository(db)
+        self.logs = FirestoreLogRepository(db)
+        self.users = FirestoreUserRepository(db)
+        self.leases = FirestoreLeaseRepository(db)
@@ -0,0 +1,57 @@
+from typing import Dict, List, Optional
+
+from app.core.storage.base import FindingWrite, Storage
+
+
+class _IndexedFindingRepository:
+    """
+    Repite en el índice de búsqueda cada escritura de hallazgos ya confirmada.
+    Un fallo del índice no rompe la escritura: la sincronización periódica lo repara.
+    """
+
+    def __init__(self, findings, index):
+        self._findings = findings
+        self._index = index
+
+    def __getattr__(self, name):
+        return getattr(self._findings, name)
+
+    def _mirror(self, action, *args):
+        try:
+            action(*args)
+        except Exception as e:
+            print(f"⚠️ Índice de búsqueda desactualizado ({e}); se corregirá en la próxima sincronización.")
+
+    def upsert_many(self, writes: List[FindingWrite], stats_delta: Dict[str, int]):
+        self._findings.upsert_many(writes, stats_delta)
+        self._mirror(self._index.upsert_many, [(doc_id, data) for doc_id, data, _ in writes])
+
+    def create_many(self, docs: List[Dict]) -> List[str]:
+        ids = self._findings.create_many(docs)
+        self._mirror(self._index.upsert_many, list(zip(ids, docs)))
+        return ids
+
+    def update(self, finding_id: str, changes: Dict) -> Optional[Dict]:
+        old = self._findings.update(finding_id, changes)
+        if old is not None:
+            self._mirror(self._index.upsert, finding_id, changes)
+        return old
+
+    def delete(self, finding_id: str) -> Optional[Dict]:
+        old = self._findings.delete(finding_id)
+        self._mirror(self._index.remove, finding_id)
+        return old
+
+
+class IndexedStorage(Storage):
+    """Backend cuyas escrituras de hallazgos alimentan también el índice de texto (services/search.py)."""
+
+    def __init__(self, storage: Storage, index):
+        self.inner = storage
+        self.index = index
+        self.name = storage.name
+        self.sources = storage.sources
+        self.findings = _IndexedFindingRepository(storage.findings, index)
+        self.logs = storage.logs
+        self.users = storage.users
+        self.leases = storage.leases
@@ -0,0 +1,36 @@
+from app.core.metrics import current_endpoint, storage_calls_total
+from app.core.storage.base import Storage
+
+
+class _CountingRepository:
+    """Proxy que cuenta cada llamada al repositorio con la ruta de la API que la originó."""
+
+    def __init__(self, repository, backend: str, prefix: str):
+        self._repository = repository
+        self._backend = backend
+        self._prefix = prefix
+
+    def __getattr__(self, name):
+        attr = getattr(self._repository, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+        operation = f"{self._prefix}.{name}"
+
+        def counted(*args, **kwargs):
+            storage_calls_total.inc(endpoint=current_endpoint.get(), backend=self._backend, operation=operation)
+            return attr(*args, **kwargs)
+
+        return counted
+
+
+class InstrumentedStorage(Storage):
+    """Envuelve un backend para exponer sentinel_storage_calls_total en /metrics."""
+
+    def __init__(self, storage: Storage):
+        self.inner = storage
+        self.name = storage.name
+        self.sources = _CountingRepository(storage.sources, storage.name, "sources")
+        self.findings = _CountingRepository(storage.findings, storage.name, "findings")
+        self.logs = _CountingRepository(storage.logs, storage.name, "logs")
+        self.users = _CountingRepository(storage.users, storage.name, "users")
+        self.leases = _CountingRepository(storage.leases, storage.name, "leases")
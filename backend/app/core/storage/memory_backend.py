@@ -0,0 +1,201 @@
+import copy
+import threading
+import time
+import uuid
+from typing import Dict, Iterator, List, Optional
+
+from app.core.storage.base import (
+    FindingRepository, FindingWrite, LeaseRepository, LogRepository, SourceRepository, Storage,
+    UserRepository,
+    date_key, matches, merge_doc, project,
+)
+from app.services.stats import apply_to_snapshot, counter_delta, merge_deltas, update_delta
+
+
+def _new_id() -> str:
+    return uuid.uuid4().hex[:20]
+
+
+class MemorySourceRepository(SourceRepository):
+    def __init__(self, lock):
+        self._lock = lock
+        self._docs: Dict[str, Dict] = {}
+
+    def list(self) -> List[Dict]:
+        with self._lock:
+            return [{"id": k, **copy.deepcopy(v)} for k, v in self._docs.items()]
+
+    def find_by_url(self, url: str) -> Optional[Dict]:
+        with self._lock:
+            for k, v in self._docs.items():
+                if v.get("url") == url:
+                    return {"id": k, **copy.deepcopy(v)}
+        return None
+
+    def add(self, data: Dict) -> str:
+        source_id = _new_id()
+        with self._lock:
+            self._docs[source_id] = copy.deepcopy(data)
+        return source_id
+
+    def update(self, source_id: str, data: Dict):
+        with self._lock:
+            if source_id not in self._docs:
+                raise KeyError(f"Source {source_id} not found")
+            self._docs[source_id].update(copy.deepcopy(data))
+
+    def delete(self, source_id: str):
+        with self._lock:
+            self._docs.pop(source_id, None)
+
+
+class MemoryFindingRepository(FindingRepository):
+    def __init__(self, lock):
+        self._lock = lock
+        self._docs: Dict[str, Dict] = {}
+        self._stats: Optional[Dict] = None
+
+    def _apply_delta(self, delta: Dict[str, int]):
+        if delta:
+            self._stats = apply_to_snapshot(self._stats or {}, delta)
+
+    def get(self, finding_id: str) -> Optional[Dict]:
+        with self._lock:
+            doc = self._docs.get(finding_id)
+            return {"id": finding_id, **copy.deepcopy(doc)} if doc is not None else None
+
+    def page(self, filters, limit: int, after: Optional[Dict],
+             fields: Optional[List[str]]) -> List[Dict]:
+        with self._lock:
+            rows = [(date_key(d.get("published_date")), k, d)
+                    for k, d in self._docs.items()
+                    if "published_date" in d and matches(d, filters)]
+        rows.sort(key=lambda r: (r[0], r[1]), reverse=True)
+        if after:
+            cursor = (date_key(after["published_date"]), after["__name__"])
+            rows = [r for r in rows if (r[0], r[1]) < cursor]
+        return [{"id": k, **copy.deepcopy(project(d, fields))} for _, k, d in rows[:limit]]
+
+    def stream(self, fields: Optional[List[str]] = None,
+               risk_levels: Optional[List[str]] = None,
+               source_id: Optional[str] = None) -> Iterator[Dict]:
+        with self._lock:
+            snapshot = list(self._docs.items())
+        for k, d in snapshot:
+            if risk_levels and d.get("risk_level") not in risk_levels:
+                continue
+            if source_id and d.get("source_id") != source_id:
+                continue
+            yield {"id": k, **copy.deepcopy(project(d, fields))}
+
+    def upsert_many(self, writes: List[FindingWrite], stats_delta: Dict[str, int]):
+        with self._lock:
+            for doc_id, data, merge in writes:
+                self._docs[doc_id] = merge_doc(self._docs.get(doc_id), copy.deepcopy(data), merge)
+            self._apply_delta(stats_delta)
+
+    def create_many(self, docs: List[Dict]) -> List[str]:
+        ids = [_new_id() for _ in docs]
+        with self._lock:
+            for doc_id, data in zip(ids, docs):
+                self._docs[doc_id] = copy.deepcopy(data)
+            self._apply_delta(merge_deltas(*(counter_delta(None, d) for d in docs)))
+        return ids
+
+    def update(self, finding_id: str, changes: Dict) -> Optional[Dict]:
+        with self._lock:
+            old = self._docs.get(finding_id)
+            if old is None:
+                return None
+            self._docs[finding_id] = {**old, **copy.deepcopy(changes)}
+            self._apply_delta(update_delta(old, changes))
+            return old
+
+    def delete(self, finding_id: str) -> Optional[Dict]:
+        with self._lock:
+            old = self._docs.pop(finding_id, None)
+            if old is not None:
+                self._apply_delta(counter_delta(old, None))
+            return old
+
+    def get_stats(self) -> Optional[Dict]:
+        with self._lock:
+            return copy.deepcopy(self._stats)
+
+    def set_stats(self, snapshot: Dict):
+        with self._lock:
+            self._stats = copy.deepcopy(snapshot)
+
+
+class MemoryLogRepository(LogRepository):
+    def __init__(self, lock):
+        self._lock = lock
+        self._entries: List[Dict] = []
+
+    def add_many(self, entries: List[Dict]):
+        with self._lock:
+            self._entries.extend(copy.deepcopy(entries))
+
+    def recent(self, limit: int = 50) -> List[Dict]:
+        with self._lock:
+            entries = sorted(self._entries, key=lambda e: date_key(e.get("timestamp")), reverse=True)
+            return copy.deepcopy(entries[:limit])
+
+
+class MemoryUserRepository(UserRepository):
+    def __init__(self, lock):
+        self._lock = lock
+        self._docs: Dict[str, Dict] = {}
+
+    def find_by_username(self, username: str) -> Optional[Dict]:
+        with self._lock:
+            for k, v in self._docs.items():
+                if v.get("username") == username:
+                    return {"id": k, **copy.deepcopy(v)}
+        return None
+
+    def add(self, data: Dict) -> str:
+        user_id = _new_id()
+        with self._lock:
+            self._docs[user_id] = copy.deepcopy(data)
+        return user_id
+
+
+class MemoryLeaseRepository(LeaseRepository):
+    def __init__(self, lock):
+        self._lock = lock
+        self._leases: Dict[str, Dict] = {}
+
+    def acquire(self, key: str, owner: str, ttl: float, info: Optional[Dict] = None) -> bool:
+        now = time.time()
+        with self._lock:
+            current = self._leases.get(key)
+            if current and current["owner"] != owner and current["expires_at"] > now:
+                return False
+            self._leases[key] = {"key": key, "owner": owner, "expires_at": now + ttl,
+                                 "info": copy.deepcopy(info or {})}
+            return True
+
+    def release(self, key: str, owner: str):
+        with self._lock:
+            if self._leases.get(key, {}).get("owner") == owner:
+                del self._leases[key]
+
+    def live(self, prefix: str) -> List[Dict]:
+        now = time.time()
+        with self._lock:
+            return [copy.deepcopy(v) for k, v in self._leases.items()
+                    if k.startswith(prefix) and v["expires_at"] > now]
+
+
+class MemoryStorage(Storage):
+    """Backend en proceso, sin persistencia. Pensado para desarrollo, tests de carga y benchmarks."""
+    name = "memory"
+
+    def __init__(self):
+        lock = threading.RLock()
+        self.sources = MemorySourceRepository(lock)
+        self.findings = MemoryFindingRepository(lock)
+        self.logs = MemoryLogRepository(lock)
+        self.users = MemoryUserRepository(lock)
+        self.leases = MemoryLeaseRepository(lock)
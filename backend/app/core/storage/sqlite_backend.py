@@ -0,0 +1,354 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from app.core.storage.base import (
+    FindingRepository, FindingWrite, LeaseRepository, LogRepository, SourceRepository, Storage,
+    UserRepository,
+    date_key, merge_doc, project,
+)
+from app.services.stats import counter_delta, merge_deltas, update_delta
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    id TEXT PRIMARY KEY,
+    url TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sources_url ON sources(url);
+
+CREATE TABLE IF NOT EXISTS findings (
+    id TEXT PRIMARY KEY,
+    risk_level TEXT,
+    status TEXT,
+    source_id TEXT,
+    published_date TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS findings_order ON findings(published_date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS findings_risk ON findings(risk_level, published_date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS findings_status ON findings(status, published_date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS findings_source ON findings(source_id, published_date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS findings_source_id ON findings(source_id, id);
+
+CREATE TABLE IF NOT EXISTS stats (
+    key TEXT PRIMARY KEY,
+    value
+);
+
+CREATE TABLE IF NOT EXISTS logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS logs_timestamp ON logs(timestamp DESC);
+
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    username TEXT UNIQUE,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS leases (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    info TEXT
+);
+"""
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"No serializable: {type(value)}")
+
+
+def _dumps(data: Dict) -> str:
+    return json.dumps(data, default=_json_default)
+
+
+def _new_id() -> str:
+    return uuid.uuid4().hex[:20]
+
+
+class SQLiteDatabase:
+    """
+    Conexión compartida en modo WAL: lecturas concurrentes con un escritor, y
+    varios procesos pueden usar el mismo fichero (busy_timeout para esperar turno).
+    """
+
+    def __init__(self, path: str, schema: str = SCHEMA):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA busy_timeout=30000")
+        self.conn.executescript(schema)
+
+    @contextmanager
+    def transaction(self):
+        # BEGIN IMMEDIATE toma el bloqueo de escritura al inicio: sin carreras entre leer y escribir
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def query(self, sql: str, params=()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+
+class SQLiteSourceRepository(SourceRepository):
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    def list(self) -> List[Dict]:
+        return [{"id": row[0], **json.loads(row[1])}
+                for row in self.db.query("SELECT id, data FROM sources")]
+
+    def find_by_url(self, url: str) -> Optional[Dict]:
+        rows = self.db.query("SELECT id, data FROM sources WHERE url = ? LIMIT 1", (url,))
+        return {"id": rows[0][0], **json.loads(rows[0][1])} if rows else None
+
+    def add(self, data: Dict) -> str:
+        source_id = _new_id()
+        with self.db.transaction() as conn:
+            conn.execute("INSERT INTO sources (id, url, data) VALUES (?, ?, ?)",
+                         (source_id, data.get("url"), _dumps(data)))
+        return source_id
+
+    def update(self, source_id: str, data: Dict):
+        with self.db.transaction() as conn:
+            row = conn.execute("SELECT data FROM sources WHERE id = ?", (source_id,)).fetchone()
+            if row is None:
+                raise KeyError(f"Source {source_id} not found")
+            merged = {**json.loads(row[0]), **data}
+            conn.execute("UPDATE sources SET url = ?, data = ? WHERE id = ?",
+                         (merged.get("url"), _dumps(merged), source_id))
+
+    def delete(self, source_id: str):
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM sources WHERE id = ?", (source_id,))
+
+
+class SQLiteFindingRepository(FindingRepository):
+    native_dates = False
+
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    @staticmethod
+    def _apply_delta(conn, delta: Dict[str, int]):
+        if not delta:
+            return
+        conn.executemany(
+            "INSERT INTO stats (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = value + excluded.value",
+            list(delta.items()),
+        )
+        conn.execute("INSERT OR REPLACE INTO stats (key, value) VALUES ('updated_at', ?)",
+                     (datetime.utcnow().isoformat(),))
+
+    @staticmethod
+    def _write(conn, doc_id: str, data: Dict):
+        published = data.get("published_date")
+        conn.execute(
+            "INSERT OR REPLACE INTO findings (id, risk_level, status, source_id, published_date, data) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (doc_id, data.get("risk_level"), data.get("status"), data.get("source_id"),
+             date_key(published) if published is not None else None, _dumps(data)),
+        )
+
+    @staticmethod
+    def _read(conn, doc_id: str) -> Optional[Dict]:
+        row = conn.execute("SELECT data FROM findings WHERE id = ?", (doc_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get(self, finding_id: str) -> Optional[Dict]:
+        rows = self.db.query("SELECT data FROM findings WHERE id = ?", (finding_id,))
+        return {"id": finding_id, **json.loads(rows[0][0])} if rows else None
+
+    def page(self, filters, limit: int, after: Optional[Dict],
+             fields: Optional[List[str]]) -> List[Dict]:
+        where, params = ["published_date IS NOT NULL"], []
+        for field in ("risk_level", "status", "source_id"):
+            value = getattr(filters, field)
+            if value:
+                where.append(f"{field} = ?")
+                params.append(value)
+        if filters.date_from:
+            where.append("published_date >= ?")
+            params.append(date_key(filters.date_from))
+        if filters.date_to:
+            where.append("published_date <= ?")
+            params.append(date_key(filters.date_to))
+        if after:
+            cursor_date = date_key(after["published_date"])
+            where.append("(published_date < ? OR (published_date = ? AND id < ?))")
+            params.extend([cursor_date, cursor_date, after["__name__"]])
+
+        sql = (f"SELECT id, data FROM findings WHERE {' AND '.join(where)} "
+               f"ORDER BY published_date DESC, id DESC LIMIT ?")
+        rows = self.db.query(sql, (*params, limit))
+        return [{"id": row[0], **project(json.loads(row[1]), fields)} for row in rows]
+
+    def stream(self, fields: Optional[List[str]] = None,
+               risk_levels: Optional[List[str]] = None,
+               source_id: Optional[str] = None) -> Iterator[Dict]:
+        # Por bloques de id para no cargar la tabla entera ni mantener el lock
+        last_id = ""
+        while True:
+            sql, params = "SELECT id, data FROM findings WHERE id > ?", [last_id]
+            if source_id:
+                sql += " AND source_id = ?"
+                params.append(source_id)
+            if risk_levels:
+                sql += f" AND risk_level IN ({','.join('?' * len(risk_levels))})"
+                params.extend(risk_levels)
+            rows = self.db.query(sql + " ORDER BY id LIMIT 1000", params)
+            if not rows:
+                return
+            for row in rows:
+                yield {"id": row[0], **project(json.loads(row[1]), fields)}
+            last_id = rows[-1][0]
+
+    def upsert_many(self, writes: List[FindingWrite], stats_delta: Dict[str, int]):
+        with self.db.transaction() as conn:
+            for doc_id, data, merge in writes:
+                current = self._read(conn, doc_id) if merge else None
+                self._write(conn, doc_id, merge_doc(current, data, merge))
+            self._apply_delta(conn, stats_delta)
+
+    def create_many(self, docs: List[Dict]) -> List[str]:
+        ids = [_new_id() for _ in docs]
+        with self.db.transaction() as conn:
+            for doc_id, data in zip(ids, docs):
+                self._write(conn, doc_id, data)
+            self._apply_delta(conn, merge_deltas(*(counter_delta(None, d) for d in docs)))
+        return ids
+
+    def update(self, finding_id: str, changes: Dict) -> Optional[Dict]:
+        with self.db.transaction() as conn:
+            old = self._read(conn, finding_id)
+            if old is None:
+                return None
+            self._write(conn, finding_id, {**old, **changes})
+            self._apply_delta(conn, update_delta(old, changes))
+            return old
+
+    def delete(self, finding_id: str) -> Optional[Dict]:
+        with self.db.transaction() as conn:
+            old = self._read(conn, finding_id)
+            if old is not None:
+                conn.execute("DELETE FROM findings WHERE id = ?", (finding_id,))
+                self._apply_delta(conn, counter_delta(old, None))
+            return old
+
+    def get_stats(self) -> Optional[Dict]:
+        rows = self.db.query("SELECT key, value FROM stats")
+        if not rows:
+            return None
+        stats = {}
+        for key, value in rows:
+            if "." in key:
+                group, name = key.split(".", 1)
+                stats.setdefault(group, {})[name] = value
+            else:
+                stats[key] = value
+        return stats
+
+    def set_stats(self, snapshot: Dict):
+        rows = []
+        for key, value in snapshot.items():
+            if isinstance(value, dict):
+                rows.extend((f"{key}.{name}", count) for name, count in value.items())
+            else:
+                rows.append((key, value.isoformat() if isinstance(value, datetime) else value))
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM stats")
+            conn.executemany("INSERT INTO stats (key, value) VALUES (?, ?)", rows)
+
+
+class SQLiteLogRepository(LogRepository):
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    def add_many(self, entries: List[Dict]):
+        with self.db.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO logs (timestamp, data) VALUES (?, ?)",
+                [(date_key(e.get("timestamp")), _dumps(e)) for e in entries],
+            )
+
+    def recent(self, limit: int = 50) -> List[Dict]:
+        rows = self.db.query("SELECT data FROM logs ORDER BY timestamp DESC LIMIT ?", (limit,))
+        return [json.loads(row[0]) for row in rows]
+
+
+class SQLiteUserRepository(UserRepository):
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    def find_by_username(self, username: str) -> Optional[Dict]:
+        rows = self.db.query("SELECT id, data FROM users WHERE username = ?", (username,))
+        return {"id": rows[0][0], **json.loads(rows[0][1])} if rows else None
+
+    def add(self, data: Dict) -> str:
+        user_id = _new_id()
+        with self.db.transaction() as conn:
+            conn.execute("INSERT INTO users (id, username, data) VALUES (?, ?, ?)",
+                         (user_id, data.get("username"), _dumps(data)))
+        return user_id
+
+
+class SQLiteLeaseRepository(LeaseRepository):
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    def acquire(self, key: str, owner: str, ttl: float, info: Optional[Dict] = None) -> bool:
+        now = time.time()
+        with self.db.transaction() as conn:
+            row = conn.execute("SELECT owner, expires_at FROM leases WHERE key = ?", (key,)).fetchone()
+            if row and row[0] != owner and row[1] > now:
+                return False
+            conn.execute("INSERT OR REPLACE INTO leases (key, owner, expires_at, info) VALUES (?, ?, ?, ?)",
+                         (key, owner, now + ttl, _dumps(info or {})))
+            return True
+
+    def release(self, key: str, owner: str):
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner))
+
+    def live(self, prefix: str) -> List[Dict]:
+        rows = self.db.query(
+            "SELECT key, owner, expires_at, info FROM leases WHERE key >= ? AND key < ? AND expires_at > ?",
+            (prefix, prefix + "\uffff", time.time()))
+        return [{"key": r[0], "owner": r[1], "expires_at": r[2], "info": json.loads(r[3] or "{}")} for r in rows]
+
+
+class SQLiteStorage(Storage):
+    """Backend local en un fichero SQLite (WAL). Persistente y apto para varios procesos."""
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.db = SQLiteDatabase(path)
+        self.sources = SQLiteSourceRepository(self.db)
+        self.findings = SQLiteFindingRepository(self.db)
+        self.logs = SQLiteLogRepository(self.db)
+        self.users = SQLiteUserRepository(self.db)
+        self.leases = SQLiteLeaseRepository(self.db)
@@ -40,6 +40,36 @@ if not firebase_admin._apps:
         print(f"Directorio actual: {os.getcwd()}")
         print(f"Contenido: {os.listdir(os.getcwd())}")
 
+@app.on_event("startup")
+def start_search_index():
+    # Índice de búsqueda local: se reconstruye si está vacío y se resincroniza periódicamente
+    from app.core.storage import get_storage
+    from app.services.search import start_background_sync
+    start_background_sync(get_storage)
+
+@app.on_event("startup")
+def start_findings_cache():
+    # Lista, stats y exportaciones se sirven desde memoria; la caché carga en segundo plano
+    from app.core.storage import get_storage, set_storage
+    from app.core.storage.cached import CachedStorage
+    from app.services.findings_cache import CACHE_ENABLED, FindingsCache
+    storage = get_storage()
+    if CACHE_ENABLED and not isinstance(storage, CachedStorage):
+        cache = FindingsCache(storage.findings)
+        cache.start()
+        set_storage(CachedStorage(storage, cache))
+
+@app.on_event("startup")
+def start_audit_sink():
+    # Reanuda el volcado de entradas de auditoría que quedaran en el spool
+    from app.services.audit import get_audit_sink
+    get_audit_sink().start()
+
+@app.on_event("shutdown")
+def flush_audit_sink():
+    from app.services.audit import get_audit_sink
+    get_audit_sink().close()
+
 app.include_router(api_router, prefix="/api/v1")
 app.include_router(reports_router, prefix="/api/v1")
 app.include_router(admin_router, prefix="/api/v1")
@@ -10,4 +10,10 @@ class Finding(BaseModel):
     published_date: datetime
     risk_score: float = 0.0 
     sentiment: float = 0.0
-    tags: List[str] = []
\ No newline at end of file
+    tags: List[str] = []
+    content_hash: Optional[str] = None
+    # Agrupación de casi-duplicados (ver services/clustering.py): firma MinHash,
+    # ID de la cabeza del grupo y, solo en la cabeza, cuántos hallazgos tiene
+    minhash: Optional[str] = None
+    cluster_id: Optional[str] = None
+    cluster_size: Optional[int] = None
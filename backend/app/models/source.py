@@ -9,4 +9,13 @@ class SourceCreate(BaseModel):
 
 class Source(SourceCreate):
     id: str
-    status: str = "active"
\ No newline at end of file
+    status: str = "active"
+    # Validadores HTTP del último contenido procesado (peticiones condicionales)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+    content_length: int = 0
+    # Marca de agua del último feed leído: {"guid", "published", "descending"} (ver scrapers/feed_stream.py)
+    high_water: Optional[Dict] = None
+    # Estado del planificador adaptativo (ver services/polling.py)
+    polling: Optional[Dict] = None
@@ -1,11 +1,15 @@
+import os
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Dict, List, Optional
 from app.models.source import Source
 from app.models.finding import Finding
 
+# Entradas leídas por consulta. Se puede ajustar por fuente con config["max_entries"]
+DEFAULT_MAX_ENTRIES = int(os.getenv("SENTINEL_MAX_ENTRIES", "50"))
+
 class BaseScraper(ABC):
     """Clase abstracta para definir la estructura de cualquier scraper"""
-    
+
     def __init__(self, source: Source):
         self.source = source
 
@@ -15,4 +19,55 @@ class BaseScraper(ABC):
         Método obligatorio que debe implementar cada scraper.
         Debe devolver una lista de objetos Finding.
         """
-        pass
\ No newline at end of file
+        pass
+
+    @property
+    def max_entries(self) -> int:
+        config = getattr(self.source, "config", None) or {}
+        return int(config.get("max_entries", DEFAULT_MAX_ENTRIES))
+
+    def build_request(self) -> Optional[Dict]:
+        """
+        Opcional. Si el scraper descarga su contenido por HTTP, devuelve
+        {"url": ..., "headers": {...}} para que el motor asíncrono haga la descarga
+        y luego llame a parse() con el cuerpo. Si devuelve None, el motor
+        ejecuta scrape() completo en un hilo.
+        """
+        return None
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Cabeceras If-None-Match / If-Modified-Since a partir de los validadores guardados."""
+        headers = {}
+        if getattr(self.source, "etag", None):
+            headers["If-None-Match"] = self.source.etag
+        if getattr(self.source, "last_modified", None):
+            headers["If-Modified-Since"] = self.source.last_modified
+        return headers
+
+    async def fetch(self, client) -> Optional[List[Finding]]:
+        """
+        Opcional. Para fuentes que necesitan varias peticiones (APIs): el motor
+        presta su cliente httpx asíncrono y usa los hallazgos devueltos. Si
+        devuelve None (por defecto), se usa build_request() o scrape().
+        """
+        return None
+
+    def high_water(self) -> Optional[Dict]:
+        """Opcional. Marca de agua nueva tras fetch() (se guarda en Source.high_water)."""
+        return None
+
+    def stream_parser(self):
+        """
+        Opcional. Parser incremental (p. ej. FeedStream): el motor le pasa el cuerpo
+        por trozos, deja de descargar cuando feed() devuelve True y luego llama a
+        finish() con él. Si devuelve None, se descarga el cuerpo entero y se usa parse().
+        """
+        return None
+
+    def finish(self, stream) -> List[Finding]:
+        """Hallazgos de una lectura incremental terminada (solo si stream_parser() se usa)."""
+        raise NotImplementedError
+
+    def parse(self, payload: bytes) -> List[Finding]:
+        """Convierte el cuerpo descargado en hallazgos (solo si build_request() se usa)."""
+        raise NotImplementedError
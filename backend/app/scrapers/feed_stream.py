@@ -0,0 +1,210 @@
+"""
+Parser incremental de RSS/Atom.
+
+El cuerpo llega por trozos (feed()) a un XMLPullParser y cada <item>/<entry>
+se convierte en un dict en cuanto se cierra, y se descarta del árbol. La
+lectura se corta al llegar a la marca de agua de la fuente (GUID de la entrada
+más reciente ya procesada y su fecha), así que el coste de una consulta depende
+de lo nuevo y no del tamaño del feed: el motor deja de descargar en ese punto.
+
+Si el XML no es válido (entidades HTML, feeds rotos) se sigue acumulando el
+cuerpo y RSSScraper lo pasa entero a feedparser.
+"""
+import hashlib
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional
+
+ENTRY_TAGS = {"item", "entry"}
+LINK_RELS = {None, "", "alternate"}
+
+
+def _local(tag: str) -> str:
+    """Nombre sin espacio de nombres ('{http://www.w3.org/2005/Atom}entry' -> 'entry')."""
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
+
+
+def parse_date(value: Optional[str]) -> Optional[datetime]:
+    """RFC 822 (RSS) o ISO 8601 (Atom, dc:date), como datetime UTC sin zona."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _entry_from_element(elem) -> Dict:
+    entry = {"guid": None, "title": None, "link": None, "summary": None, "published": None}
+    content = updated = None
+    for child in elem:
+        name = _local(child.tag)
+        text = (child.text or "").strip()
+        if name == "title":
+            entry["title"] = text
+        elif name == "link":
+            # Atom: <link rel="alternate" href="..."/>; RSS: <link>url</link>
+            href = child.get("href")
+            if href is None:
+                entry["link"] = entry["link"] or text
+            elif child.get("rel") in LINK_RELS and not entry["link"]:
+                entry["link"] = href
+        elif name in ("guid", "id"):
+            entry["guid"] = text
+        elif name in ("description", "summary"):
+            entry["summary"] = text
+        elif name in ("encoded", "content") and not content:
+            content = text
+        elif name in ("pubDate", "published", "issued", "date"):
+            entry["published"] = parse_date(text)
+        elif name in ("updated", "modified"):
+            updated = parse_date(text)
+    entry["summary"] = entry["summary"] or content or ""
+    entry["published"] = entry["published"] or updated
+    entry["guid"] = entry["guid"] or entry["link"]
+    return entry
+
+
+class FeedStream:
+    """
+    Estado de la lectura incremental de un feed.
+
+    `mark` es la marca de agua guardada en la fuente ({"guid", "published",
+    "descending"}). Solo se corta la lectura en la marca si el feed está
+    ordenado de más nuevo a más antiguo (descending, observado en consultas
+    anteriores); si no, las entradas anteriores a la marca se saltan pero se
+    sigue leyendo. `limit` acota las entradas nuevas por consulta.
+    """
+
+    def __init__(self, mark: Optional[Dict] = None, limit: int = 50):
+        mark = mark or {}
+        self.mark_guid = mark.get("guid")
+        self.mark_published = parse_date(mark.get("published"))
+        self.can_stop = bool(mark.get("descending")) and bool(self.mark_guid or self.mark_published)
+        self.was_descending = mark.get("descending")
+        self.limit = limit
+
+        self.entries: List[Dict] = []
+        self.done = False          # marca o límite alcanzados: no hace falta más cuerpo
+        self.reached_mark = False
+        self.limit_hit = False     # cortada por `limit`: puede haber más entradas nuevas sin leer
+        self.complete = False      # se leyó el cuerpo entero
+        self.error: Optional[Exception] = None
+        self.bytes_read = 0
+        self.parse_seconds = 0.0
+
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._stack: List = []
+        self._chunks: List[bytes] = []
+        self._hash = hashlib.sha256()
+        # Orden observado: None hasta ver dos entradas con fecha
+        self._descending: Optional[bool] = None
+        self._previous: Optional[datetime] = None
+        self._newest: Optional[Dict] = None
+
+    # --- Entrada ---
+    def feed(self, chunk: bytes) -> bool:
+        """Procesa un trozo del cuerpo. True si ya no hace falta seguir descargando."""
+        self.bytes_read += len(chunk)
+        self._hash.update(chunk)
+        self._chunks.append(chunk)
+        if self.done or self.error is not None:
+            return self.done
+        t0 = time.perf_counter()
+        try:
+            self._parser.feed(chunk)
+            self._drain()
+        except ET.ParseError as e:
+            # Se sigue acumulando el cuerpo para feedparser
+            self.error = e
+        self.parse_seconds += time.perf_counter() - t0
+        return self.done
+
+    def close(self, complete: bool):
+        """Fin de la descarga. `complete` indica si se leyó el cuerpo entero."""
+        self.complete = complete
+        if complete and not self.done and self.error is None:
+            t0 = time.perf_counter()
+            try:
+                self._parser.close()
+                self._drain()
+            except ET.ParseError as e:
+                self.error = e
+            self.parse_seconds += time.perf_counter() - t0
+
+    def body(self) -> bytes:
+        return b"".join(self._chunks)
+
+    def digest(self) -> str:
+        return self._hash.hexdigest()
+
+    # --- Entradas ---
+    def _drain(self):
+        for event, elem in self._parser.read_events():
+            if event == "start":
+                self._stack.append(elem)
+                continue
+            self._stack.pop()
+            if _local(elem.tag) not in ENTRY_TAGS or self.done:
+                continue
+            self.accept(_entry_from_element(elem))
+            # La entrada ya está convertida: fuera del árbol para no acumular memoria
+            if self._stack:
+                self._stack[-1].remove(elem)
+            if self.done:
+                return
+
+    def accept(self, entry: Dict):
+        """Aplica la marca de agua y el límite a una entrada (también a las de feedparser)."""
+        published = entry.get("published")
+        if published is not None:
+            if self._previous is not None and published > self._previous:
+                self._descending = False
+            elif self._previous is not None and self._descending is None:
+                self._descending = True
+            self._previous = published
+            if self._newest is None or published > (self._newest.get("published") or published):
+                self._newest = entry
+        if self._newest is None:
+            self._newest = entry
+
+        if self._before_mark(entry):
+            if self.can_stop:
+                self.reached_mark = True
+                self.done = True
+            return
+        self.entries.append(entry)
+        if len(self.entries) >= self.limit:
+            self.limit_hit = True
+            self.done = True
+
+    def _before_mark(self, entry: Dict) -> bool:
+        if self.mark_guid and entry.get("guid") == self.mark_guid:
+            return True
+        published = entry.get("published")
+        # Misma fecha que la marca pero otro GUID: se procesa (ráfagas con la misma hora)
+        return bool(self.mark_published and published and published < self.mark_published)
+
+    def high_water(self) -> Optional[Dict]:
+        """Marca de agua nueva tras la consulta, o None si no hay nada que actualizar."""
+        if not self.entries:
+            return None
+        newest = self._newest if self._newest in self.entries else self.entries[0]
+        published = newest.get("published")
+        if self.mark_published and (published is None or published < self.mark_published):
+            published = self.mark_published
+        descending = self._descending if self._descending is not None else self.was_descending
+        return {
+            "guid": newest.get("guid"),
+            "published": published.isoformat() if published else None,
+            "descending": bool(descending),
+        }
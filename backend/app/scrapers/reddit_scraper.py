@@ -0,0 +1,434 @@
+"""
+Fuentes de Reddit (type="reddit") sobre la API HTTP de Reddit.
+
+Documento de la fuente:
+    url:    https://www.reddit.com/r/netsec+cybersecurity   (sin /r/... = r/all)
+    config: {"queries": ["ransomware", "\"data breach\"", ...],
+             "stream": false}
+
+  - Consulta (por defecto): las queries se agrupan en búsquedas combinadas
+    "(q1) OR (q2) ..." de hasta MAX_QUERY_CHARS, ordenadas por "new", y se
+    pagina hasta la marca de agua de la búsqueda. Cada post se atribuye a las
+    queries que encajan con él y cada query guarda su propia marca
+    (high_water = {"queries": {query: created_utc}}).
+  - Stream (config["stream"] = true): un hilo de larga duración (RedditStreamer)
+    lee /r/<subs>/new cada STREAM_INTERVAL segundos con un cliente persistente
+    y guarda en memoria los posts que encajan con alguna query; cada ciclo del
+    planificador los recoge y siguen el camino normal (duplicados, análisis,
+    escritura por lotes).
+
+Todas las peticiones del proceso comparten un presupuesto (token bucket) que
+se ajusta con las cabeceras X-Ratelimit-Remaining / X-Ratelimit-Reset.
+SENTINEL_REDDIT_API_URL / SENTINEL_REDDIT_AUTH_URL permiten apuntar a un stub
+local (benchmarks/reddit_stub.py). Credenciales: REDDIT_CLIENT_ID y
+REDDIT_CLIENT_SECRET (OAuth de aplicación).
+"""
+import asyncio
+import os
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+from app.core.metrics import registry
+from app.models.finding import Finding
+from app.scrapers.base import BaseScraper
+
+REDDIT_API_URL = os.getenv("SENTINEL_REDDIT_API_URL", "https://oauth.reddit.com").rstrip("/")
+REDDIT_AUTH_URL = os.getenv("SENTINEL_REDDIT_AUTH_URL", "https://www.reddit.com").rstrip("/")
+REQUESTS_PER_MINUTE = float(os.getenv("SENTINEL_REDDIT_QPM", "60"))
+STREAM_INTERVAL = float(os.getenv("SENTINEL_REDDIT_STREAM_INTERVAL", "10"))
+USER_AGENT = "Sentinel_OSINT_Bot/1.0"
+
+MAX_QUERY_CHARS = 512     # límite de la búsqueda de Reddit
+PAGE_SIZE = 100
+MAX_PAGES = 5             # por búsqueda combinada y consulta
+STREAM_BUFFER = 2000      # posts pendientes por fuente en modo stream
+
+reddit_requests_total = registry.counter(
+    "sentinel_reddit_requests_total", "Peticiones a la API de Reddit", ["endpoint", "status"])
+reddit_budget_wait_seconds = registry.histogram(
+    "sentinel_reddit_budget_wait_seconds", "Espera por el presupuesto de peticiones de Reddit")
+reddit_ratelimit_remaining = registry.gauge(
+    "sentinel_reddit_ratelimit_remaining", "Peticiones restantes según X-Ratelimit-Remaining")
+
+
+class RateBudget:
+    """
+    Token bucket compartido entre hilos y event loops. acquire() devuelve 0 y
+    consume un token si hay uno disponible, o los segundos a esperar antes de
+    volver a intentarlo (así cada intento ve las últimas cabeceras). update()
+    ajusta el ritmo a lo que queda de la ventana que anuncia la API, descontando
+    las peticiones que siguen en vuelo.
+    """
+
+    def __init__(self, per_minute: float = REQUESTS_PER_MINUTE, burst: float = 10):
+        self.default_rate = per_minute / 60.0
+        self.rate = self.default_rate
+        self.capacity = burst
+        self.tokens = burst
+        self.in_flight = 0
+        self.not_before = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now < self.not_before:
+                return self.not_before - now
+            if self.tokens < 1:
+                return (1 - self.tokens) / self.rate
+            self.tokens -= 1
+            self.in_flight += 1
+            return 0.0
+
+    def release(self, remaining: Optional[float] = None, reset: Optional[float] = None):
+        """Fin de una petición. Con cabeceras: `remaining` peticiones hasta dentro de `reset` segundos."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.in_flight = max(0, self.in_flight - 1)
+            if remaining is None or reset is None:
+                return
+            reset = max(reset, 1.0)
+            available = remaining - self.in_flight
+            if available < 1:
+                # Ventana agotada: nada hasta que se reinicie, y luego al ritmo por defecto
+                self.tokens = 0
+                self.rate = self.default_rate
+                self.not_before = now + reset
+            else:
+                # Lo que queda se reparte hasta el reinicio de la ventana
+                self.rate = available / reset
+                self.tokens = min(self.tokens, available)
+
+
+budget = RateBudget()
+
+
+class _AccessToken:
+    """Token OAuth de aplicación (client_credentials), compartido por el proceso."""
+
+    def __init__(self):
+        self.value: Optional[str] = None
+        self.expires = 0.0
+        self._lock = threading.Lock()
+
+    async def get(self, client: httpx.AsyncClient) -> Optional[str]:
+        client_id, secret = os.getenv("REDDIT_CLIENT_ID"), os.getenv("REDDIT_CLIENT_SECRET")
+        if not (client_id and secret):
+            return None
+        with self._lock:
+            if self.value and time.time() < self.expires - 60:
+                return self.value
+        response = await client.post(f"{REDDIT_AUTH_URL}/api/v1/access_token", auth=(client_id, secret),
+                                     data={"grant_type": "client_credentials"})
+        reddit_requests_total.inc(endpoint="access_token", status=str(response.status_code))
+        response.raise_for_status()
+        data = response.json()
+        with self._lock:
+            self.value = data["access_token"]
+            self.expires = time.time() + float(data.get("expires_in", 3600))
+            return self.value
+
+
+access_token = _AccessToken()
+
+
+def has_credentials() -> bool:
+    """Sin credenciales solo se puede hablar con un stub (URL de API no por defecto)."""
+    return bool(os.getenv("REDDIT_CLIENT_ID") and os.getenv("REDDIT_CLIENT_SECRET")) \
+        or REDDIT_API_URL != "https://oauth.reddit.com"
+
+
+async def api_get(client: httpx.AsyncClient, path: str, params: Dict, endpoint: str) -> Dict:
+    """GET a la API respetando el presupuesto compartido. Un 429 espera a la ventana y reintenta una vez."""
+    for attempt in range(2):
+        waited = 0.0
+        while True:
+            wait = budget.acquire()
+            if not wait:
+                break
+            waited += wait
+            await asyncio.sleep(wait)
+        if waited:
+            reddit_budget_wait_seconds.observe(waited)
+
+        remaining = reset = None
+        try:
+            headers = {"User-Agent": USER_AGENT}
+            token = await access_token.get(client)
+            if token:
+                headers["Authorization"] = f"bearer {token}"
+            response = await client.get(f"{REDDIT_API_URL}{path}", params={**params, "raw_json": 1},
+                                        headers=headers)
+            reddit_requests_total.inc(endpoint=endpoint, status=str(response.status_code))
+            if response.headers.get("x-ratelimit-remaining") is not None:
+                remaining = float(response.headers["x-ratelimit-remaining"])
+                reset = float(response.headers.get("x-ratelimit-reset") or 60)
+                reddit_ratelimit_remaining.set(remaining)
+            if response.status_code == 429:
+                remaining, reset = 0, float(response.headers.get("retry-after") or reset or 60)
+        finally:
+            budget.release(remaining, reset)
+        if response.status_code == 429 and attempt == 0:
+            continue
+        response.raise_for_status()
+        return response.json()
+
+
+async def fetch_listing(client: httpx.AsyncClient, path: str, params: Dict, since: Optional[float],
+                        endpoint: str, max_pages: int = MAX_PAGES) -> Tuple[List[Dict], int]:
+    """
+    Posts de un listado ordenado por fecha (más nuevos primero), paginando hasta
+    llegar a `since` (incluido: los repetidos los descarta el índice de vistos).
+    Sin `since` solo la primera página. Devuelve (posts, bytes leídos aproximados).
+    """
+    posts: List[Dict] = []
+    after = None
+    size = 0
+    for _ in range(max_pages if since else 1):
+        page_params = {**params, "limit": PAGE_SIZE}
+        if after:
+            page_params["after"] = after
+        data = (await api_get(client, path, page_params, endpoint)).get("data") or {}
+        children = [child.get("data") or {} for child in data.get("children") or []]
+        size += sum(len(post.get("selftext") or "") + len(post.get("title") or "") for post in children)
+        reached = False
+        for post in children:
+            if since and float(post.get("created_utc") or 0) < since:
+                reached = True
+                break
+            posts.append(post)
+        after = data.get("after")
+        if reached or not after:
+            break
+    return posts, size
+
+
+# --- Queries ---
+_OPERATORS = {"or", "and", "not"}
+
+
+def combine_queries(queries: List[str], max_chars: int = MAX_QUERY_CHARS) -> List[List[str]]:
+    """Agrupa las queries en búsquedas "(q1) OR (q2) ..." que no superen max_chars."""
+    batches: List[List[str]] = []
+    length = 0
+    for query in queries:
+        cost = len(query) + 2 + (4 if batches and batches[-1] else 0)
+        if not batches or length + cost > max_chars:
+            batches.append([])
+            length = 0
+            cost = len(query) + 2
+        batches[-1].append(query)
+        length += cost
+    return batches
+
+
+def search_expression(batch: List[str]) -> str:
+    return " OR ".join(f"({query})" for query in batch)
+
+
+def query_terms(query: str) -> List[str]:
+    words = re.findall(r"[\w\-]+", query.lower())
+    return [w for w in words if w not in _OPERATORS]
+
+
+def query_matches(query: str, words: set) -> bool:
+    """Aproximación local de la búsqueda de Reddit: todos los términos están entre las palabras del post."""
+    terms = query_terms(query)
+    return bool(terms) and all(term in words for term in terms)
+
+
+def post_words(post: Dict) -> set:
+    return set(re.findall(r"[\w\-]+", f"{post.get('title') or ''} {post.get('selftext') or ''}".lower()))
+
+
+def subreddits_of(url: str) -> str:
+    """'https://www.reddit.com/r/netsec+cybersecurity' -> 'netsec+cybersecurity'; sin /r/ -> 'all'."""
+    match = re.search(r"/r/([\w+]+)", urlparse(url).path or "")
+    return match.group(1) if match else "all"
+
+
+def attribute(post: Dict, queries: List[str], marks: Dict[str, float], new_marks: Dict[str, float],
+              fallback: bool = True) -> List[str]:
+    """
+    Queries a las que corresponde el post y que aún no lo habían visto (más nuevo
+    que su marca); avanza sus marcas en `new_marks`. Con fallback, un post que
+    devolvió la búsqueda pero no encaja localmente se atribuye a todas.
+    """
+    words = post_words(post)
+    created = float(post.get("created_utc") or 0)
+    matched = [q for q in queries if query_matches(q, words)]
+    if not matched and fallback:
+        matched = list(queries)
+    fresh = [q for q in matched if marks.get(q) is None or created > marks[q]]
+    for query in fresh:
+        if created > new_marks.get(query, 0):
+            new_marks[query] = created
+    return fresh
+
+
+class RedditScraper(BaseScraper):
+    def __init__(self, source):
+        super().__init__(source)
+        config = source.config or {}
+        self.queries: List[str] = list(config.get("queries") or [source.name])
+        self.subreddits = subreddits_of(source.url or "")
+        self.streaming = bool(config.get("stream"))
+        self.bytes_read = 0
+        mark = getattr(source, "high_water", None) or {}
+        self.marks: Dict[str, float] = dict(mark.get("queries") or {})
+        self.stream_mark: Optional[float] = mark.get("stream")
+        self._new_marks: Dict[str, float] = {}
+        self._new_stream_mark: Optional[float] = None
+
+    def scrape(self) -> List[Finding]:
+        async def run():
+            async with httpx.AsyncClient(follow_redirects=True, timeout=30.0) as client:
+                return await self.fetch(client)
+        return asyncio.run(run())
+
+    async def fetch(self, client: httpx.AsyncClient) -> List[Finding]:
+        if not has_credentials():
+            print(f"⚠️ {self.source.name}: API Keys de Reddit no detectadas (REDDIT_CLIENT_ID/SECRET). Fuente en espera.")
+            return []
+        if self.streaming:
+            posts, self._new_marks, self._new_stream_mark = get_streamer().drain(self)
+        else:
+            posts = await self._search(client)
+        findings = [self._to_finding(post) for post in posts]
+        print(f"✅ {self.source.name}: {len(findings)} posts nuevos de Reddit.")
+        return findings
+
+    async def _search(self, client: httpx.AsyncClient) -> List[Dict]:
+        path = f"/r/{self.subreddits}/search"
+        restrict = {"restrict_sr": 1} if self.subreddits != "all" else {}
+        posts: Dict[str, Dict] = {}
+        for batch in combine_queries(self.queries):
+            # La búsqueda combinada pagina hasta la marca más antigua de sus queries
+            marks = [self.marks.get(q) for q in batch]
+            since = None if None in marks else min(marks)
+            found, size = await fetch_listing(client, path, {"q": search_expression(batch), "sort": "new", **restrict},
+                                              since, endpoint="search")
+            self.bytes_read += size
+            for post in found:
+                if attribute(post, batch, self.marks, self._new_marks):
+                    posts.setdefault(post.get("name") or post.get("id"), post)
+        return list(posts.values())
+
+    def high_water(self) -> Optional[Dict]:
+        if not self._new_marks and self._new_stream_mark is None:
+            return None
+        mark = {"queries": {**self.marks, **self._new_marks}}
+        stream_mark = self._new_stream_mark or self.stream_mark
+        if stream_mark is not None:
+            mark["stream"] = stream_mark
+        return mark
+
+    def _to_finding(self, post: Dict) -> Finding:
+        permalink = post.get("permalink")
+        return Finding(
+            source_id=self.source.id,
+            title=f"Reddit: {(post.get('title') or '')[:80]}",
+            content=(post.get("selftext") or "")[:500] or post.get("title") or "",
+            url=post.get("url") or (f"https://www.reddit.com{permalink}" if permalink else ""),
+            published_date=datetime.utcfromtimestamp(float(post.get("created_utc") or time.time())),
+        )
+
+
+class RedditStreamer:
+    """
+    Hilo con su propio event loop y cliente HTTP persistente que lee /new de los
+    subreddits de las fuentes en modo stream. Una petición por grupo de
+    subreddits sirve a todas las fuentes que lo comparten.
+    """
+
+    def __init__(self, interval: float = STREAM_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        # source_id -> {"queries", "subreddits", "marks", "new_marks", "buffer", "stream_mark"}
+        self._sources: Dict[str, Dict] = {}
+        self._cursors: Dict[str, float] = {}   # subreddits -> created_utc más reciente leído
+        self._thread: Optional[threading.Thread] = None
+
+    def drain(self, scraper: RedditScraper) -> Tuple[List[Dict], Dict[str, float], Optional[float]]:
+        """
+        Registra (o actualiza) la fuente y devuelve lo acumulado desde la última
+        llamada: (posts, marcas de query nuevas, marca del stream).
+        """
+        with self._lock:
+            entry = self._sources.get(scraper.source.id)
+            if entry is None:
+                entry = self._sources[scraper.source.id] = {
+                    "marks": dict(scraper.marks), "new_marks": {},
+                    "buffer": deque(maxlen=STREAM_BUFFER), "stream_mark": scraper.stream_mark}
+                if scraper.stream_mark is not None:
+                    # Se retrocede el cursor del grupo si hace falta; las demás fuentes filtran por sus marcas
+                    cursor = self._cursors.get(scraper.subreddits)
+                    self._cursors[scraper.subreddits] = min(cursor or scraper.stream_mark, scraper.stream_mark)
+            entry["queries"], entry["subreddits"] = scraper.queries, scraper.subreddits
+
+            posts = list(entry["buffer"])
+            entry["buffer"].clear()
+            new_marks = entry["new_marks"]
+            entry["marks"].update(new_marks)
+            entry["new_marks"] = {}
+
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=lambda: asyncio.run(self._run()),
+                                                name="reddit-stream", daemon=True)
+                self._thread.start()
+            return posts, new_marks, entry["stream_mark"]
+
+    async def _run(self):
+        async with httpx.AsyncClient(follow_redirects=True, timeout=30.0) as client:
+            while True:
+                try:
+                    await self._poll(client)
+                except Exception as e:
+                    print(f"⚠️ Stream de Reddit: {e}")
+                await asyncio.sleep(self.interval)
+
+    async def _poll(self, client: httpx.AsyncClient):
+        with self._lock:
+            groups = {entry["subreddits"] for entry in self._sources.values()}
+        for subreddits in groups:
+            since = self._cursors.get(subreddits)
+            posts, _ = await fetch_listing(client, f"/r/{subreddits}/new", {}, since, endpoint="new")
+            if not posts:
+                continue
+            with self._lock:
+                cursor = max([since or 0] + [float(p.get("created_utc") or 0) for p in posts])
+                self._cursors[subreddits] = cursor
+                for entry in self._sources.values():
+                    if entry["subreddits"] != subreddits:
+                        continue
+                    # /new no viene filtrado: solo los posts que encajan con alguna query
+                    for post in reversed(posts):
+                        if attribute(post, entry["queries"], entry["marks"], entry["new_marks"], fallback=False):
+                            entry["buffer"].append(post)
+                    entry["stream_mark"] = cursor
+
+
+_streamer: Optional[RedditStreamer] = None
+_streamer_lock = threading.Lock()
+
+
+def get_streamer() -> RedditStreamer:
+    global _streamer
+    with _streamer_lock:
+        if _streamer is None:
+            _streamer = RedditStreamer()
+        return _streamer
@@ -1,33 +1,92 @@
+import os
 import feedparser
+import httpx
 from datetime import datetime
-from typing import List
+from typing import Dict, List, Optional
 from app.scrapers.base import BaseScraper
+from app.scrapers.feed_stream import FeedStream
 from app.models.finding import Finding
 
+# Con marca de agua se leen todas las entradas nuevas (ráfagas), hasta este tope
+MAX_BURST_ENTRIES = int(os.getenv("SENTINEL_MAX_BURST_ENTRIES", "500"))
+
 class RSSScraper(BaseScraper):
     def scrape(self) -> List[Finding]:
         print(f"📡 Conectando a Feed RSS: {self.source.url}...")
-        feed = feedparser.parse(self.source.url)
-        
-        findings = []
-        
-        if feed.bozo:
-            print(f"⚠️ Error leyendo el feed: {feed.bozo_exception}")
+        stream = self.stream_parser()
+        complete = True
+        try:
+            # Misma lectura incremental que el motor: se deja de descargar al llegar a la marca
+            with httpx.stream("GET", self.source.url, follow_redirects=True, timeout=30.0) as response:
+                response.raise_for_status()
+                for chunk in response.iter_bytes():
+                    if stream.feed(chunk):
+                        complete = False
+                        break
+        except httpx.HTTPError as e:
+            print(f"⚠️ Error descargando el feed: {e}")
             return []
+        stream.close(complete=complete)
+        return self.finish(stream)
+
+    def build_request(self) -> Optional[Dict]:
+        return {"url": self.source.url, "headers": self.conditional_headers()}
+
+    def stream_parser(self) -> FeedStream:
+        mark = getattr(self.source, "high_water", None)
+        # Primera consulta (sin marca): solo las más recientes, no todo el histórico del feed
+        return FeedStream(mark=mark, limit=MAX_BURST_ENTRIES if mark else self.max_entries)
+
+    def parse(self, payload: bytes) -> List[Finding]:
+        stream = self.stream_parser()
+        stream.feed(payload)
+        stream.close(complete=True)
+        return self.finish(stream)
+
+    def finish(self, stream: FeedStream) -> List[Finding]:
+        """Hallazgos de una lectura terminada. Si el XML no era válido, lo intenta feedparser."""
+        if stream.error is not None:
+            if not stream.complete:
+                print(f"⚠️ Error leyendo el feed: {stream.error}")
+                return []
+            if not self._fallback(stream):
+                return []
+
+        findings = [self._to_finding(entry) for entry in stream.entries]
+        if stream.reached_mark:
+            print(f"✅ {len(findings)} noticias nuevas (lectura detenida en la última ya procesada).")
+        else:
+            print(f"✅ Se encontraron {len(findings)} noticias nuevas.")
+        return findings
+
+    def _fallback(self, stream: FeedStream) -> bool:
+        feed = feedparser.parse(stream.body())
+        if feed.bozo and not feed.entries:
+            print(f"⚠️ Error leyendo el feed: {feed.bozo_exception}")
+            return False
+        stream.entries, stream.done, stream.limit_hit = [], False, False
+        for entry in feed.entries:
+            published = None
+            if getattr(entry, 'published_parsed', None):
+                published = datetime(*entry.published_parsed[:6])
+            elif getattr(entry, 'updated_parsed', None):
+                published = datetime(*entry.updated_parsed[:6])
+            stream.accept({
+                "guid": entry.get('id') or entry.get('link'),
+                "title": entry.get('title'),
+                "link": entry.get('link', ''),
+                "summary": entry.get('summary', '') or entry.get('description', ''),
+                "published": published,
+            })
+            if stream.done:
+                break
+        return True
 
-        for entry in feed.entries[:10]: 
-            pub_date = datetime.now()
-            if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                pub_date = datetime(*entry.published_parsed[:6])
-
-            finding = Finding(
-                source_id=self.source.id,
-                title=entry.get('title', 'Sin título'),
-                content=entry.get('summary', '') or entry.get('description', ''),
-                url=entry.get('link', ''),
-                published_date=pub_date
-            )
-            findings.append(finding)
-            
-        print(f"✅ Se encontraron {len(findings)} noticias nuevas.")
-        return findings
\ No newline at end of file
+    def _to_finding(self, entry: Dict) -> Finding:
+        return Finding(
+            source_id=self.source.id,
+            title=entry.get('title') or 'Sin título',
+            content=entry.get('summary') or '',
+            url=entry.get('link') or '',
+            published_date=entry.get('published') or datetime.now()
+        )
@@ -1,7 +1,6 @@
 import logging
 import os
 from datetime import datetime
-import praw 
 
 # NOTA: Telethon se mantiene comentado para no obligar a configurar Telegram API Hash ahora mismo.
 # from telethon import TelegramClient
@@ -28,6 +27,7 @@ class SocialMediaIngestor:
         try:
             if self.platform == "reddit":
                 if self.reddit_id and self.reddit_secret:
+                    import praw
                     self.client = praw.Reddit(
                         client_id=self.reddit_id,
                         client_secret=self.reddit_secret,
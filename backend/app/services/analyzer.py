@@ -1,4 +1,62 @@
-from textblob import TextBlob
+import atexit
+import hashlib
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+from app.services.keyword_matcher import KeywordMatcher
+
+KEYWORDS_URGENCY = ["breach", "attack", "critical", "exploit", "zero-day"]
+
+# Por debajo de este tamaño de lote no compensa enviar el trabajo a otros procesos
+MIN_PARALLEL_BATCH = 32
+CACHE_MAX_ITEMS = 50_000
+POOL_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+_urgency_matcher = KeywordMatcher(KEYWORDS_URGENCY)
+_cache: "OrderedDict[str, dict]" = OrderedDict()
+_cache_lock = threading.Lock()
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _sentiment(text: str) -> float:
+    # TextBlob (y NLTK detrás) se carga con el primer análisis, no al importar el módulo
+    from textblob import TextBlob
+    return TextBlob(text).sentiment.polarity
+
+
+def _classify(text: str, sentiment_score: float) -> dict:
+    risk_level = "low"
+    if sentiment_score < -0.1:
+        risk_level = "medium"
+    if sentiment_score < -0.5:
+        risk_level = "critical"
+
+    if _urgency_matcher.contains_any(text.lower()):
+        risk_level = "critical"
+
+    return {
+        "sentiment": sentiment_score,
+        "risk_level": risk_level
+    }
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    # Pool reutilizado entre ciclos. "spawn" evita heredar hilos/locks del proceso padre
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            atexit.register(_pool.shutdown)
+        return _pool
+
 
 class Analyzer:
     @staticmethod
@@ -6,21 +64,48 @@ class Analyzer:
         """
         Devuelve un diccionario con el sentimiento y el nivel de riesgo calculado.
         """
-        blob = TextBlob(text)
-        
-        sentiment_score = blob.sentiment.polarity
-        
-        risk_level = "low"
-        if sentiment_score < -0.1:
-            risk_level = "medium"
-        if sentiment_score < -0.5:
-            risk_level = "critical"
-            
-        keywords_urgency = ["breach", "attack", "critical", "exploit", "zero-day"]
-        if any(word in text.lower() for word in keywords_urgency):
-            risk_level = "critical"
-
-        return {
-            "sentiment": sentiment_score,
-            "risk_level": risk_level
-        }
\ No newline at end of file
+        return _classify(text, _sentiment(text))
+
+    @staticmethod
+    def analyze_batch(texts: List[str]) -> List[dict]:
+        """
+        Igual que analyze_text, pero para una lista de textos.
+        Los resultados se cachean por hash del contenido (los textos ya vistos no
+        se vuelven a puntuar) y el sentimiento de lotes grandes se calcula en un
+        pool de procesos.
+        """
+        keys = [hashlib.sha256(text.encode("utf-8")).hexdigest() for text in texts]
+        results = [None] * len(texts)
+        missing = {}  # hash -> texto (deduplicado dentro del lote)
+
+        with _cache_lock:
+            for i, key in enumerate(keys):
+                cached = _cache.get(key)
+                if cached is not None:
+                    _cache.move_to_end(key)
+                    results[i] = dict(cached)
+                else:
+                    missing[key] = texts[i]
+
+        if missing:
+            pending = list(missing.items())
+            pending_texts = [text for _, text in pending]
+            if len(pending_texts) >= MIN_PARALLEL_BATCH:
+                chunksize = max(1, len(pending_texts) // (4 * POOL_WORKERS))
+                scores = list(_get_pool().map(_sentiment, pending_texts, chunksize=chunksize))
+            else:
+                scores = [_sentiment(text) for text in pending_texts]
+
+            computed = {key: _classify(text, score) for (key, text), score in zip(pending, scores)}
+
+            with _cache_lock:
+                for key, analysis in computed.items():
+                    _cache[key] = analysis
+                while len(_cache) > CACHE_MAX_ITEMS:
+                    _cache.popitem(last=False)
+
+            for i, key in enumerate(keys):
+                if results[i] is None:
+                    results[i] = dict(computed[key])
+
+        return results
@@ -0,0 +1,237 @@
+"""
+Registro de auditoría asíncrono.
+
+log_action() se llama dentro de peticiones de usuario (borrados, exportaciones,
+altas). En vez de escribir en el almacenamiento en línea, AuditSink añade la
+entrada a un spool local (JSONL de solo anexado) y un hilo en segundo plano
+lo vuelca al almacenamiento en lotes (logs.add_many).
+
+El spool es la cola: una entrada está a salvo en cuanto se anexa, así que
+sobrevive a una caída del proceso o del almacenamiento. El hilo guarda en
+`<spool>.offset` hasta dónde se ha confirmado; al arrancar continúa desde ahí
+(entrega al menos una vez: tras una caída a mitad de lote puede repetirse
+alguna entrada). Cuando todo está confirmado y el fichero supera
+COMPACT_BYTES, se trunca.
+
+Un spool por proceso: con varios procesos de API, SENTINEL_AUDIT_SPOOL distinto
+para cada uno.
+"""
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core.metrics import registry
+from app.services.identity import DATA_DIR
+
+AUDIT_SPOOL_PATH = os.getenv("SENTINEL_AUDIT_SPOOL", os.path.join(DATA_DIR, "audit_spool.jsonl"))
+BATCH_SIZE = 200
+FLUSH_INTERVAL = 1.0
+MAX_BACKOFF = 60.0
+COMPACT_BYTES = 1 << 20
+
+audit_entries_total = registry.counter(
+    "sentinel_audit_entries_total", "Entradas de auditoría por resultado", ["result"])
+audit_backlog_bytes = registry.gauge(
+    "sentinel_audit_backlog_bytes", "Bytes del spool de auditoría pendientes de volcar")
+
+
+def _encode(entry: Dict) -> str:
+    data = dict(entry)
+    if isinstance(data.get("timestamp"), datetime):
+        data["timestamp"] = data["timestamp"].isoformat()
+    return json.dumps(data, ensure_ascii=False)
+
+
+def _decode(line: bytes) -> Optional[Dict]:
+    try:
+        entry = json.loads(line)
+        entry["timestamp"] = datetime.fromisoformat(entry["timestamp"])
+        return entry
+    except (ValueError, KeyError, TypeError):
+        # Línea a medias de una caída anterior: se descarta
+        return None
+
+
+class AuditSink:
+    """
+    Uso:
+        sink = AuditSink(get_storage)
+        sink.record({"timestamp": ..., "user": ..., "action": ..., "details": ...})
+        sink.close()   # al apagar: vuelca lo pendiente
+    """
+
+    def __init__(self, get_storage: Callable, path: str = AUDIT_SPOOL_PATH,
+                 batch_size: int = BATCH_SIZE, flush_interval: float = FLUSH_INTERVAL):
+        self.get_storage = get_storage
+        self.path = path
+        self.offset_path = path + ".offset"
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._lock = threading.Lock()        # anexado y compactación del spool
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._spool = None
+        self._offset = 0
+        self.written = 0
+        self.failed_batches = 0
+
+    # --- Productores ---
+    def record(self, entry: Dict):
+        """Anexa la entrada al spool y vuelve; nunca espera al almacenamiento."""
+        line = (_encode(entry) + "\n").encode("utf-8")
+        with self._lock:
+            self._open()
+            self._spool.write(line)
+            self._spool.flush()
+        self._wakeup.set()
+
+    # --- Ciclo de vida ---
+    def start(self):
+        """Arranca el hilo de volcado (también lo hace el primer record)."""
+        with self._lock:
+            self._open()
+
+    def _open(self):
+        # Bajo self._lock
+        if self._spool is not None:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._spool = open(self.path, "ab")
+        size = self._spool.tell()
+        if size:
+            # Una caída pudo dejar la última línea sin terminar: que no se pegue a la siguiente
+            with open(self.path, "rb") as f:
+                f.seek(size - 1)
+                if f.read(1) != b"\n":
+                    self._spool.write(b"\n")
+                    self._spool.flush()
+        self._offset = self._load_offset(size)
+        if self._offset < size:
+            print(f"📝 Auditoría: {size - self._offset} bytes pendientes en el spool, reanudando volcado")
+        self._thread = threading.Thread(target=self._loop, name="audit-sink", daemon=True)
+        self._thread.start()
+
+    def close(self, timeout: float = 10.0):
+        """Vuelca lo pendiente y para el hilo. Lo que no se pueda volcar queda en el spool."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wakeup.set()
+        self._thread.join(timeout)
+        with self._lock:
+            if self._spool is not None:
+                self._spool.close()
+                self._spool = None
+            self._thread = None
+        self._stop.clear()
+
+    # --- Volcado ---
+    def _loop(self):
+        backoff = self.flush_interval
+        while True:
+            stopping = self._stop.is_set()
+            try:
+                while self._ship_batch():
+                    pass
+                backoff = self.flush_interval
+            except Exception as e:
+                self.failed_batches += 1
+                audit_entries_total.inc(result="retry")
+                print(f"⚠️ Error volcando auditoría (se reintenta en {backoff:.1f}s): {e}")
+                if stopping:
+                    return
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF)
+                continue
+            if stopping:
+                return
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+
+    def _read_batch(self) -> Tuple[List[Dict], int]:
+        entries: List[Dict] = []
+        end = self._offset
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            while len(entries) < self.batch_size:
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    break  # fin del fichero o línea aún a medio escribir
+                end += len(line)
+                entry = _decode(line)
+                if entry is not None:
+                    entries.append(entry)
+                else:
+                    audit_entries_total.inc(result="corrupt")
+        return entries, end
+
+    def _ship_batch(self) -> bool:
+        """Vuelca un lote. True si avanzó (puede quedar más)."""
+        entries, end = self._read_batch()
+        if end == self._offset:
+            self._update_backlog()
+            self._compact()
+            return False
+        if entries:
+            self.get_storage().logs.add_many(entries)
+            self.written += len(entries)
+            audit_entries_total.inc(len(entries), result="written")
+        self._offset = end
+        self._save_offset()
+        self._update_backlog()
+        return True
+
+    def _compact(self):
+        with self._lock:
+            if self._spool is None or self._offset < COMPACT_BYTES:
+                return
+            if self._spool.tell() != self._offset:
+                return
+            # Se trunca antes de guardar el offset: si se cae en medio, offset > tamaño y se reinicia
+            self._spool.truncate(0)
+            self._spool.seek(0)
+            self._offset = 0
+            self._save_offset()
+
+    # --- Offset confirmado ---
+    def _load_offset(self, size: int) -> int:
+        try:
+            with open(self.offset_path) as f:
+                offset = int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+        return offset if 0 <= offset <= size else 0
+
+    def _save_offset(self):
+        tmp = self.offset_path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(str(self._offset))
+        os.replace(tmp, self.offset_path)
+
+    def _update_backlog(self):
+        audit_backlog_bytes.set(self.pending_bytes())
+
+    def pending_bytes(self) -> int:
+        try:
+            return max(0, os.path.getsize(self.path) - self._offset)
+        except OSError:
+            return 0
+
+
+_sink: Optional[AuditSink] = None
+_sink_lock = threading.Lock()
+
+
+def get_audit_sink() -> AuditSink:
+    """Sink compartido del proceso (API)."""
+    global _sink
+    if _sink is None:
+        with _sink_lock:
+            if _sink is None:
+                from app.core.storage import get_storage
+                _sink = AuditSink(get_storage)
+    return _sink
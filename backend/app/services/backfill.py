@@ -0,0 +1,88 @@
+"""
+Normalización de published_date en hallazgos antiguos.
+
+La lista paginada y la exportación CSV ordenan por published_date, y Firestore
+descarta en silencio los documentos que no tienen el campo al ordenar por él.
+Además, un string ISO cae en otro "tipo" que un timestamp: queda fuera de los
+rangos de fecha y rompe los cursores. Hay dos casos heredados:
+
+  - hallazgos del run_scanner original, que solo guardaban created_at;
+  - hallazgos manuales/simulados o de RSS guardados con la fecha como texto.
+
+backfill_published_dates los recorre una vez y escribe un datetime: la fecha
+del texto si se puede leer, si no created_at y, en último caso, EPOCH (al final
+de la lista, pero visible). Es idempotente: los documentos ya correctos no se
+tocan. Se ejecuta al arrancar el scheduler y con POST /admin/findings/backfill-dates.
+"""
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+# Documentos por lote de escritura (Firestore admite 500 operaciones por lote)
+BATCH_SIZE = 400
+EPOCH = datetime(1970, 1, 1)
+
+
+def parse_date(value) -> Optional[datetime]:
+    """datetime a partir de un datetime, un texto ISO 8601 o una fecha RFC 822 (feeds RSS)."""
+    if isinstance(value, datetime):
+        return value
+    if not isinstance(value, str) or not value.strip():
+        return None
+    text = value.strip()
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(text)
+        except (TypeError, ValueError):
+            return None
+    # Mismo criterio que el resto de escrituras: UTC sin zona
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _is_iso(value) -> bool:
+    # Backends que guardan la fecha como texto: basta con que sea ISO (se ordena bien)
+    if not isinstance(value, str):
+        return False
+    try:
+        datetime.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+
+def backfill_published_dates(storage, batch_size: int = BATCH_SIZE) -> Dict[str, int]:
+    """Escribe published_date como datetime donde falta o es texto. Devuelve los conteos."""
+    findings = storage.findings
+    counts = {"scanned": 0, "missing": 0, "converted": 0}
+    pending = []
+
+    def flush():
+        # Solo cambia published_date: los contadores del dashboard no varían
+        if pending:
+            findings.upsert_many(pending, {})
+            pending.clear()
+
+    for data in findings.stream(fields=["published_date", "created_at"]):
+        counts["scanned"] += 1
+        value = data.get("published_date")
+        if isinstance(value, datetime) or (not findings.native_dates and _is_iso(value)):
+            continue
+        published = parse_date(value)
+        if published is None:
+            published = parse_date(data.get("created_at")) or EPOCH
+            counts["missing"] += 1
+        else:
+            counts["converted"] += 1
+        pending.append((data["id"], {"published_date": published}, True))
+        if len(pending) >= batch_size:
+            flush()
+    flush()
+
+    if counts["missing"] or counts["converted"]:
+        print(f"🗓️ published_date normalizado: {counts['missing']} sin fecha, "
+              f"{counts['converted']} en texto (de {counts['scanned']} hallazgos).")
+    return counts
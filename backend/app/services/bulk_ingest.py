@@ -0,0 +1,280 @@
+"""
+Alta de hallazgos en bloque (POST /api/v1/findings/bulk).
+
+Los colectores externos (pastebin, recon de GitHub, bots de Telegram) envían
+un cuerpo NDJSON, opcionalmente comprimido con gzip, con un hallazgo (modelo
+Finding) por línea. Cada lote de líneas sigue el mismo camino que los items
+del scheduler:
+
+  - duplicados: SeenIndex.claim con finding_id + content_hash,
+  - análisis con reutilización por grupos de casi-duplicados
+    (ingestion.analyze_with_clusters),
+  - escritura con queue_finding/FindingWriter (lotes atómicos, contadores incluidos).
+
+El cuerpo se guarda primero en un fichero temporal (en memoria hasta
+SPOOL_MEMORY_BYTES) y después se lee por trozos, se descomprime al vuelo y se
+procesa por lotes de BATCH_SIZE líneas: la memoria no depende del tamaño de
+la petición.
+
+Los índices son del proceso de API, separados de los del scanner (dos
+procesos no pueden compartir el mismo fichero), como los de cada worker
+(services/workers.py). La primera vez que aparece una fuente se cargan sus
+hallazgos guardados (SeenIndex.warm). Con varios procesos de API,
+SENTINEL_BULK_INDEX_ID distinto para cada uno.
+"""
+import os
+import tempfile
+import threading
+import zlib
+from collections import Counter
+from typing import AsyncIterator, Callable, Dict, IO, Iterator, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+
+from app.core.executors import run_io
+from app.core.metrics import registry
+from app.models.finding import Finding
+from app.services.clustering import ClusterIndex
+from app.services.identity import DATA_DIR, SeenIndex, content_hash, finding_id
+from app.services.ingestion import analyze_with_clusters
+from app.services.persistence import FindingWriter, queue_finding
+
+BATCH_SIZE = int(os.getenv("SENTINEL_BULK_BATCH", "500"))
+MAX_BODY_BYTES = int(os.getenv("SENTINEL_BULK_MAX_BYTES", str(512 << 20)))
+MAX_LINE_BYTES = 1 << 20
+SPOOL_MEMORY_BYTES = 4 << 20
+READ_CHUNK = 64 << 10
+INDEX_ID = os.getenv("SENTINEL_BULK_INDEX_ID", "api")
+
+GZIP_MAGIC = b"\x1f\x8b"
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+# created | updated | duplicate | invalid | failed
+RESULTS = ("created", "updated", "duplicate", "invalid", "failed")
+
+bulk_items_total = registry.counter(
+    "sentinel_bulk_items_total", "Líneas de /findings/bulk por resultado", ["result"])
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+class CorruptBody(Exception):
+    """Cuerpo gzip corrupto o truncado (lo leído hasta ahí ya se procesó)."""
+
+
+async def spool_body(chunks: AsyncIterator[bytes], max_bytes: int = MAX_BODY_BYTES) -> IO[bytes]:
+    """Copia el cuerpo de la petición a un fichero temporal. Las escrituras a disco van al pool de E/S."""
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+    size, pending, pending_bytes = 0, [], 0
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_bytes:
+                raise BodyTooLarge(f"Body larger than {max_bytes} bytes")
+            pending.append(chunk)
+            pending_bytes += len(chunk)
+            # Se escribe en bloques de ~1 MB: un salto al pool por bloque, no por trozo recibido
+            if pending_bytes >= READ_CHUNK * 16:
+                await run_io(spool.write, b"".join(pending))
+                pending, pending_bytes = [], 0
+        if pending:
+            await run_io(spool.write, b"".join(pending))
+        spool.seek(0)
+        return spool
+    except BaseException:
+        spool.close()
+        raise
+
+
+def _chunks(fh: IO[bytes], chunk_size: int = READ_CHUNK) -> Iterator[bytes]:
+    """Trozos del cuerpo ya descomprimido. Cada trozo se limita a chunk_size (sin bombas gzip)."""
+    head = fh.read(2)
+    fh.seek(0)
+    if head != GZIP_MAGIC:
+        while True:
+            chunk = fh.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    inflater = zlib.decompressobj(GZIP_WBITS)
+    started, leftover = False, b""
+    while True:
+        raw = leftover or fh.read(chunk_size)
+        leftover = b""
+        if not raw:
+            break
+        started = True
+        try:
+            data = inflater.decompress(raw, chunk_size)
+            while True:
+                if data:
+                    yield data
+                if not inflater.unconsumed_tail:
+                    break
+                data = inflater.decompress(inflater.unconsumed_tail, chunk_size)
+        except zlib.error as e:
+            raise CorruptBody(f"Corrupt gzip body: {e}")
+        if inflater.eof:
+            # Varios miembros gzip seguidos (un colector que comprime por bloques)
+            leftover = inflater.unused_data
+            inflater = zlib.decompressobj(GZIP_WBITS)
+            started = False
+    if started and not inflater.eof:
+        raise CorruptBody("Truncated gzip body")
+
+
+def iter_lines(fh: IO[bytes], max_line: int = MAX_LINE_BYTES) -> Iterator[Tuple[int, Optional[bytes]]]:
+    """
+    (número de línea, línea) del cuerpo NDJSON, saltando las vacías. Una línea
+    de más de max_line bytes se devuelve como None y no se guarda en memoria.
+    """
+    buffer = bytearray()
+    number, oversized = 0, False
+    for chunk in _chunks(fh):
+        buffer += chunk
+        start = 0
+        while True:
+            end = buffer.find(b"\n", start)
+            if end < 0:
+                break
+            number += 1
+            line = None if oversized or end - start > max_line else bytes(buffer[start:end]).strip()
+            if line is None or line:
+                yield number, line
+            oversized = False
+            start = end + 1
+        del buffer[:start]
+        if len(buffer) > max_line:
+            oversized = True
+            buffer.clear()
+    line = None if oversized else bytes(buffer).strip()
+    if line is None or line:
+        yield number + 1, line
+
+
+def _describe(error: ValidationError) -> str:
+    parts = []
+    for item in error.errors(include_url=False)[:3]:
+        location = ".".join(str(part) for part in item["loc"])
+        parts.append(f"{location}: {item['msg']}" if location else item["msg"])
+    return "; ".join(parts)
+
+
+class BulkIngestor:
+    """
+    Uso:
+        ingestor = BulkIngestor(get_storage)
+        for batch in ...:
+            results = ingestor.process(batch)   # [(número de línea, bytes | None), ...]
+        ingestor.save()
+    """
+
+    def __init__(self, get_storage: Callable, index_id: str = INDEX_ID):
+        self.get_storage = get_storage
+        self.seen = SeenIndex.load(path=os.path.join(DATA_DIR, f"seen_index-{index_id}.json"))
+        self.clusters = ClusterIndex.load(get_storage(), path=os.path.join(DATA_DIR, f"cluster_index-{index_id}.json"))
+        self._warmed: Set[str] = set()
+        # SeenIndex.commit confirma todo lo reservado: un lote a la vez
+        self._lock = threading.Lock()
+
+    def _warm(self, source_ids: Set[str]):
+        new = source_ids - self._warmed
+        if new:
+            loaded = self.seen.warm(self.get_storage(), sorted(new))
+            self._warmed |= new
+            print(f"🗂️ Alta en bloque: {loaded} hallazgos cargados de {len(new)} fuentes nuevas")
+
+    def process(self, batch: List[Tuple[int, Optional[bytes]]]) -> List[Dict]:
+        """Valida, descarta duplicados, analiza y guarda un lote. Un resultado por línea, en orden."""
+        results: List[Dict] = []
+        valid: List[Tuple[Dict, Finding]] = []
+        for number, line in batch:
+            entry = {"line": number}
+            results.append(entry)
+            if line is None:
+                entry.update(status="invalid", error=f"Line longer than {MAX_LINE_BYTES} bytes")
+                continue
+            try:
+                valid.append((entry, Finding.model_validate_json(line)))
+            except ValidationError as e:
+                entry.update(status="invalid", error=_describe(e))
+
+        for entry, item in valid:
+            item.content_hash = content_hash(item.title, item.content)
+            entry["id"] = finding_id(item.url, item.title, item.source_id)
+        # La misma ID dos veces en el lote (aunque cambie el contenido): vale la última
+        # línea y las anteriores son duplicados, así el hallazgo se escribe y cuenta una vez
+        last = {entry["id"]: n for n, (entry, _) in enumerate(valid)}
+
+        with self._lock:
+            self._warm({item.source_id for _, item in valid})
+            fresh: List[Tuple[Dict, Finding]] = []
+            for n, (entry, item) in enumerate(valid):
+                if last[entry["id"]] != n or not self.seen.claim(entry["id"], item.content_hash):
+                    entry["status"] = "duplicate"
+                    continue
+                entry["status"] = "updated" if entry["id"] in self.seen else "created"
+                fresh.append((entry, item))
+            self._persist(fresh)
+
+        for status, count in Counter(entry["status"] for entry in results).items():
+            bulk_items_total.inc(count, result=status)
+        return results
+
+    def _persist(self, fresh: List[Tuple[Dict, Finding]]):
+        # Bajo self._lock. Mismo orden que scheduler.persist_results
+        if not fresh:
+            return
+        try:
+            analyses, _ = analyze_with_clusters([item for _, item in fresh], self.clusters)
+            writer = FindingWriter(self.get_storage())
+            grown = self.clusters.take_touched()
+            for (entry, item), analysis in zip(fresh, analyses):
+                if item.cluster_id == entry["id"]:
+                    grown.pop(item.cluster_id, None)
+                    item.cluster_size = self.clusters.size(item.cluster_id)
+                queue_finding(writer, self.seen, item, analysis)
+                entry["risk_level"] = analysis["risk_level"]
+            # Grupos anteriores que han crecido: solo cambia el tamaño guardado en la cabeza
+            for cluster_id, size in grown.items():
+                if cluster_id in self.seen:
+                    writer.set(cluster_id, {"cluster_size": size})
+            writer.flush()
+        except Exception as e:
+            print(f"❌ Alta en bloque: lote de {len(fresh)} hallazgos sin guardar ({e})")
+            self.seen.commit(exclude=[entry["id"] for entry, _ in fresh], save=False)
+            for entry, _ in fresh:
+                entry.update(status="failed", error=str(e))
+                entry.pop("risk_level", None)
+            return
+
+        failed = set(writer.failed_ids)
+        self.seen.commit(exclude=failed, save=False)
+        for entry, _ in fresh:
+            if entry["id"] in failed:
+                entry.update(status="failed", error="Write failed")
+                entry.pop("risk_level", None)
+
+    def save(self):
+        """Guarda los índices en disco (al terminar cada petición, no en cada lote)."""
+        with self._lock:
+            self.seen.save()
+            self.clusters.save()
+
+
+_ingestor: Optional[BulkIngestor] = None
+_ingestor_lock = threading.Lock()
+
+
+def get_bulk_ingestor() -> BulkIngestor:
+    """Ingestor compartido del proceso (API). Se crea con la primera petición."""
+    global _ingestor
+    if _ingestor is None:
+        with _ingestor_lock:
+            if _ingestor is None:
+                from app.core.storage import get_storage
+                _ingestor = BulkIngestor(get_storage)
+    return _ingestor
@@ -0,0 +1,222 @@
+"""
+Agrupación de casi-duplicados entre fuentes (MinHash-LSH).
+
+La misma noticia (un aviso de CISA, una brecha) llega por varios feeds con
+títulos ligeramente distintos y URLs distintas, así que el índice de vistos
+(identity.py) la trata como hallazgos diferentes. Cada hallazgo nuevo recibe
+una firma MinHash de sus pares de palabras; si su similitud de Jaccard
+estimada con un hallazgo reciente es >= MIN_SIMILARITY, se une a su grupo y
+reutiliza el análisis del primero (la cabeza del grupo) en lugar de analizarse.
+
+Índice LSH por bandas: la firma se parte en BANDS bandas de ROWS valores y solo
+se comparan los hallazgos que coinciden por completo en alguna banda. Con
+16 x 4 un par con Jaccard 0.6 es candidato el 89% de las veces y con 0.7 el 99%.
+
+SimHash se descartó: con textos cortos (título + resumen) una frase añadida
+por el feed ("The post ... appeared first on ...") ya lo separa demasiado.
+"""
+import base64
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.services.identity import DATA_DIR
+
+CLUSTER_INDEX_PATH = os.path.join(DATA_DIR, "cluster_index.json")
+NUM_PERMUTATIONS = 64
+BANDS, ROWS = 16, 4
+MIN_SIMILARITY = float(os.getenv("SENTINEL_CLUSTER_SIMILARITY", "0.6"))
+# Solo se agrupa con hallazgos recientes: una noticia deja de repetirse en unos días
+CLUSTER_WINDOW_SECONDS = int(os.getenv("SENTINEL_CLUSTER_WINDOW_DAYS", "7")) * 86400
+
+_MASK64 = (1 << 64) - 1
+# Permutaciones h -> (a*h + b) mod 2^64 (multiply-shift). Semilla fija: las
+# firmas guardadas deben seguir siendo comparables entre procesos y reinicios
+_rng = random.Random(20240917)
+_PERMUTATIONS = [(_rng.randrange(1, 1 << 64) | 1, _rng.randrange(0, 1 << 64)) for _ in range(NUM_PERMUTATIONS)]
+
+_TAGS = re.compile(r"<[^<]+?>")
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def shingles(text: str) -> Set[str]:
+    """Pares de palabras consecutivas (o las palabras sueltas si solo hay una)."""
+    words = _TOKEN.findall(_TAGS.sub(" ", text or "").lower())
+    return {f"{a} {b}" for a, b in zip(words, words[1:])} or set(words)
+
+
+def minhash(text: str) -> array:
+    """Firma de NUM_PERMUTATIONS valores de 32 bits."""
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+              for s in shingles(text)] or [0]
+    return array("I", [min((a * h + b) & _MASK64 for h in hashes) >> 32 for a, b in _PERMUTATIONS])
+
+
+def similarity(a: array, b: array) -> float:
+    """Jaccard estimado: fracción de posiciones iguales en las dos firmas."""
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERMUTATIONS
+
+
+def encode_signature(signature: array) -> str:
+    return base64.b64encode(signature.tobytes()).decode("ascii")
+
+
+def decode_signature(encoded: str) -> array:
+    signature = array("I")
+    signature.frombytes(base64.b64decode(encoded))
+    return signature
+
+
+def _band_keys(signature: array) -> List[bytes]:
+    raw = signature.tobytes()
+    width = ROWS * signature.itemsize
+    return [raw[n * width:(n + 1) * width] for n in range(BANDS)]
+
+
+class ClusterIndex:
+    """
+    Índice en memoria {finding_id: (firma, cluster_id, visto_en)} con las bandas
+    LSH, el tamaño de cada grupo y el análisis de su cabeza. El cluster_id es el
+    finding_id de la cabeza. Se guarda en disco al final de cada ciclo, como SeenIndex.
+    """
+
+    def __init__(self, path: str = CLUSTER_INDEX_PATH, window: float = CLUSTER_WINDOW_SECONDS):
+        self.path = path
+        self.window = window
+        self._entries: Dict[str, Tuple[array, str, float]] = {}
+        self._bands: List[Dict[bytes, Set[str]]] = [{} for _ in range(BANDS)]
+        self._sizes: Dict[str, int] = {}
+        self._analysis: Dict[str, dict] = {}
+        # Grupos que crecieron desde el último take_touched() (hay que guardar su tamaño)
+        self._touched: Set[str] = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, storage=None, path: str = CLUSTER_INDEX_PATH) -> "ClusterIndex":
+        index = cls(path=path)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+            for doc_id, (signature, cluster_id, seen_at) in data["entries"].items():
+                index._add(doc_id, decode_signature(signature), cluster_id, seen_at)
+            index._analysis = data.get("analysis", {})
+            # Los miembros ya olvidados siguen contando en el tamaño del grupo
+            index._sizes.update(data.get("sizes", {}))
+            index.prune()
+        elif storage is not None:
+            print("🧬 Índice de grupos no encontrado. Reconstruyendo desde el almacenamiento...")
+            index.sync(storage)
+        return index
+
+    def sync(self, storage) -> int:
+        """Añade los hallazgos agrupados que aún no conoce (p. ej. los que guardan otros workers)."""
+        added, now = 0, time.time()
+        for data in storage.findings.stream(fields=["minhash", "cluster_id", "cluster_size",
+                                                   "risk_level", "sentiment"]):
+            if not data.get("minhash") or data["id"] in self._entries:
+                continue
+            cluster_id = data.get("cluster_id") or data["id"]
+            with self._lock:
+                self._add(data["id"], decode_signature(data["minhash"]), cluster_id, now)
+                if cluster_id == data["id"]:
+                    # La cabeza guarda el tamaño del grupo, miembros antiguos incluidos
+                    self._sizes[cluster_id] = max(self._sizes[cluster_id], data.get("cluster_size") or 0)
+                    if data.get("risk_level"):
+                        self._analysis[cluster_id] = {"risk_level": data["risk_level"],
+                                                      "sentiment": data.get("sentiment", 0.0)}
+            added += 1
+        return added
+
+    def _add(self, doc_id: str, signature: array, cluster_id: str, seen_at: float):
+        self._entries[doc_id] = (signature, cluster_id, seen_at)
+        for band, key in enumerate(_band_keys(signature)):
+            self._bands[band].setdefault(key, set()).add(doc_id)
+        self._sizes[cluster_id] = self._sizes.get(cluster_id, 0) + 1
+
+    def _most_similar(self, signature: array) -> Optional[str]:
+        candidates = set()
+        for band, key in enumerate(_band_keys(signature)):
+            candidates |= self._bands[band].get(key, set())
+        best, best_score = None, MIN_SIMILARITY
+        for doc_id in candidates:
+            score = similarity(signature, self._entries[doc_id][0])
+            if score >= best_score:
+                best, best_score = doc_id, score
+        return best
+
+    def assign(self, doc_id: str, signature: array) -> Tuple[str, Optional[dict]]:
+        """
+        Grupo del hallazgo y, si es un miembro (no la cabeza), el análisis que
+        puede reutilizar. Un hallazgo ya conocido conserva su grupo.
+        """
+        with self._lock:
+            known = self._entries.get(doc_id)
+            if known is not None:
+                cluster_id = known[1]
+            else:
+                similar = self._most_similar(signature)
+                cluster_id = self._entries[similar][1] if similar else doc_id
+                self._add(doc_id, signature, cluster_id, time.time())
+                self._touched.add(cluster_id)
+            # La cabeza se vuelve a analizar si cambia su contenido
+            analysis = self._analysis.get(cluster_id) if cluster_id != doc_id else None
+            return cluster_id, dict(analysis) if analysis else None
+
+    def record_analysis(self, cluster_id: str, analysis: dict):
+        with self._lock:
+            self._analysis[cluster_id] = {"risk_level": analysis["risk_level"],
+                                          "sentiment": analysis["sentiment"]}
+
+    def size(self, cluster_id: str) -> int:
+        return self._sizes.get(cluster_id, 0)
+
+    def take_touched(self) -> Dict[str, int]:
+        """{cluster_id: tamaño} de los grupos que crecieron, y los olvida."""
+        with self._lock:
+            touched = {cluster_id: self._sizes.get(cluster_id, 0) for cluster_id in self._touched}
+            self._touched = set()
+        return touched
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def prune(self, now: Optional[float] = None):
+        """Olvida los hallazgos fuera de la ventana (el índice no crece sin límite)."""
+        cutoff = (now or time.time()) - self.window
+        with self._lock:
+            expired = [doc_id for doc_id, (_, _, seen_at) in self._entries.items() if seen_at < cutoff]
+            for doc_id in expired:
+                signature, _, _ = self._entries.pop(doc_id)
+                for band, key in enumerate(_band_keys(signature)):
+                    bucket = self._bands[band].get(key)
+                    if bucket is not None:
+                        bucket.discard(doc_id)
+                        if not bucket:
+                            del self._bands[band][key]
+            # Los grupos sin miembros en la ventana ya no admiten nuevos miembros
+            live = {cluster_id for _, cluster_id, _ in self._entries.values()}
+            self._sizes = {c: n for c, n in self._sizes.items() if c in live}
+            self._analysis = {c: a for c, a in self._analysis.items() if c in live}
+
+    def save(self):
+        self.prune()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            data = {
+                "entries": {doc_id: [encode_signature(signature), cluster_id, seen_at]
+                            for doc_id, (signature, cluster_id, seen_at) in self._entries.items()},
+                "analysis": self._analysis,
+                "sizes": self._sizes,
+            }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(data, fh)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,293 @@
+"""
+Caché de hallazgos en memoria del proceso de API.
+
+La lista paginada, /admin/stats, el CSV y la huella del PDF leían la colección
+de hallazgos en cada petición. FindingsCache la carga una vez (solo los campos
+que usan esas lecturas, sin `content`) y la mantiene al día:
+
+  - Firestore: listener on_snapshot sobre la colección (la primera llamada
+    trae la colección entera, luego solo los cambios).
+  - Otros backends: cada POLL_INTERVAL segundos se recorre la colección
+    proyectada y se aplica la diferencia.
+  - Escrituras hechas desde este proceso: se aplican al momento (CachedStorage).
+
+Índices secundarios por risk_level, status y source_id: listas ordenadas por
+(published_date, id) para paginar con el mismo orden y cursor que el backend.
+Cada CHECK_INTERVAL se compara con el documento de contadores (una lectura);
+si no coinciden dos veces seguidas, se recarga. Con más de MAX_ENTRIES
+hallazgos la caché se desactiva y las lecturas vuelven al almacenamiento.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.core.metrics import registry
+from app.core.storage.base import date_key, matches, merge_doc, project
+from app.services.findings_query import LIST_FIELDS
+from app.services.stats import COUNTED_FIELDS, DEFAULTS, _key
+
+CACHE_ENABLED = os.getenv("SENTINEL_FINDINGS_CACHE", "1") != "0"
+MAX_ENTRIES = int(os.getenv("SENTINEL_FINDINGS_CACHE_MAX", "200000"))
+POLL_INTERVAL = float(os.getenv("SENTINEL_FINDINGS_CACHE_POLL", "30"))
+CHECK_INTERVAL = 60.0
+METRICS_INTERVAL = 5.0
+
+# Lista, CSV, huella del PDF y contadores. `content` (lo pesado) se sigue leyendo del backend
+CACHED_FIELDS = sorted(set(LIST_FIELDS) | set(COUNTED_FIELDS) | {"content_hash"})
+INDEXED_FIELDS = ("risk_level", "status", "source_id")
+_MAX_ID = "\U0010ffff"
+
+cache_entries = registry.gauge("sentinel_findings_cache_entries", "Hallazgos en la caché de la API")
+cache_staleness_seconds = registry.gauge(
+    "sentinel_findings_cache_staleness_seconds",
+    "Segundos desde la última vez que la caché se confirmó sincronizada con el almacenamiento")
+cache_reads_total = registry.counter(
+    "sentinel_findings_cache_reads_total", "Lecturas de hallazgos por resultado (hit / miss)", ["operation", "result"])
+cache_resyncs_total = registry.counter(
+    "sentinel_findings_cache_resyncs_total", "Recargas completas por divergencia con los contadores")
+
+
+def _sort_key(doc_id: str, data: Dict) -> Optional[Tuple[str, str]]:
+    published = data.get("published_date")
+    return (date_key(published), doc_id) if published is not None else None
+
+
+class FindingsCache:
+    """
+    Uso:
+        cache = FindingsCache(storage.findings)
+        cache.start()          # carga en segundo plano; hasta entonces ready=False
+        cache.page(filters, 50, None, LIST_FIELDS)
+    """
+
+    def __init__(self, findings, max_entries: int = MAX_ENTRIES,
+                 poll_interval: float = POLL_INTERVAL, check_interval: float = CHECK_INTERVAL):
+        self.findings = findings
+        self.max_entries = max_entries
+        self.poll_interval = poll_interval
+        self.check_interval = check_interval
+
+        self.ready = False
+        self.disabled = False
+        self.last_sync: Optional[float] = None
+        self._lock = threading.RLock()
+        self._unsubscribe: Optional[Callable[[], None]] = None
+        self._mismatches = 0
+        self._clear()
+
+    def _clear(self):
+        self._docs: Dict[str, Dict] = {}
+        # ("*", "*") = todos; (campo, valor) = índice secundario. Ascendentes por (fecha, id)
+        self._orders: Dict[Tuple[str, str], List[Tuple[str, str]]] = {("*", "*"): []}
+        self._counts: Dict[str, Counter] = {field: Counter() for field in COUNTED_FIELDS}
+
+    # --- Ciclo de vida ---
+    def start(self) -> threading.Thread:
+        thread = threading.Thread(target=self._run, name="findings-cache", daemon=True)
+        thread.start()
+        return thread
+
+    def _run(self):
+        try:
+            self._unsubscribe = self.findings.watch(self._on_snapshot)
+        except Exception as e:
+            print(f"⚠️ Caché de hallazgos: listener no disponible ({e}), se consultará periódicamente")
+            self._unsubscribe = None
+        if self._unsubscribe is None:
+            self._poll()
+        # Cada pocos segundos se actualizan las métricas; la sincronización, cuando toca
+        last_sync_attempt = time.monotonic()
+        while not self.disabled:
+            time.sleep(METRICS_INTERVAL)
+            interval = self.poll_interval if self._unsubscribe is None else self.check_interval
+            if time.monotonic() - last_sync_attempt >= interval:
+                last_sync_attempt = time.monotonic()
+                try:
+                    if self._unsubscribe is None:
+                        self._poll()
+                    else:
+                        self._check()
+                except Exception as e:
+                    print(f"⚠️ Caché de hallazgos: error sincronizando ({e})")
+            self._update_metrics()
+
+    def _disable(self, reason: str):
+        print(f"⚠️ Caché de hallazgos desactivada: {reason}. Las lecturas van al almacenamiento.")
+        with self._lock:
+            self.disabled = True
+            self.ready = False
+            self._clear()
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+        self._update_metrics()
+
+    # --- Sincronización ---
+    def _on_snapshot(self, changes: List[Tuple[str, Optional[Dict]]]):
+        with self._lock:
+            for doc_id, data in changes:
+                self._put(doc_id, project(data, CACHED_FIELDS) if data is not None else None)
+            self.last_sync = time.time()
+            if not self.ready and not self.disabled:
+                print(f"🧠 Caché de hallazgos lista: {len(self._docs)} hallazgos (listener)")
+            self.ready = not self.disabled
+        if len(self._docs) > self.max_entries:
+            self._disable(f"más de {self.max_entries} hallazgos")
+
+    def _poll(self):
+        """Recorre la colección proyectada y aplica la diferencia con lo que hay en memoria."""
+        started = time.time()
+        current: Dict[str, Dict] = {}
+        for data in self.findings.stream(fields=CACHED_FIELDS):
+            doc_id = data.pop("id")
+            current[doc_id] = data
+            if len(current) > self.max_entries:
+                self._disable(f"más de {self.max_entries} hallazgos")
+                return
+        with self._lock:
+            for doc_id in [d for d in self._docs if d not in current]:
+                self._put(doc_id, None)
+            for doc_id, data in current.items():
+                if self._docs.get(doc_id) != data:
+                    self._put(doc_id, data)
+            self.last_sync = started
+            if not self.ready:
+                print(f"🧠 Caché de hallazgos lista: {len(self._docs)} hallazgos (consulta cada {self.poll_interval:.0f}s)")
+            self.ready = True
+        self._mismatches = 0
+
+    def _check(self):
+        """Compara con los contadores materializados (una lectura). Dos desajustes seguidos: recarga."""
+        stats = self.findings.get_stats()
+        if stats is None:
+            return  # Sin contadores materializados no hay con qué comparar
+        local = self.stats()
+        # Los contadores pueden conservar claves a 0 tras bajas
+        remote = {field: {k: v for k, v in (stats.get(field) or {}).items() if v} for field in COUNTED_FIELDS}
+        remote["total"] = stats.get("total", 0)
+        if all(remote[field] == local[field] for field in ("total",) + COUNTED_FIELDS):
+            self._mismatches = 0
+            self.last_sync = time.time()
+            return
+        self._mismatches += 1
+        if self._mismatches < 2:
+            return
+        print("⚠️ Caché de hallazgos desalineada con los contadores: recargando")
+        cache_resyncs_total.inc()
+        self._mismatches = 0
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+        with self._lock:
+            self.ready = False
+            self._clear()
+        self._unsubscribe = self.findings.watch(self._on_snapshot)
+        if self._unsubscribe is None:
+            self._poll()
+
+    def _update_metrics(self):
+        cache_entries.set(len(self._docs))
+        if self.last_sync is not None and not self.disabled:
+            cache_staleness_seconds.set(round(time.time() - self.last_sync, 1))
+
+    # --- Escrituras (listener, consulta o este mismo proceso) ---
+    def _put(self, doc_id: str, data: Optional[Dict]):
+        # Bajo self._lock
+        old = self._docs.pop(doc_id, None)
+        if old is not None:
+            key = _sort_key(doc_id, old)
+            for order_key in self._order_keys(old) if key else ():
+                order = self._orders[order_key]
+                i = bisect_left(order, key)
+                if i < len(order) and order[i] == key:
+                    del order[i]
+            for field in COUNTED_FIELDS:
+                self._counts[field][old.get(field) or DEFAULTS[field]] -= 1
+        if data is None:
+            return
+        self._docs[doc_id] = data
+        key = _sort_key(doc_id, data)
+        for order_key in self._order_keys(data) if key else ():
+            insort(self._orders.setdefault(order_key, []), key)
+        for field in COUNTED_FIELDS:
+            self._counts[field][data.get(field) or DEFAULTS[field]] += 1
+
+    def _order_keys(self, data: Dict) -> List[Tuple[str, str]]:
+        keys = [("*", "*")]
+        keys.extend((field, data[field]) for field in INDEXED_FIELDS if data.get(field))
+        return keys
+
+    def apply_write(self, doc_id: str, data: Dict, merge: bool):
+        """
+        Escritura ya confirmada por el backend. Un merge sobre un ID desconocido
+        es un alta (FindingWriter y /findings/bulk escriben siempre con merge):
+        con la caché lista, lo que no está en memoria no existía en el almacenamiento.
+        """
+        with self._lock:
+            if not self.ready:
+                return
+            self._put(doc_id, project(merge_doc(self._docs.get(doc_id), data, merge), CACHED_FIELDS))
+        if len(self._docs) > self.max_entries:
+            self._disable(f"más de {self.max_entries} hallazgos")
+
+    def apply_delete(self, doc_id: str):
+        with self._lock:
+            if self.ready:
+                self._put(doc_id, None)
+
+    # --- Lecturas ---
+    def covers(self, fields: Optional[List[str]]) -> bool:
+        """True si la caché puede responder una lectura con estos campos."""
+        return self.ready and bool(fields) and set(fields) <= set(CACHED_FIELDS)
+
+    def page(self, filters, limit: int, after: Optional[Dict], fields: Optional[List[str]]) -> List[Dict]:
+        """Mismo contrato que FindingRepository.page (orden (published_date, id) descendente)."""
+        with self._lock:
+            # El índice más selectivo de los filtros pedidos
+            candidates = [("*", "*")] + [(f, getattr(filters, f)) for f in INDEXED_FIELDS if getattr(filters, f)]
+            order = min((self._orders.get(k, []) for k in candidates), key=len)
+
+            lo, hi = 0, len(order)
+            if filters.date_from:
+                lo = bisect_left(order, (date_key(filters.date_from), ""))
+            if filters.date_to:
+                hi = bisect_right(order, (date_key(filters.date_to), _MAX_ID))
+            if after:
+                hi = min(hi, bisect_left(order, (date_key(after["published_date"]), after["__name__"])))
+
+            items = []
+            for i in range(hi - 1, lo - 1, -1):
+                doc_id = order[i][1]
+                data = self._docs[doc_id]
+                if matches(data, filters):
+                    items.append({"id": doc_id, **project(data, fields)})
+                    if len(items) >= limit:
+                        break
+            return items
+
+    def stream(self, fields: Optional[List[str]] = None, risk_levels: Optional[List[str]] = None,
+               source_id: Optional[str] = None) -> Iterator[Dict]:
+        with self._lock:
+            ids = list(self._docs)
+        for doc_id in ids:
+            data = self._docs.get(doc_id)
+            if data is None:
+                continue
+            if source_id and data.get("source_id") != source_id:
+                continue
+            if risk_levels and data.get("risk_level") not in risk_levels:
+                continue
+            yield {"id": doc_id, **project(data, fields)}
+
+    def stats(self) -> Dict:
+        """Contadores con el mismo formato que el documento materializado (app.services.stats)."""
+        with self._lock:
+            snapshot = {"total": len(self._docs)}
+            for field in COUNTED_FIELDS:
+                counts = Counter()
+                for value, count in self._counts[field].items():
+                    counts[_key(value)] += count
+                snapshot[field] = {k: v for k, v in counts.items() if v}
+        return snapshot
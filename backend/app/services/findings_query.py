@@ -0,0 +1,78 @@
+import base64
+import json
+import re
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from app.core.storage.base import matches, project
+
+# Campos que necesita la vista de lista del dashboard (el detalle se pide aparte)
+LIST_FIELDS = ["title", "summary", "url", "risk_level", "status", "sentiment",
+               "source_id", "published_date", "cluster_id", "cluster_size"]
+
+# Campos que necesita matches() para aplicar FindingFilters en memoria
+FILTER_FIELDS = {"risk_level", "status", "source_id", "published_date"}
+
+SUMMARY_LENGTH = 300
+MAX_PAGE_SIZE = 500
+
+
+class FindingFilters(BaseModel):
+    risk_level: Optional[str] = None
+    status: Optional[str] = None
+    source_id: Optional[str] = None
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+
+
+def make_summary(content: str) -> str:
+    """Extracto sin HTML que se guarda junto al hallazgo para la vista de lista."""
+    text = " ".join(re.sub('<[^<]+?>', ' ', content or "").split())
+    return text[:SUMMARY_LENGTH]
+
+
+def encode_cursor(doc_id: str, published_date) -> str:
+    if isinstance(published_date, datetime):
+        published_date = published_date.isoformat()
+    raw = json.dumps({"d": published_date, "id": doc_id})
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """Convierte el cursor opaco en los valores de start_after(). ValueError si no es válido."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return {"published_date": datetime.fromisoformat(data["d"]), "__name__": data["id"]}
+    except Exception as e:
+        raise ValueError(f"Cursor inválido: {e}")
+
+
+def fetch_page(storage, filters: FindingFilters, limit: int = 50, after: Optional[str] = None,
+               fields: Optional[List[str]] = LIST_FIELDS) -> Tuple[List[dict], Optional[str]]:
+    """Una página de hallazgos (keyset pagination) y el cursor de la siguiente, o None si no hay más."""
+    if fields:
+        # published_date forma parte del cursor
+        fields = sorted(set(fields) | {"published_date"})
+    items = storage.findings.page(filters, limit, decode_cursor(after) if after else None, fields)
+
+    next_cursor = None
+    if items and len(items) == limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last["id"], last.get("published_date"))
+    return items, next_cursor
+
+
+def iter_findings(storage, filters: FindingFilters, fields: Optional[List[str]] = None) -> Iterator[dict]:
+    """
+    Recorre todos los hallazgos que cumplen los filtros (memoria constante), sin
+    orden. No usa page(): Firestore excluye de las consultas ordenadas por
+    published_date los documentos que no lo tienen, y una exportación debe
+    incluirlos. Riesgo y fuente se filtran en el servidor; el resto, aquí.
+    """
+    read = sorted(set(fields) | FILTER_FIELDS) if fields else None
+    risk_levels = [filters.risk_level] if filters.risk_level else None
+    for data in storage.findings.stream(fields=read, risk_levels=risk_levels, source_id=filters.source_id):
+        if matches(data, filters):
+            yield {"id": data["id"], **project(data, fields)}
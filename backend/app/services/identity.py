@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Iterable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+DATA_DIR = os.getenv("SENTINEL_DATA_DIR", "data")
+SEEN_INDEX_PATH = os.path.join(DATA_DIR, "seen_index.json")
+
+# Parámetros de seguimiento que no cambian el recurso
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "ref_src"}
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Forma canónica de una URL: esquema y host en minúsculas, sin puerto por
+    defecto, sin fragmento, sin parámetros utm_*/de tracking, query ordenada
+    y sin barra final.
+    """
+    url = (url or "").strip()
+    if not url:
+        return ""
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/")
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def _normalize_text(text: str) -> str:
+    return " ".join((text or "").split()).lower()
+
+
+def finding_id(url: str, title: str = "", source_id: str = "") -> str:
+    """ID de documento estable: hash de la URL normalizada (o de fuente + título si no hay URL)."""
+    key = normalize_url(url) if url and url != "N/A" else f"{source_id}|{_normalize_text(title)}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def content_hash(title: str, content: str) -> str:
+    """Hash del contenido: si cambia, el hallazgo se vuelve a analizar y guardar."""
+    key = _normalize_text(title) + "\n" + _normalize_text(content)
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+class SeenIndex:
+    """
+    Índice local {finding_id: content_hash} de lo ya guardado,
+    junto con el risk_level guardado (para ajustar los contadores del dashboard
+    cuando un hallazgo cambia). Se carga una vez por ciclo desde disco (o, la
+    primera vez, con una consulta de proyección sobre `findings`) y permite
+    descartar duplicados antes del análisis y sin ninguna llamada al almacenamiento.
+    """
+
+    def __init__(self, entries: Optional[Dict[str, str]] = None,
+                 risk: Optional[Dict[str, str]] = None, path: str = SEEN_INDEX_PATH):
+        self.path = path
+        self._entries: Dict[str, str] = entries or {}
+        self._risk: Dict[str, str] = risk or {}
+        self._pending: Dict[str, str] = {}
+        self._pending_risk: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, storage=None, path: str = SEEN_INDEX_PATH) -> "SeenIndex":
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+            if isinstance(data.get("hashes"), dict):
+                return cls(data["hashes"], data.get("risk", {}), path=path)
+            # Formato anterior: {id: hash} sin niveles de riesgo. Con almacenamiento se
+            # reconstruye entero; sin él se conservan los hashes. Se reescribe al guardar
+            if storage is None:
+                print("🗂️ Índice de duplicados en formato antiguo: se migra sin niveles de riesgo.")
+                return cls(data, {}, path=path)
+            print("🗂️ Índice de duplicados en formato antiguo. Reconstruyendo desde el almacenamiento...")
+        elif storage is not None:
+            print("🗂️ Índice de duplicados no encontrado. Reconstruyendo desde el almacenamiento...")
+
+        entries, risk = {}, {}
+        if storage is not None:
+            for data in storage.findings.stream(fields=["content_hash", "risk_level"]):
+                if data.get("content_hash"):
+                    entries[data["id"]] = data["content_hash"]
+                    if data.get("risk_level"):
+                        risk[data["id"]] = data["risk_level"]
+        return cls(entries, risk, path=path)
+
+    def warm(self, storage, source_ids: Iterable[str]) -> int:
+        """
+        Carga del almacenamiento los hallazgos de ciertas fuentes (un worker que
+        acaba de recibirlas no los tiene en su índice local). Devuelve cuántos cargó.
+        """
+        loaded = 0
+        for source_id in source_ids:
+            for data in storage.findings.stream(fields=["content_hash", "risk_level"], source_id=source_id):
+                if not data.get("content_hash"):
+                    continue
+                with self._lock:
+                    self._entries[data["id"]] = data["content_hash"]
+                    if data.get("risk_level"):
+                        self._risk[data["id"]] = data["risk_level"]
+                loaded += 1
+        return loaded
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._entries
+
+    def risk_of(self, doc_id: str) -> Optional[str]:
+        return self._risk.get(doc_id)
+
+    def claim(self, doc_id: str, digest: str) -> bool:
+        """
+        True si el hallazgo es nuevo o cambió. Lo reserva para este ciclo, así
+        que la misma noticia llegando por dos feeds solo pasa una vez.
+        """
+        with self._lock:
+            if self._entries.get(doc_id) == digest or self._pending.get(doc_id) == digest:
+                return False
+            self._pending[doc_id] = digest
+            return True
+
+    def record_risk(self, doc_id: str, risk_level: str):
+        with self._lock:
+            self._pending_risk[doc_id] = risk_level
+
+    def release(self, doc_ids: Optional[Iterable[str]] = None):
+        """
+        Suelta reservas que no se van a guardar (fuente con error, ciclo
+        fallido): el próximo ciclo vuelve a tratarlos como nuevos. Sin
+        argumentos, todas las pendientes.
+        """
+        with self._lock:
+            if doc_ids is None:
+                self._pending = {}
+                self._pending_risk = {}
+                return
+            for doc_id in doc_ids:
+                self._pending.pop(doc_id, None)
+                self._pending_risk.pop(doc_id, None)
+
+    def commit(self, exclude: Iterable[str] = (), save: bool = True):
+        """
+        Confirma lo reservado (menos lo que no se pudo guardar) y lo persiste en
+        disco. Con save=False solo en memoria: quien confirma por lotes guarda al final.
+        """
+        excluded = set(exclude)
+        with self._lock:
+            for doc_id, digest in self._pending.items():
+                if doc_id not in excluded:
+                    self._entries[doc_id] = digest
+            for doc_id, risk_level in self._pending_risk.items():
+                if doc_id not in excluded:
+                    self._risk[doc_id] = risk_level
+            self._pending = {}
+            self._pending_risk = {}
+            if save:
+                self.save()
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump({"hashes": self._entries, "risk": self._risk}, fh)
+        os.replace(tmp_path, self.path)
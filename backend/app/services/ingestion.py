@@ -0,0 +1,329 @@
+import asyncio
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+from app.core.metrics import registry
+from app.models.finding import Finding
+from app.models.source import Source
+from app.scrapers.base import BaseScraper
+from app.scrapers.reddit_scraper import RedditScraper
+from app.scrapers.rss_scraper import RSSScraper
+from app.services.analyzer import Analyzer
+from app.services.clustering import ClusterIndex, encode_signature, minhash
+from app.services.identity import SeenIndex, content_hash, finding_id
+
+# Scraper a usar según el campo "type" de la fuente
+SCRAPERS = {
+    "rss": RSSScraper,
+    "reddit": RedditScraper,
+}
+
+USER_AGENT = "Sentinel_OSINT_Bot/1.0"
+
+# Métricas del pipeline por fuente (expuestas en /api/v1/metrics)
+STAGES = ("fetch", "parse", "analyze", "total")
+stage_seconds = registry.histogram(
+    "sentinel_ingestion_stage_seconds", "Duración de cada etapa por fuente", ["source", "stage"])
+source_results_total = registry.counter(
+    "sentinel_ingestion_results_total", "Resultados de ingestión por fuente y estado", ["source", "status"])
+source_items_total = registry.counter(
+    "sentinel_ingestion_items_total", "Items nuevos (tras descartar duplicados) por fuente", ["source"])
+source_duplicates_total = registry.counter(
+    "sentinel_ingestion_duplicates_total", "Items descartados por ya vistos", ["source"])
+source_clustered_total = registry.counter(
+    "sentinel_ingestion_clustered_total", "Items unidos a un grupo existente (análisis reutilizado)", ["source"])
+source_bytes_total = registry.counter(
+    "sentinel_ingestion_bytes_total", "Bytes descargados por fuente", ["source"])
+
+
+@dataclass
+class SourceResult:
+    """Resultado de una fuente dentro de un ciclo (hallazgos + tiempos por etapa)."""
+    source: Source
+    status: str = "pending"  # ok | not_modified | unchanged | error | timeout
+    error: Optional[str] = None
+    # Validadores nuevos a guardar en el documento de la fuente (solo si cambió)
+    validators: Dict = field(default_factory=dict)
+    bytes_downloaded: int = 0
+    duplicates: int = 0
+    # Casi-duplicados de un grupo ya analizado: reutilizan el análisis de la cabeza
+    clustered: int = 0
+    # Lectura incremental (FeedStream): True si se cortó en el límite de entradas y
+    # pudieron quedar nuevas sin leer, False si llegó a la marca o al final. None: sin datos
+    truncated: Optional[bool] = None
+    findings: List[Finding] = field(default_factory=list)
+    analyses: List[dict] = field(default_factory=list)
+    fetch_ms: float = 0.0
+    parse_ms: float = 0.0
+    analyze_ms: float = 0.0
+    total_ms: float = 0.0
+
+
+def build_scraper(source: Source) -> Optional[BaseScraper]:
+    scraper_cls = SCRAPERS.get(source.type)
+    return scraper_cls(source) if scraper_cls else None
+
+
+def analyze_findings(findings: List[Finding]) -> List[dict]:
+    return Analyzer.analyze_batch([item.title + " " + item.content for item in findings])
+
+
+def analyze_with_clusters(findings: List[Finding], clusters: Optional[ClusterIndex]) -> Tuple[List[dict], int]:
+    """
+    Asigna cada item a su grupo de casi-duplicados antes del análisis: los
+    miembros de un grupo ya analizado copian el análisis de la cabeza y solo
+    se analiza el resto. Devuelve los análisis y cuántos se reutilizaron.
+    """
+    if clusters is None:
+        return analyze_findings(findings), 0
+
+    analyses: List[Optional[dict]] = []
+    pending = []
+    for item in findings:
+        signature = minhash(item.title + " " + item.content)
+        doc_id = finding_id(item.url, item.title, item.source_id)
+        item.minhash = encode_signature(signature)
+        item.cluster_id, analysis = clusters.assign(doc_id, signature)
+        analyses.append(analysis)
+        if analysis is None:
+            pending.append(len(analyses) - 1)
+
+    fresh = analyze_findings([findings[i] for i in pending])
+    for i, analysis in zip(pending, fresh):
+        analyses[i] = analysis
+        item = findings[i]
+        if item.cluster_id == finding_id(item.url, item.title, item.source_id):
+            clusters.record_analysis(item.cluster_id, analysis)
+    return analyses, len(analyses) - len(pending)
+
+
+class IngestionEngine:
+    """
+    Motor de ingestión asíncrono.
+    Descarga todas las fuentes a la vez con un límite global de concurrencia,
+    un límite por host y un timeout por fuente. El parseo y el análisis se
+    ejecutan en un pool de hilos para no bloquear el loop de descargas.
+    """
+
+    def __init__(self, max_concurrency: int = 32, per_host_limit: int = 4,
+                 source_timeout: float = 30.0, workers: int = 4,
+                 seen_index: Optional[SeenIndex] = None, cluster_index: Optional[ClusterIndex] = None):
+        self.seen_index = seen_index
+        self.cluster_index = cluster_index
+        self.max_concurrency = max_concurrency
+        self.per_host_limit = per_host_limit
+        self.source_timeout = source_timeout
+        self.workers = workers
+
+    def run_sync(self, sources: List[Source]) -> List[SourceResult]:
+        """Punto de entrada para código síncrono (APScheduler, scripts)."""
+        return asyncio.run(self.run(sources))
+
+    async def run(self, sources: List[Source]) -> List[SourceResult]:
+        self._global_limit = asyncio.Semaphore(self.max_concurrency)
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            async with httpx.AsyncClient(
+                follow_redirects=True,
+                headers={"User-Agent": USER_AGENT},
+                limits=httpx.Limits(max_connections=self.max_concurrency),
+            ) as client:
+                tasks = [self._process(client, pool, source) for source in sources]
+                return await asyncio.gather(*tasks)
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc.lower()
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_limits[host]
+
+    async def _process(self, client: httpx.AsyncClient, pool: ThreadPoolExecutor,
+                       source: Source) -> SourceResult:
+        result = SourceResult(source=source)
+        start = time.perf_counter()
+        timeout = (source.config or {}).get("timeout", self.source_timeout)
+
+        try:
+            await self._ingest(client, pool, result, timeout)
+        except asyncio.TimeoutError:
+            result.status = "timeout"
+            result.error = f"Timeout tras {timeout}s"
+        except Exception as e:
+            result.status = "error"
+            result.error = str(e)
+
+        result.total_ms = (time.perf_counter() - start) * 1000
+        record_metrics(result)
+        return result
+
+    async def _ingest(self, client: httpx.AsyncClient, pool: ThreadPoolExecutor,
+                      result: SourceResult, timeout: float):
+        loop = asyncio.get_running_loop()
+        scraper = build_scraper(result.source)
+        if scraper is None:
+            raise ValueError(f"Tipo de fuente no soportado: {result.source.type}")
+
+        request = scraper.build_request()
+
+        # El timeout cuenta desde que la fuente obtiene su turno, no mientras espera en cola
+        if request is None:
+            async with self._global_limit:
+                t0 = time.perf_counter()
+                # Fuentes de API con varias peticiones: usan el cliente del motor
+                findings = await asyncio.wait_for(scraper.fetch(client), timeout=timeout)
+                if findings is None:
+                    # Scraper sin descarga HTTP separada: se ejecuta completo en un hilo
+                    findings = await asyncio.wait_for(
+                        loop.run_in_executor(pool, scraper.scrape), timeout=timeout)
+                result.findings = findings
+            result.fetch_ms = (time.perf_counter() - t0) * 1000
+            result.bytes_downloaded = getattr(scraper, "bytes_read", 0)
+            high_water = scraper.high_water()
+            if high_water:
+                result.validators["high_water"] = high_water
+        else:
+            stream = scraper.stream_parser()
+            async with self._host_limit(request["url"]), self._global_limit:
+                t0 = time.perf_counter()
+                if stream is None:
+                    response = await asyncio.wait_for(
+                        client.get(request["url"], headers=request.get("headers")), timeout=timeout)
+                    if response.status_code != 304:
+                        response.raise_for_status()
+                        payload = response.content
+                else:
+                    response = await asyncio.wait_for(
+                        self._stream(client, pool, request, stream), timeout=timeout)
+                if response.status_code == 304:
+                    result.status = "not_modified"
+            result.fetch_ms = (time.perf_counter() - t0) * 1000
+            if stream is not None:
+                # El parseo incremental ocurre durante la descarga: se cuenta aparte
+                result.fetch_ms -= stream.parse_seconds * 1000
+
+            # 304 o cuerpo idéntico al último procesado: no se parsea, analiza ni escribe
+            if result.status == "not_modified":
+                return
+            result.validators = {
+                "etag": response.headers.get("etag"),
+                "last_modified": response.headers.get("last-modified"),
+            }
+            if stream is None:
+                result.bytes_downloaded = len(payload)
+                result.validators.update(content_hash=hashlib.sha256(payload).hexdigest(),
+                                         content_length=len(payload))
+            else:
+                result.bytes_downloaded = stream.bytes_read
+                # El hash del cuerpo solo sirve si se leyó entero (sin cortar en la marca)
+                if stream.complete:
+                    result.validators.update(content_hash=stream.digest(), content_length=stream.bytes_read)
+            content_hash = result.validators.get("content_hash")
+            if content_hash and content_hash == getattr(result.source, "content_hash", None):
+                # Se guardan igualmente los validadores: el servidor puede haber
+                # cambiado el ETag aunque el contenido sea el mismo
+                result.status = "unchanged"
+                return
+
+            t0 = time.perf_counter()
+            if stream is None:
+                result.findings = await loop.run_in_executor(pool, scraper.parse, payload)
+                result.parse_ms = (time.perf_counter() - t0) * 1000
+            else:
+                result.findings = await loop.run_in_executor(pool, scraper.finish, stream)
+                result.parse_ms = (time.perf_counter() - t0 + stream.parse_seconds) * 1000
+                result.truncated = stream.limit_hit
+                high_water = stream.high_water()
+                if high_water:
+                    # Se guarda con el resto de validadores, solo si la escritura del ciclo va bien
+                    result.validators["high_water"] = high_water
+
+        self._drop_seen(result)
+
+        t0 = time.perf_counter()
+        result.analyses = await loop.run_in_executor(pool, self._analyze, result)
+        result.analyze_ms = (time.perf_counter() - t0) * 1000
+        result.status = "ok"
+
+    async def _stream(self, client: httpx.AsyncClient, pool: ThreadPoolExecutor,
+                      request: Dict, stream) -> httpx.Response:
+        """
+        Descarga el cuerpo por trozos y se los pasa al parser incremental; cierra
+        la conexión en cuanto el parser tiene lo que necesita (marca de agua o límite).
+        """
+        loop = asyncio.get_running_loop()
+        complete = True
+        async with client.stream("GET", request["url"], headers=request.get("headers")) as response:
+            if response.status_code == 304:
+                return response
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes():
+                if await loop.run_in_executor(pool, stream.feed, chunk):
+                    complete = False
+                    break
+        await loop.run_in_executor(pool, stream.close, complete)
+        return response
+
+    def _analyze(self, result: SourceResult) -> List[dict]:
+        analyses, result.clustered = analyze_with_clusters(result.findings, self.cluster_index)
+        return analyses
+
+    def _drop_seen(self, result: SourceResult):
+        """Descarta antes del análisis lo que ya está guardado con el mismo hash."""
+        fresh = []
+        for item in result.findings:
+            item.content_hash = content_hash(item.title, item.content)
+            doc_id = finding_id(item.url, item.title, item.source_id)
+            if self.seen_index is None or self.seen_index.claim(doc_id, item.content_hash):
+                fresh.append(item)
+        result.duplicates = len(result.findings) - len(fresh)
+        result.findings = fresh
+
+
+def record_metrics(result: SourceResult):
+    source = result.source.name
+    source_results_total.inc(source=source, status=result.status)
+    for stage in STAGES:
+        value = getattr(result, f"{stage}_ms")
+        # Etapas que no llegaron a ejecutarse (304, error) no cuentan como 0 ms
+        if value or stage == "total":
+            stage_seconds.observe(value / 1000, source=source, stage=stage)
+    if result.findings:
+        source_items_total.inc(len(result.findings), source=source)
+    if result.duplicates:
+        source_duplicates_total.inc(result.duplicates, source=source)
+    if result.clustered:
+        source_clustered_total.inc(result.clustered, source=source)
+    if result.bytes_downloaded:
+        source_bytes_total.inc(result.bytes_downloaded, source=source)
+
+
+def print_cycle_report(results: List[SourceResult], wall_ms: float):
+    """Resumen del ciclo con el tiempo de cada fuente (más lentas primero)."""
+    print(f"📊 Ciclo completado en {wall_ms:.0f} ms ({len(results)} fuentes)")
+
+    not_modified = [r for r in results if r.status == "not_modified"]
+    unchanged = [r for r in results if r.status == "unchanged"]
+    downloaded = sum(r.bytes_downloaded for r in results)
+    # Estimación: un 304 ahorra el tamaño del último cuerpo descargado de esa fuente
+    saved = sum(getattr(r.source, "content_length", 0) or 0 for r in not_modified)
+    print(f"   ⏭️  Sin cambios: {len(not_modified) + len(unchanged)} fuentes "
+          f"(304: {len(not_modified)}, cuerpo idéntico: {len(unchanged)}) | "
+          f"descargado: {downloaded / 1024:.0f} KB, ahorrado por 304: ~{saved / 1024:.0f} KB")
+    print(f"   ♻️  Duplicados descartados antes del análisis: {sum(r.duplicates for r in results)} | "
+          f"casi-duplicados agrupados: {sum(r.clustered for r in results)}")
+    # Columna de estado al ancho del más largo (NOT_MODIFIED) para que la tabla quede alineada
+    width = max((len(r.status) for r in results), default=0)
+    for r in sorted(results, key=lambda r: r.total_ms, reverse=True):
+        line = (f"   [{r.status.upper():{width}}] {r.source.name[:40]:40} "
+                f"total={r.total_ms:7.0f}ms fetch={r.fetch_ms:6.0f} "
+                f"parse={r.parse_ms:5.0f} analyze={r.analyze_ms:5.0f} items={len(r.findings)}")
+        if r.error:
+            line += f" ⚠️ {r.error}"
+        print(line)
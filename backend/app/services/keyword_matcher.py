@@ -0,0 +1,66 @@
+from collections import deque
+from typing import Dict, Iterable, List, Set
+
+
+class KeywordMatcher:
+    """
+    Autómata Aho-Corasick: busca todas las palabras clave en una sola pasada
+    sobre el texto, sin importar cuántas haya (O(len(texto) + coincidencias)).
+    Equivale a `word in text` para cada palabra (búsqueda de subcadenas).
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = [k for k in keywords if k]
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Set[str]] = [set()]
+
+        for word in self.keywords:
+            self._insert(word)
+        self._build_links()
+
+    def _insert(self, word: str):
+        state = 0
+        for char in word:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(set())
+            state = nxt
+        self._out[state].add(word)
+
+    def _build_links(self):
+        # BFS: el enlace de fallo de cada nodo apunta al sufijo propio más largo
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                self._out[nxt] |= self._out[self._fail[nxt]]
+
+    def _states(self, text: str):
+        state = 0
+        goto, fail = self._goto, self._fail
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            yield state
+
+    def find_all(self, text: str) -> Set[str]:
+        found = set()
+        for state in self._states(text):
+            if self._out[state]:
+                found |= self._out[state]
+        return found
+
+    def contains_any(self, text: str) -> bool:
+        """Se detiene en la primera coincidencia."""
+        return any(self._out[state] for state in self._states(text))
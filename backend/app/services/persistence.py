@@ -0,0 +1,148 @@
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.models.finding import Finding
+from app.services.findings_query import make_summary
+from app.services.identity import SeenIndex, finding_id
+from app.services.stats import counter_delta, merge_deltas
+
+# Firestore admite como máximo 500 operaciones por WriteBatch
+MAX_BATCH_SIZE = 500
+
+
+class FindingWriter:
+    """
+    Etapa de persistencia compartida (scheduler y run_scanner).
+    Acumula escrituras y las envía en lotes atómicos (WriteBatch en Firestore,
+    una transacción en SQLite) vaciando el buffer al llegar
+    a `batch_size` operaciones o cuando el más antiguo lleva `flush_interval`
+    segundos esperando (un temporizador lo vacía aunque no lleguen más).
+    Si un batch falla, reintenta documento por documento con backoff.
+    Los deltas de contadores (app.services.stats) viajan en el mismo lote que
+    los hallazgos, así que contadores y datos se confirman juntos.
+
+    Uso:
+        with FindingWriter(get_storage()) as writer:
+            writer.set(doc_id, data)
+        print(writer.summary())
+    """
+
+    def __init__(self, storage, batch_size: int = 400,
+                 flush_interval: float = 2.0, max_retries: int = 3):
+        self.findings = storage.findings
+        # Una operación del batch se reserva para el documento de contadores
+        self.batch_size = min(batch_size, MAX_BATCH_SIZE - 1)
+        self.flush_interval = flush_interval
+        if max_retries < 1:
+            raise ValueError("max_retries debe ser al menos 1")
+        self.max_retries = max_retries
+
+        self._pending: List[Tuple[str, Dict, bool, Dict]] = []
+        self._oldest = None
+        self._timer: Optional[threading.Timer] = None
+        # El temporizador vacía el buffer desde su propio hilo
+        self._lock = threading.RLock()
+        self._started = time.perf_counter()
+
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.retried = 0
+        self.failed_ids: List[str] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+
+    def set(self, doc_id: str, data: Dict, merge: bool = True,
+            stats_delta: Optional[Dict[str, int]] = None):
+        with self._lock:
+            if not self._pending:
+                self._oldest = time.perf_counter()
+                self._start_timer()
+            self._pending.append((doc_id, data, merge, stats_delta or {}))
+
+            if (len(self._pending) >= self.batch_size
+                    or time.perf_counter() - self._oldest >= self.flush_interval):
+                self.flush()
+
+    def _start_timer(self):
+        # Productor que deja de enviar: lo pendiente no espera al siguiente set()
+        if self.flush_interval > 0:
+            self._timer = threading.Timer(self.flush_interval, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, []
+            self._write(pending)
+
+    def _write(self, pending: List[Tuple[str, Dict, bool, Dict]]):
+        writes = [(doc_id, data, merge) for doc_id, data, merge, _ in pending]
+        try:
+            self.findings.upsert_many(writes, merge_deltas(*(delta for *_, delta in pending)))
+            self.written += len(pending)
+        except Exception as e:
+            print(f"⚠️ Fallo en batch de {len(pending)} hallazgos ({e}). Reintentando uno a uno...")
+            for doc_id, data, merge, delta in pending:
+                self._retry_one(doc_id, data, merge, delta)
+        self.batches += 1
+
+    def _retry_one(self, doc_id: str, data: Dict, merge: bool, delta: Dict[str, int]):
+        error = None
+        for attempt in range(self.max_retries):
+            try:
+                self.findings.upsert_many([(doc_id, data, merge)], delta)
+                self.written += 1
+                self.retried += 1
+                return
+            except Exception as e:
+                error = e
+                time.sleep(0.5 * (2 ** attempt))
+        print(f"   ❌ No se pudo guardar {doc_id}: {error}")
+        self.failed += 1
+        self.failed_ids.append(doc_id)
+
+    def summary(self) -> str:
+        elapsed = time.perf_counter() - self._started
+        rate = self.written / elapsed if elapsed > 0 else 0.0
+        return (f"💾 Persistencia: {self.written} escritos en {self.batches} batches "
+                f"({rate:.0f} docs/s), {self.retried} reintentados, {self.failed} fallidos")
+
+
+def queue_finding(writer: FindingWriter, seen: SeenIndex, item: Finding, analysis: dict) -> str:
+    """
+    Prepara el documento de un hallazgo ya analizado y lo encola en el writer,
+    con el delta de contadores que corresponda (alta o cambio de riesgo).
+    Devuelve el ID del documento.
+    """
+    item.sentiment = analysis['sentiment']
+
+    doc_data = item.model_dump()
+    doc_data['risk_level'] = analysis['risk_level']
+    doc_data['summary'] = make_summary(item.content)
+
+    doc_id = finding_id(item.url, item.title, item.source_id)
+    if doc_id not in seen:
+        # Solo al crear: no pisamos el estado que haya puesto un analista
+        doc_data['status'] = "new"
+        delta = counter_delta(None, doc_data)
+    elif seen.risk_of(doc_id):
+        delta = counter_delta({"risk_level": seen.risk_of(doc_id)},
+                              {"risk_level": doc_data['risk_level']})
+    else:
+        delta = {}  # Riesgo anterior desconocido: lo corrige la reconciliación
+    seen.record_risk(doc_id, doc_data['risk_level'])
+
+    # merge=True actualiza si existe, crea si no
+    writer.set(doc_id, doc_data, stats_delta=delta)
+    return doc_id
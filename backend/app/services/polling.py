@@ -0,0 +1,261 @@
+"""
+Planificador adaptativo: cada fuente tiene su propio intervalo de consulta.
+
+El intervalo se calcula a partir del ritmo de publicación observado (media
+móvil exponencial de items nuevos por segundo), con límites, jitter y
+backoff exponencial ante errores. Las fuentes se despachan desde una cola de
+prioridad ordenada por la hora de su próxima consulta.
+"""
+import heapq
+import itertools
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core.metrics import registry
+from app.models.source import Source
+from app.scrapers.base import DEFAULT_MAX_ENTRIES
+from app.services.identity import SeenIndex
+from app.services.ingestion import IngestionEngine, SourceResult, build_scraper
+
+DEFAULT_INTERVAL = 600.0     # 10 min: lo que hacía el job fijo, para fuentes sin historial
+MIN_INTERVAL = 120.0
+MAX_INTERVAL = 6 * 3600.0
+MAX_BACKOFF = 24 * 3600.0
+JITTER = 0.1                 # ±10% para que las fuentes no se sincronicen
+RATE_ALPHA = 0.3             # peso de la última observación en la media móvil
+# Consultar cuando se haya renovado esta fracción de las entradas que leemos por consulta:
+# con 0.5 queda margen antes de que un feed con mucho movimiento supere max_entries
+TARGET_FILL = 0.5
+TICK_SECONDS = 30
+SOURCES_REFRESH_SECONDS = 300
+MAX_SOURCES_PER_TICK = 200
+
+interval_seconds = registry.gauge(
+    "sentinel_polling_interval_seconds", "Intervalo de consulta actual por fuente", ["source"])
+saturated_total = registry.counter(
+    "sentinel_polling_saturated_total", "Consultas cortadas en el límite de entradas o sin solape con la anterior (posibles items perdidos)", ["source"])
+queue_size = registry.gauge("sentinel_polling_queue_size", "Fuentes en la cola del planificador")
+due_sources = registry.gauge("sentinel_polling_due_sources", "Fuentes vencidas en el último tick")
+
+
+@dataclass
+class PollState:
+    """Historial de una fuente. Se guarda en el campo `polling` de su documento."""
+    interval: float = DEFAULT_INTERVAL
+    next_poll: float = 0.0
+    last_poll: Optional[float] = None
+    rate: float = 0.0           # items nuevos por segundo (EWMA)
+    failures: int = 0
+
+    @classmethod
+    def from_source(cls, source: Source) -> "PollState":
+        data = source.polling or {}
+        known = {k: v for k, v in data.items() if k in cls.__dataclass_fields__}
+        return cls(**known)
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def _bounds(source: Source) -> Tuple[float, float]:
+    config = source.config or {}
+    if config.get("stream"):
+        # Modo stream: la lectura es continua (scrapers/reddit_scraper.py); el ciclo solo recoge lo acumulado
+        return float(TICK_SECONDS), float(TICK_SECONDS)
+    return (float(config.get("min_interval", MIN_INTERVAL)),
+            float(config.get("max_interval", MAX_INTERVAL)))
+
+
+def _jitter(seconds: float) -> float:
+    return seconds * random.uniform(1 - JITTER, 1 + JITTER)
+
+
+def _publish_span_rate(result: SourceResult) -> float:
+    """Ritmo estimado por las fechas de publicación (primera consulta, sin historial)."""
+    dates = sorted(f.published_date for f in result.findings if isinstance(f.published_date, datetime))
+    if len(dates) < 2:
+        return 0.0
+    span = (dates[-1] - dates[0]).total_seconds()
+    return (len(dates) - 1) / span if span > 0 else 0.0
+
+
+def update_state(state: PollState, source: Source, result: SourceResult, now: float) -> PollState:
+    """Actualiza el historial con el resultado de una consulta y calcula la siguiente."""
+    low, high = _bounds(source)
+
+    if result.status in ("error", "timeout"):
+        state.failures += 1
+        # Backoff sobre el intervalo normal: 2x, 4x, 8x... con tope
+        delay = min(MAX_BACKOFF, state.interval * (2 ** state.failures))
+        state.next_poll = now + _jitter(delay)
+        return state
+
+    state.failures = 0
+    new_items = len(result.findings)
+    parsed = new_items + result.duplicates
+    scraper = build_scraper(source)
+    cap = scraper.max_entries if scraper else DEFAULT_MAX_ENTRIES
+
+    if state.last_poll is None:
+        observed = _publish_span_rate(result)
+    else:
+        elapsed = max(now - state.last_poll, 1.0)
+        observed = new_items / elapsed
+        if result.truncated is not None:
+            # Lectura incremental: se corta en la marca de agua (nada perdido) o en el
+            # límite de entradas, y solo en ese caso pueden haber quedado items sin leer
+            saturated = result.truncated
+        else:
+            # Ninguna entrada coincide con la consulta anterior: el feed rotó más de lo que leemos
+            saturated = parsed >= cap and result.duplicates == 0
+        if saturated:
+            # Probablemente se perdieron items: el ritmo real es al menos lo leído/elapsed
+            saturated_total.inc(source=source.name)
+            observed = max(observed, 2 * max(cap, parsed) / elapsed)
+    state.rate = observed if state.rate == 0 else RATE_ALPHA * observed + (1 - RATE_ALPHA) * state.rate
+
+    if state.rate > 0:
+        state.interval = TARGET_FILL * cap / state.rate
+    elif state.last_poll is not None:
+        # Nada nuevo y sin ritmo conocido: espaciar poco a poco
+        state.interval = state.interval * 1.5
+    state.interval = min(max(state.interval, low), high)
+
+    state.last_poll = now
+    state.next_poll = now + _jitter(state.interval)
+    interval_seconds.set(state.interval, source=source.name)
+    return state
+
+
+class AdaptivePoller:
+    """
+    Cola de prioridad (heap) de (próxima consulta, fuente). tick() despacha las
+    fuentes vencidas en un solo ciclo del motor y las reprograma según su resultado.
+    """
+
+    def __init__(self, storage, run_cycle: Callable, load_sources: Callable,
+                 engine: Optional[IngestionEngine] = None, seen: Optional[SeenIndex] = None,
+                 refresh_seconds: float = SOURCES_REFRESH_SECONDS,
+                 claim: Optional[Callable[[List[Source]], List[Source]]] = None,
+                 release: Optional[Callable[[List[Source]], None]] = None,
+                 claim_retry: float = TICK_SECONDS):
+        """
+        `claim`/`release` permiten a un worker reservar las fuentes vencidas antes
+        de consultarlas (arrendamientos); las no reservadas se reintentan tras `claim_retry`.
+        """
+        self.storage = storage
+        self.run_cycle = run_cycle
+        self.load_sources = load_sources
+        self.engine = engine or IngestionEngine()
+        self.refresh_seconds = refresh_seconds
+        self.claim = claim
+        self.release = release
+        self.claim_retry = claim_retry
+        self.sources: Dict[str, Source] = {}
+        self.states: Dict[str, PollState] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self._seen: Optional[SeenIndex] = seen
+        self._last_refresh = 0.0
+        self._lock = threading.Lock()
+
+    def _schedule(self, source_id: str):
+        heapq.heappush(self._heap, (self.states[source_id].next_poll, next(self._seq), source_id))
+
+    def refresh_sources(self, now: Optional[float] = None):
+        """Sincroniza con las fuentes activas: altas, bajas y cambios de configuración."""
+        now = now or time.time()
+        active = {s.id: s for s in self.load_sources(self.storage)}
+        for source_id, source in active.items():
+            if source_id not in self.states:
+                state = PollState.from_source(source)
+                if not state.next_poll:
+                    # Fuente nueva: primera consulta pronto, repartida para no ir todas a la vez
+                    state.next_poll = now + random.uniform(0, TICK_SECONDS)
+                self.states[source_id] = state
+                self._schedule(source_id)
+        for source_id in set(self.states) - set(active):
+            # Las entradas del heap de fuentes borradas se descartan al salir
+            del self.states[source_id]
+        self.sources = active
+        self._last_refresh = now
+
+    def _pop_due(self, now: float) -> List[Source]:
+        due, seen_ids = [], set()
+        while self._heap and self._heap[0][0] <= now and len(due) < MAX_SOURCES_PER_TICK:
+            next_poll, _, source_id = heapq.heappop(self._heap)
+            state = self.states.get(source_id)
+            # Entrada obsoleta (fuente borrada o reprogramada después de encolarla)
+            if state is None or state.next_poll != next_poll or source_id in seen_ids:
+                continue
+            seen_ids.add(source_id)
+            due.append(self.sources[source_id])
+        return due
+
+    def tick(self):
+        """Ejecutado por APScheduler cada TICK_SECONDS."""
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            now = time.time()
+            if now - self._last_refresh >= self.refresh_seconds:
+                self.refresh_sources(now)
+
+            due = self._pop_due(now)
+            if due and self.claim is not None:
+                claimed = self.claim(due)
+                claimed_ids = {s.id for s in claimed}
+                for source in due:
+                    if source.id not in claimed_ids:
+                        # La tiene otro worker en este momento: se reintenta más tarde
+                        self.states[source.id].next_poll = now + self.claim_retry
+                        self._schedule(source.id)
+                due = claimed
+            due_sources.set(len(due))
+            queue_size.set(len(self.states))
+            if not due:
+                return
+
+            if self._seen is None:
+                self._seen = SeenIndex.load(self.storage)
+            print(f"⏱️ [Poller] {len(due)} fuentes vencidas de {len(self.states)}")
+            try:
+                results = self.run_cycle(storage=self.storage, engine=self.engine, sources=due, seen=self._seen)
+            except Exception as e:
+                print(f"❌ [Poller] Error en el ciclo: {e}")
+                # Nada de lo reservado en este ciclo llegó a confirmarse
+                self._seen.release()
+                results = []
+            finally:
+                if self.release is not None:
+                    self.release(due)
+
+            finished = time.time()
+            for result in results:
+                source_id = result.source.id
+                if source_id not in self.states:
+                    continue
+                state = update_state(self.states[source_id], result.source, result, finished)
+                self._schedule(source_id)
+                try:
+                    self.storage.sources.update(source_id, {"polling": state.to_dict()})
+                except Exception as e:
+                    print(f"⚠️ No se pudo guardar el estado de {result.source.name}: {e}")
+            # Fuentes vencidas sin resultado (fallo del ciclo completo): se reintentan con el intervalo normal
+            for source in due:
+                state = self.states.get(source.id)
+                if state is not None and state.next_poll <= now:
+                    state.next_poll = finished + _jitter(state.interval)
+                    self._schedule(source.id)
+        finally:
+            self._lock.release()
+
+    def snapshot(self) -> List[Dict]:
+        """Estado de cada fuente, de la más próxima a la más lejana."""
+        rows = [{"source_id": sid, "name": self.sources[sid].name if sid in self.sources else None,
+                 **state.to_dict()} for sid, state in self.states.items()]
+        return sorted(rows, key=lambda r: r["next_poll"])
@@ -0,0 +1,191 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app.services.identity import DATA_DIR
+from app.utils.text import clean_text
+
+REPORTS_DIR = os.path.join(DATA_DIR, "reports")
+REPORT_RISK_LEVELS = ["high", "critical"]
+# Campos mínimos para saber si el reporte cambió sin leer el contenido completo
+FINGERPRINT_FIELDS = ["title", "risk_level", "content_hash"]
+MAX_CACHED_REPORTS = 50
+MAX_TRACKED_JOBS = 200
+
+
+def render_findings_pdf(items: List[Dict], username: str) -> bytes:
+    """Genera el PDF de hallazgos críticos. Se ejecuta en un proceso del pool."""
+    from fpdf import FPDF  # Solo lo necesita el proceso que renderiza
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", size=12)
+
+    # Título
+    pdf.set_font("Arial", "B", 16)
+    pdf.cell(200, 10, txt="Reporte - SENTINEL", ln=1, align="C")
+
+    # Subtítulo
+    user_clean = clean_text(username)
+    pdf.set_font("Arial", size=10)
+    pdf.cell(200, 10, txt=f"Generado por: {user_clean}", ln=1, align="C")
+    pdf.ln(10)
+
+    if not items:
+        pdf.cell(200, 10, txt="Sin amenazas criticas.", ln=1, align="L")
+    else:
+        for item in items:
+            # LIMPIEZA A LO QUE VA AL PDF
+            title = clean_text(item.get('title', 'Sin Titulo'))
+            risk = clean_text(item.get('risk_level', 'UNKNOWN')).upper()
+
+            # Content estará limpio de HTML
+            content = clean_text(item.get('content', ''))[:300] + "..."
+
+            # Título de la noticia
+            pdf.set_font("Arial", "B", 12)
+            pdf.set_text_color(190, 0, 0)
+            pdf.multi_cell(0, 10, txt=f"[{risk}] {title}")
+
+            # Contenido
+            pdf.set_font("Arial", size=10)
+            pdf.set_text_color(0, 0, 0)
+            pdf.multi_cell(0, 6, txt=content)
+            pdf.ln(5)
+
+            pdf.line(10, pdf.get_y(), 200, pdf.get_y())
+            pdf.ln(5)
+
+    return pdf.output(dest='S').encode('latin-1', 'replace')
+
+
+def report_fingerprint(storage, username: str) -> str:
+    """
+    Huella de los datos del reporte: cambia si entra, sale o se modifica algún
+    hallazgo high/critical. Solo lee una proyección, nunca el contenido.
+    """
+    digest = hashlib.sha256(f"critical-pdf|{username}".encode("utf-8"))
+    rows = sorted(
+        (data["id"], json.dumps({k: data.get(k) for k in FINGERPRINT_FIELDS}, sort_keys=True, default=str))
+        for data in storage.findings.stream(fields=FINGERPRINT_FIELDS, risk_levels=REPORT_RISK_LEVELS)
+    )
+    for doc_id, data in rows:
+        digest.update(f"{doc_id}|{data}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+@dataclass
+class ReportJob:
+    id: str
+    fingerprint: str
+    username: str
+    status: str = "queued"  # queued | running | done | error
+    cached: bool = False
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+    future: Optional[Future] = field(default=None, repr=False)
+
+    @property
+    def path(self) -> str:
+        return os.path.join(REPORTS_DIR, f"{self.fingerprint}.pdf")
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "cached": self.cached,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class ReportJobManager:
+    """
+    Cola de reportes PDF. Cada trabajo lee los hallazgos en un hilo y renderiza
+    en un pool de procesos. Los PDF terminados se guardan en disco con su huella
+    como nombre: si los datos no cambiaron, el reporte se sirve sin renderizar.
+    """
+
+    def __init__(self, io_workers: int = 2, render_workers: int = 2):
+        self._io = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="report")
+        self._render_workers = render_workers
+        self._render = None
+        self._jobs: "OrderedDict[str, ReportJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _render_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._render is None:
+                self._render = ProcessPoolExecutor(
+                    max_workers=self._render_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._render
+
+    def submit(self, storage, username: str) -> ReportJob:
+        """Crea un trabajo. Bloqueante (lee la proyección): llamar fuera del event loop."""
+        fingerprint = report_fingerprint(storage, username)
+        job = ReportJob(id=uuid.uuid4().hex, fingerprint=fingerprint, username=username)
+
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > MAX_TRACKED_JOBS:
+                self._jobs.popitem(last=False)
+
+        if os.path.exists(job.path):
+            # Mismos datos que un reporte anterior: cero lecturas de contenido, cero render
+            os.utime(job.path)
+            job.status, job.cached, job.finished_at = "done", True, datetime.utcnow()
+            done = Future()
+            done.set_result(job.path)
+            job.future = done
+        else:
+            job.future = self._io.submit(self._run, storage, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[ReportJob]:
+        return self._jobs.get(job_id)
+
+    def _run(self, storage, job: ReportJob) -> str:
+        job.status = "running"
+        try:
+            items = list(storage.findings.stream(fields=["title", "risk_level", "content"],
+                                                 risk_levels=REPORT_RISK_LEVELS))
+            pdf_bytes = self._render_pool().submit(render_findings_pdf, items, job.username).result()
+
+            os.makedirs(REPORTS_DIR, exist_ok=True)
+            tmp_path = f"{job.path}.{job.id}.tmp"
+            with open(tmp_path, "wb") as fh:
+                fh.write(pdf_bytes)
+            os.replace(tmp_path, job.path)
+            self._prune_cache()
+
+            job.status = "done"
+            return job.path
+        except Exception as e:
+            print(f"❌ Error PDF (job {job.id}): {e}")
+            job.status, job.error = "error", str(e)
+            raise
+        finally:
+            job.finished_at = datetime.utcnow()
+
+    def _prune_cache(self):
+        files = [os.path.join(REPORTS_DIR, f) for f in os.listdir(REPORTS_DIR) if f.endswith(".pdf")]
+        files.sort(key=os.path.getmtime, reverse=True)
+        for path in files[MAX_CACHED_REPORTS:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+report_jobs = ReportJobManager()
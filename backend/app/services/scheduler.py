@@ -1,76 +1,141 @@
 from apscheduler.schedulers.background import BackgroundScheduler
-from app.core.database import get_db
+from typing import List, Optional
+from app.core.metrics import registry
+from app.core.storage import get_storage
 from app.models.source import Source
-from app.scrapers.rss_scraper import RSSScraper
-from app.services.analyzer import Analyzer
+from app.services.clustering import ClusterIndex
+from app.services.ingestion import IngestionEngine, SourceResult, print_cycle_report
+from app.services.identity import SeenIndex, finding_id
+from app.services.persistence import FindingWriter, queue_finding
+from app.services.polling import TICK_SECONDS, AdaptivePoller
+from app.services.backfill import backfill_published_dates
+from app.services.stats import reconcile_stats
 import datetime
+import time
 
 scheduler = BackgroundScheduler()
+# Se crea en start_scheduler(): el constructor no debe tocar el almacenamiento al importar
+poller: Optional[AdaptivePoller] = None
 
-def run_ingestion_cycle():
-    """
-    Esta función es la que se ejecuta automáticamente.
-    Recorre todas las fuentes activas y busca información nueva.
-    """
-    print(f"\n⏰ [Scheduler] Iniciando ciclo de ingestión: {datetime.datetime.now()}")
-    
-    db = get_db()
-    docs = db.collection('sources').stream()
-    
+cycle_seconds = registry.histogram("sentinel_ingestion_cycle_seconds", "Duración del ciclo de ingestión completo")
+persist_seconds = registry.histogram("sentinel_ingestion_persist_seconds", "Escritura de los hallazgos del ciclo")
+persisted_total = registry.counter(
+    "sentinel_ingestion_persisted_total", "Hallazgos enviados al almacenamiento por resultado", ["result"])
+last_cycle_timestamp = registry.gauge(
+    "sentinel_ingestion_last_cycle_timestamp_seconds", "Fin del último ciclo (epoch)")
+
+def load_active_sources(storage) -> List[Source]:
     sources = []
-    for doc in docs:
-        data = doc.to_dict()
-        data['id'] = doc.id
+    for data in storage.sources.list():
         try:
-            sources.append(Source(**data))
+            source = Source(**data)
         except Exception as e:
-            print(f"⚠️ Error cargando fuente {doc.id}: {e}")
+            print(f"⚠️ Error cargando fuente {data.get('id')}: {e}")
+            continue
+        if source.status == "active":
+            sources.append(source)
+    return sources
+
+def save_validators(storage, result: SourceResult):
+    storage.sources.update(result.source.id, result.validators)
+    # La fuente en memoria queda al día para el planificador, que la reutiliza entre ciclos
+    for key, value in result.validators.items():
+        setattr(result.source, key, value)
+
+def persist_results(storage, seen: SeenIndex, results: List[SourceResult],
+                    clusters: Optional[ClusterIndex] = None) -> FindingWriter:
+    """Guarda los hallazgos del ciclo en lotes y actualiza los validadores de cada fuente."""
+    writer = FindingWriter(storage)
+    grown = clusters.take_touched() if clusters is not None else {}
+
+    for result in results:
+        if result.status in ("not_modified", "unchanged"):
+            # Feed sin cambios: solo refrescamos los validadores si el servidor los cambió
+            if result.validators and (result.validators.get("etag") != result.source.etag
+                                      or result.validators.get("last_modified") != result.source.last_modified):
+                save_validators(storage, result)
+            continue
+        if result.status != "ok":
+            print(f"   ❌ Error en fuente {result.source.name}: {result.error}")
+            # Los items ya reservados (p. ej. falló el análisis) se reintentan en el próximo ciclo
+            seen.release(finding_id(item.url, item.title, item.source_id) for item in result.findings)
+            continue
+
+        for item, analysis in zip(result.findings, result.analyses):
+            if clusters is not None and item.cluster_id == finding_id(item.url, item.title, item.source_id):
+                grown.pop(item.cluster_id, None)
+                item.cluster_size = clusters.size(item.cluster_id)
+            queue_finding(writer, seen, item, analysis)
+
+        print(f"   ✅ {result.source.name}: {len(result.findings)} items en cola de escritura.")
+
+    # Grupos de ciclos anteriores que han crecido: solo cambia el tamaño guardado en la cabeza
+    for cluster_id, size in grown.items():
+        if cluster_id in seen:
+            writer.set(cluster_id, {"cluster_size": size})
+
+    writer.flush()
+    seen.commit(exclude=writer.failed_ids)
+    if clusters is not None:
+        clusters.save()
+    print(writer.summary())
+
+    # Validadores guardados solo después de escribir: si algo falla, el próximo ciclo reintenta
+    if not writer.failed:
+        for result in results:
+            if result.status == "ok" and result.validators:
+                save_validators(storage, result)
+    return writer
+
+def run_ingestion_cycle(storage=None, engine: IngestionEngine = None,
+                        sources: Optional[List[Source]] = None, seen: Optional[SeenIndex] = None):
+    """
+    Descarga las fuentes en paralelo (IngestionEngine) y guarda lo nuevo.
+    Sin `sources` procesa todas las activas; el planificador adaptativo pasa
+    solo las que toca consultar y reutiliza su índice `seen`.
+    """
+    print(f"\n⏰ [Scheduler] Iniciando ciclo de ingestión: {datetime.datetime.now()}")
+    cycle_start = time.perf_counter()
+
+    storage = storage or get_storage()
+    if sources is None:
+        sources = load_active_sources(storage)
 
     if not sources:
         print("📭 No hay fuentes configuradas para procesar.")
-        return
-
-    findings_collection = db.collection('findings')
-    
-    for source in sources:
-        print(f"🔍 Procesando: {source.name} ({source.type})...")
-        
-        # Selección de Scraper según el tipo
-        scraper = None
-        if source.type == 'rss':
-            scraper = RSSScraper(source)
-        
-        if not scraper:
-            continue
-            
-        try:
-            new_findings = scraper.scrape()
-            
-            count = 0
-            for item in new_findings:
-                # Análisis de IA
-                analysis = Analyzer.analyze_text(item.title + " " + item.content)
-                item.sentiment = analysis['sentiment']
-                
-                doc_data = item.model_dump()
-                doc_data['risk_level'] = analysis['risk_level']
-                
-                safe_id = "".join(x for x in item.title if x.isalnum())[:30]
-                
-                # .set(merge=True) actualiza si existe, crea si no
-                findings_collection.document(safe_id).set(doc_data, merge=True)
-                count += 1
-                
-            print(f"   ✅ {count} items procesados/actualizados.")
-            
-        except Exception as e:
-            print(f"   ❌ Error en fuente {source.name}: {e}")
+        return []
+
+    if seen is None:
+        seen = SeenIndex.load(storage)
+    engine = engine or IngestionEngine()
+    engine.seen_index = seen
+    if engine.cluster_index is None:
+        # Se conserva en el motor: el planificador lo reutiliza entre ciclos
+        engine.cluster_index = ClusterIndex.load(storage)
+    results = engine.run_sync(sources)
+
+    with persist_seconds.time():
+        writer = persist_results(storage, seen, results, clusters=engine.cluster_index)
+    persisted_total.inc(writer.written, result="written")
+    persisted_total.inc(writer.failed, result="failed")
 
+    wall_ms = (time.perf_counter() - cycle_start) * 1000
+    cycle_seconds.observe(wall_ms / 1000)
+    last_cycle_timestamp.set(time.time())
+    print_cycle_report(results, wall_ms)
     print("💤 Ciclo terminado. Esperando siguiente ejecución...\n")
+    return results
 
 def start_scheduler():
-    # Agregamos la tarea para que corra cada 10 minutos
-    # se puede cambiar 
-    scheduler.add_job(run_ingestion_cycle, 'interval', minutes=10)
+    global poller
+    # Cada fuente tiene su propio intervalo (services/polling.py). El tick solo despacha
+    # las vencidas; max_instances=1 evita que dos ticks se solapen si un ciclo se alarga
+    poller = AdaptivePoller(get_storage(), run_cycle=run_ingestion_cycle, load_sources=load_active_sources)
+    scheduler.add_job(poller.tick, 'interval', seconds=TICK_SECONDS, max_instances=1, coalesce=True,
+                      next_run_time=datetime.datetime.now())
+    # Reconciliación diaria de los contadores del dashboard
+    scheduler.add_job(lambda: reconcile_stats(get_storage()), 'interval', hours=24, max_instances=1)
+    # Una vez al arrancar: hallazgos antiguos sin published_date (o en texto) vuelven a la lista
+    scheduler.add_job(lambda: backfill_published_dates(get_storage()), next_run_time=datetime.datetime.now())
     scheduler.start()
-    print("🚀 Scheduler iniciado en segundo plano.")
\ No newline at end of file
+    print("🚀 Scheduler iniciado en segundo plano.")
@@ -0,0 +1,294 @@
+"""
+Índice de texto completo sobre título y contenido de los hallazgos.
+
+SQLite FTS5 en un fichero local (data/search.db), independiente del backend
+de almacenamiento. Se mantiene al día con las escrituras de este proceso
+(IndexedStorage) y con una sincronización periódica desde el almacenamiento
+para lo que escriben otros procesos (workers, run_scanner).
+"""
+import base64
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.metrics import registry
+from app.core.storage.base import date_key
+from app.core.storage.sqlite_backend import SQLiteDatabase
+from app.services.identity import DATA_DIR
+
+SEARCH_DB_PATH = os.path.join(DATA_DIR, "search.db")
+SEARCH_ENABLED = os.getenv("SENTINEL_SEARCH_INDEX", "1") != "0"
+# Lo que escriben otros procesos (workers) llega al índice en la siguiente sincronización
+SYNC_INTERVAL_SECONDS = int(os.getenv("SENTINEL_SEARCH_SYNC_MINUTES", "30")) * 60
+MAX_SEARCH_PAGE = 100
+SNIPPET_TOKENS = 24
+# Peso de cada columna en el ranking BM25 (title, content)
+TITLE_WEIGHT, CONTENT_WEIGHT = 5.0, 1.0
+INDEXED_FIELDS = ["title", "content", "risk_level", "status", "source_id", "published_date", "content_hash"]
+# Recorrido ligero de sync(): todo lo indexado menos el texto
+META_FIELDS = [f for f in INDEXED_FIELDS if f not in ("title", "content")]
+# Hasta cuántos documentos con texto nuevo se leen uno a uno; por encima, un recorrido completo
+MAX_POINT_READS = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    rowid INTEGER PRIMARY KEY,
+    finding_id TEXT UNIQUE NOT NULL,
+    risk_level TEXT,
+    status TEXT,
+    source_id TEXT,
+    published_date TEXT,
+    content_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS docs_risk ON docs(risk_level, published_date);
+CREATE INDEX IF NOT EXISTS docs_date ON docs(published_date);
+CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(
+    title, content, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4'
+);
+"""
+
+search_seconds = registry.histogram("sentinel_search_seconds", "Latencia de las búsquedas de texto")
+indexed_docs = registry.gauge("sentinel_search_indexed_docs", "Hallazgos en el índice de búsqueda")
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def build_match(query: str) -> Optional[str]:
+    """
+    Convierte el texto del usuario en una consulta FTS5 segura: cada palabra
+    entre comillas (sin operadores inyectados) y la última como prefijo,
+    para que funcione mientras se escribe. Todas las palabras son obligatorias.
+    """
+    tokens = _TOKEN.findall(query or "")
+    if not tokens:
+        return None
+    terms = [f'"{t}"' for t in tokens]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def encode_search_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"o": offset}).encode("utf-8")).decode("ascii")
+
+
+def decode_search_cursor(cursor: str) -> int:
+    try:
+        offset = int(json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))["o"])
+    except Exception as e:
+        raise ValueError(f"Cursor inválido: {e}")
+    if offset < 0:
+        raise ValueError("Cursor inválido: offset negativo")
+    return offset
+
+
+class SearchIndex:
+    def __init__(self, path: str = SEARCH_DB_PATH):
+        self.db = SQLiteDatabase(path, schema=SCHEMA)
+        self.last_sync: Optional[float] = None
+
+    # --- Escritura ---
+    def _upsert(self, conn, finding_id: str, data: Dict):
+        """Fusiona con lo indexado: una escritura parcial (merge) no borra campos."""
+        row = conn.execute("SELECT rowid FROM docs WHERE finding_id = ?", (finding_id,)).fetchone()
+        published = data.get("published_date")
+        values = (data.get("risk_level"), data.get("status"), data.get("source_id"),
+                  date_key(published) if published is not None else None, data.get("content_hash"))
+        if row is None:
+            cursor = conn.execute(
+                "INSERT INTO docs (finding_id, risk_level, status, source_id, published_date, content_hash) "
+                "VALUES (?, ?, ?, ?, ?, ?)", (finding_id, *values))
+            conn.execute("INSERT INTO docs_fts (rowid, title, content) VALUES (?, ?, ?)",
+                         (cursor.lastrowid, data.get("title") or "", data.get("content") or ""))
+            return
+        rowid = row[0]
+        conn.execute(
+            "UPDATE docs SET risk_level = COALESCE(?, risk_level), status = COALESCE(?, status), "
+            "source_id = COALESCE(?, source_id), published_date = COALESCE(?, published_date), "
+            "content_hash = COALESCE(?, content_hash) WHERE rowid = ?", (*values, rowid))
+        if "title" in data or "content" in data:
+            current = conn.execute("SELECT title, content FROM docs_fts WHERE rowid = ?", (rowid,)).fetchone()
+            title = data.get("title", current[0] if current else "") or ""
+            content = data.get("content", current[1] if current else "") or ""
+            conn.execute("DELETE FROM docs_fts WHERE rowid = ?", (rowid,))
+            conn.execute("INSERT INTO docs_fts (rowid, title, content) VALUES (?, ?, ?)", (rowid, title, content))
+
+    def _remove(self, conn, finding_id: str):
+        row = conn.execute("SELECT rowid FROM docs WHERE finding_id = ?", (finding_id,)).fetchone()
+        if row is not None:
+            conn.execute("DELETE FROM docs_fts WHERE rowid = ?", (row[0],))
+            conn.execute("DELETE FROM docs WHERE rowid = ?", (row[0],))
+
+    def upsert_many(self, docs: Iterable[Tuple[str, Dict]]):
+        with self.db.transaction() as conn:
+            for finding_id, data in docs:
+                self._upsert(conn, finding_id, data)
+
+    def upsert(self, finding_id: str, data: Dict):
+        self.upsert_many([(finding_id, data)])
+
+    def remove_many(self, finding_ids: Iterable[str]):
+        with self.db.transaction() as conn:
+            for finding_id in finding_ids:
+                self._remove(conn, finding_id)
+
+    def remove(self, finding_id: str):
+        self.remove_many([finding_id])
+
+    def count(self) -> int:
+        return self.db.query("SELECT COUNT(*) FROM docs")[0][0]
+
+    # --- Consulta ---
+    def search(self, query: str, filters=None, limit: int = 20, offset: int = 0) -> Tuple[List[Dict], int]:
+        """Resultados ordenados por relevancia (BM25) y el total de coincidencias."""
+        match = build_match(query)
+        if match is None:
+            return [], 0
+        limit = max(1, min(limit, MAX_SEARCH_PAGE))
+
+        where, params = [], []
+        if filters is not None:
+            for field in ("risk_level", "status", "source_id"):
+                value = getattr(filters, field, None)
+                if value:
+                    where.append(f"d.{field} = ?")
+                    params.append(value)
+            if getattr(filters, "date_from", None):
+                where.append("d.published_date >= ?")
+                params.append(date_key(filters.date_from))
+            if getattr(filters, "date_to", None):
+                where.append("d.published_date <= ?")
+                params.append(date_key(filters.date_to))
+        clause = ("WHERE " + " AND ".join(where)) if where else ""
+        # Primero las coincidencias del índice invertido (materializadas) y después los
+        # filtros: si no, SQLite puede recorrer `docs` y consultar FTS fila a fila
+        matched = (f"WITH m AS MATERIALIZED (SELECT rowid, bm25(docs_fts, {TITLE_WEIGHT}, {CONTENT_WEIGHT}) AS score "
+                   f"FROM docs_fts WHERE docs_fts MATCH ?) ")
+
+        with search_seconds.time():
+            total = self.db.query(f"{matched}SELECT COUNT(*) FROM m JOIN docs d ON d.rowid = m.rowid {clause}",
+                                  (match, *params))[0][0]
+            rows = self.db.query(
+                f"{matched}SELECT m.rowid, d.finding_id, d.risk_level, d.status, d.source_id, d.published_date, "
+                f"m.score FROM m JOIN docs d ON d.rowid = m.rowid {clause} "
+                f"ORDER BY m.score, d.published_date DESC LIMIT ? OFFSET ?",
+                (match, *params, limit, offset))
+            # Título y fragmento solo para la página devuelta
+            snippets = {}
+            if rows:
+                placeholders = ",".join("?" * len(rows))
+                snippets = {r[0]: (r[1], r[2]) for r in self.db.query(
+                    f"SELECT rowid, title, snippet(docs_fts, 1, '[', ']', '…', {SNIPPET_TOKENS}) "
+                    f"FROM docs_fts WHERE docs_fts MATCH ? AND rowid IN ({placeholders})",
+                    (match, *(r[0] for r in rows)))}
+
+        items = [{
+            "id": r[1], "title": snippets.get(r[0], ("", ""))[0], "snippet": snippets.get(r[0], ("", ""))[1],
+            "risk_level": r[2], "status": r[3], "source_id": r[4], "published_date": r[5],
+            # bm25() devuelve valores negativos: más negativo = más relevante
+            "score": round(-r[6], 4),
+        } for r in rows]
+        return items, total
+
+    # --- Sincronización con el almacenamiento ---
+    def sync(self, storage, batch_size: int = 500) -> Dict[str, int]:
+        """
+        Pone el índice al día con el almacenamiento en dos pasos: primero un
+        recorrido ligero sin título ni contenido (en la API lo sirve la caché
+        de hallazgos) para saber qué cambió (content_hash, riesgo o estado) y
+        qué se borró; después se leen título y contenido solo de los nuevos o
+        con otro content_hash. Un cambio de riesgo/estado no relee el texto.
+        """
+        known = {r[0]: (r[1], r[2], r[3]) for r in self.db.query(
+            "SELECT finding_id, content_hash, risk_level, status FROM docs")}
+
+        changed, present, batch, need_text = 0, set(), [], []
+        for data in storage.findings.stream(fields=META_FIELDS):
+            doc_id = data.pop("id")
+            present.add(doc_id)
+            current = known.get(doc_id)
+            signature = (data.get("content_hash"), data.get("risk_level"), data.get("status"))
+            if current == signature:
+                continue
+            if current is None or current[0] != signature[0]:
+                need_text.append(doc_id)
+                continue
+            # Mismo texto: solo cambian los metadatos (el FTS se conserva)
+            batch.append((doc_id, data))
+            if len(batch) >= batch_size:
+                self.upsert_many(batch)
+                changed += len(batch)
+                batch = []
+        if batch:
+            self.upsert_many(batch)
+            changed += len(batch)
+        changed += self._index_text(storage, need_text, batch_size)
+
+        removed = [doc_id for doc_id in known if doc_id not in present]
+        self.remove_many(removed)
+
+        self.last_sync = time.time()
+        indexed_docs.set(self.count())
+        print(f"🔎 Índice de búsqueda sincronizado: {changed} actualizados "
+              f"({len(need_text)} con texto), {len(removed)} eliminados.")
+        return {"updated": changed, "removed": len(removed)}
+
+    def _index_text(self, storage, doc_ids: List[str], batch_size: int) -> int:
+        """Indexa documentos completos. Pocos: lectura por ID; muchos (reconstrucción): un recorrido."""
+        if not doc_ids:
+            return 0
+        if len(doc_ids) > MAX_POINT_READS:
+            wanted = set(doc_ids)
+            docs = (d for d in storage.findings.stream(fields=INDEXED_FIELDS) if d["id"] in wanted)
+        else:
+            docs = (d for d in map(storage.findings.get, doc_ids) if d is not None)
+
+        indexed, batch = 0, []
+        for data in docs:
+            doc_id = data.pop("id")
+            batch.append((doc_id, {f: data.get(f) for f in INDEXED_FIELDS if f in data}))
+            if len(batch) >= batch_size:
+                self.upsert_many(batch)
+                indexed += len(batch)
+                batch = []
+        if batch:
+            self.upsert_many(batch)
+            indexed += len(batch)
+        return indexed
+
+
+_index: Optional[SearchIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_search_index() -> Optional[SearchIndex]:
+    """Índice compartido del proceso, o None si está desactivado (SENTINEL_SEARCH_INDEX=0)."""
+    global _index
+    if not SEARCH_ENABLED:
+        return None
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SearchIndex()
+    return _index
+
+
+def start_background_sync(get_storage, interval: float = SYNC_INTERVAL_SECONDS) -> Optional[threading.Thread]:
+    """Sincroniza al arrancar (reconstruye si el índice está vacío) y luego cada `interval` segundos."""
+    index = get_search_index()
+    if index is None:
+        return None
+
+    def loop():
+        while True:
+            try:
+                index.sync(get_storage())
+            except Exception as e:
+                print(f"⚠️ Error sincronizando el índice de búsqueda: {e}")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, name="search-sync", daemon=True)
+    thread.start()
+    return thread
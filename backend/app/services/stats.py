@@ -0,0 +1,92 @@
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Optional
+
+# Contadores materializados del dashboard: /admin/stats los lee en una sola lectura.
+# Cada backend de almacenamiento los guarda y aplica los deltas junto a sus escrituras.
+
+RISK_LEVELS = ["critical", "high", "medium", "low"]
+COUNTED_FIELDS = ("risk_level", "status", "source_id")
+DEFAULTS = {"risk_level": "low", "status": "new", "source_id": "unknown"}
+
+
+def _key(value) -> str:
+    # Los puntos y barras no son válidos dentro de un nombre de campo anidado
+    return str(value).replace(".", "_").replace("/", "_")
+
+
+def counter_delta(old: Optional[Dict], new: Optional[Dict]) -> Dict[str, int]:
+    """
+    Variación de los contadores entre el estado anterior y el nuevo de un hallazgo.
+    None = el documento no existe (alta o baja). En una actualización solo se
+    comparan los campos presentes, p. ej. old={"status": "new"}, new={"status": "closed"}.
+    """
+    delta = Counter()
+    for doc, sign in ((old, -1), (new, 1)):
+        if doc is None:
+            continue
+        delta["total"] += sign
+        for field in COUNTED_FIELDS:
+            if field in doc:
+                delta[f"{field}.{_key(doc[field] or DEFAULTS[field])}"] += sign
+    return {k: v for k, v in delta.items() if v}
+
+
+def update_delta(old: Dict, changes: Dict) -> Dict[str, int]:
+    """Delta de una actualización parcial (solo los campos contados que cambian)."""
+    fields = [f for f in COUNTED_FIELDS if f in changes]
+    if not fields:
+        return {}
+    return counter_delta({f: old.get(f) for f in fields}, {f: changes[f] for f in fields})
+
+
+def merge_deltas(*deltas: Dict[str, int]) -> Dict[str, int]:
+    total = Counter()
+    for delta in deltas:
+        total.update(delta)
+    return {k: v for k, v in total.items() if v}
+
+
+def apply_to_snapshot(snapshot: Dict, delta: Dict[str, int]) -> Dict:
+    """Aplica un delta a un documento de contadores en memoria ({"total", "risk_level": {...}, ...})."""
+    for path, value in delta.items():
+        if "." in path:
+            group, key = path.split(".", 1)
+            bucket = snapshot.setdefault(group, {})
+            bucket[key] = bucket.get(key, 0) + value
+        else:
+            snapshot[path] = snapshot.get(path, 0) + value
+    snapshot["updated_at"] = datetime.utcnow()
+    return snapshot
+
+
+def reconcile_stats(storage) -> Dict:
+    """
+    Recalcula todos los contadores con un recorrido completo y sobrescribe el
+    documento. Corrige cualquier deriva (escrituras fallidas, datos antiguos).
+    """
+    counts = {"total": 0, "risk_level": Counter(), "status": Counter(), "source_id": Counter()}
+    for data in storage.findings.stream(fields=list(COUNTED_FIELDS)):
+        counts["total"] += 1
+        for field in COUNTED_FIELDS:
+            counts[field][_key(data.get(field) or DEFAULTS[field])] += 1
+
+    snapshot = {
+        "total": counts["total"],
+        "risk_level": dict(counts["risk_level"]),
+        "status": dict(counts["status"]),
+        "source_id": dict(counts["source_id"]),
+        "updated_at": datetime.utcnow(),
+        "reconciled_at": datetime.utcnow(),
+    }
+    storage.findings.set_stats(snapshot)
+    print(f"🧮 Contadores reconciliados: {counts['total']} hallazgos.")
+    return snapshot
+
+
+def get_stats(storage) -> Dict:
+    stats = storage.findings.get_stats()
+    if stats is None:
+        # Primera vez: se materializan los contadores a partir de la colección
+        return reconcile_stats(storage)
+    return stats
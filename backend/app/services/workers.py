@@ -0,0 +1,175 @@
+"""
+Ingestión repartida entre varios procesos (run_scanner.py --worker).
+
+Cada worker publica un latido (arrendamiento "worker:<id>" con caducidad).
+Las fuentes se reparten con hashing de rendezvous sobre los workers vivos:
+todos calculan el mismo reparto sin coordinarse, y cuando uno entra o muere
+solo se mueven las fuentes que le tocaban. Antes de consultar una fuente el
+worker toma su arrendamiento "source:<id>", así que durante un rebalanceo dos
+workers nunca procesan la misma fuente a la vez.
+"""
+import hashlib
+import os
+import re
+import socket
+import threading
+import time
+from typing import List, Optional, Set
+
+from app.models.source import Source
+from app.services.clustering import ClusterIndex
+from app.services.identity import DATA_DIR, SeenIndex
+from app.services.ingestion import IngestionEngine
+from app.services.polling import TICK_SECONDS, AdaptivePoller
+from app.services.scheduler import load_active_sources, run_ingestion_cycle
+
+WORKER_PREFIX = "worker:"
+SOURCE_PREFIX = "source:"
+HEARTBEAT_INTERVAL = 10.0
+# Sin latido durante este tiempo el worker se da por muerto y sus fuentes se reparten
+HEARTBEAT_TTL = 30.0
+# Cubre una consulta completa (timeout de la fuente + análisis + escritura)
+SOURCE_LEASE_TTL = 120.0
+# Cada worker solo ve sus fuentes: cada tanto incorpora al índice de grupos lo que guardan los demás
+CLUSTER_SYNC_INTERVAL = 300.0
+
+
+def default_worker_id() -> str:
+    return os.getenv("SENTINEL_WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+
+
+def rendezvous_owner(key: str, members: List[str]) -> Optional[str]:
+    """Worker con mayor peso hash(worker, key). Estable ante altas/bajas de otros workers."""
+    if not members:
+        return None
+    return max(members, key=lambda m: hashlib.sha256(f"{m}|{key}".encode("utf-8")).digest())
+
+
+class ShardedWorker:
+    def __init__(self, storage, worker_id: Optional[str] = None, engine: Optional[IngestionEngine] = None,
+                 heartbeat_interval: float = HEARTBEAT_INTERVAL, heartbeat_ttl: float = HEARTBEAT_TTL,
+                 lease_ttl: float = SOURCE_LEASE_TTL, tick_seconds: float = TICK_SECONDS):
+        self.storage = storage
+        self.worker_id = worker_id or default_worker_id()
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_ttl = heartbeat_ttl
+        self.lease_ttl = lease_ttl
+        self.tick_seconds = tick_seconds
+        self.owned: Set[str] = set()
+        # Recibidas de otro worker y aún sin precargar en el índice de vistos
+        self._cold: Set[str] = set()
+        self._stop = threading.Event()
+
+        # Índice de vistos propio: el fichero no se comparte entre procesos
+        safe_id = re.sub(r"[^A-Za-z0-9_.-]", "_", self.worker_id)
+        self.seen = SeenIndex.load(path=os.path.join(DATA_DIR, f"seen_index-{safe_id}.json"))
+        engine = engine or IngestionEngine()
+        engine.cluster_index = ClusterIndex.load(
+            storage, path=os.path.join(DATA_DIR, f"cluster_index-{safe_id}.json"))
+        self._clusters_synced = time.time()
+        self.poller = AdaptivePoller(
+            storage, run_cycle=run_ingestion_cycle, load_sources=self.owned_sources,
+            engine=engine, seen=self.seen, refresh_seconds=heartbeat_interval,
+            claim=self.claim, release=self.release, claim_retry=tick_seconds,
+        )
+
+    # --- Pertenencia ---
+    def heartbeat(self):
+        info = {"host": socket.gethostname(), "pid": os.getpid(), "sources": len(self.owned)}
+        if not self.storage.leases.acquire(WORKER_PREFIX + self.worker_id, self.worker_id,
+                                           self.heartbeat_ttl, info):
+            raise RuntimeError(f"Ya hay un worker vivo con id {self.worker_id}")
+
+    def members(self) -> List[str]:
+        return sorted(lease["owner"] for lease in self.storage.leases.live(WORKER_PREFIX))
+
+    def owned_sources(self, storage) -> List[Source]:
+        """Fuentes activas que le tocan a este worker según los miembros vivos."""
+        members = self.members()
+        if self.worker_id not in members:
+            # Latido caducado (pausa larga, GC...): volver a anunciarse antes de repartir
+            self.heartbeat()
+            members = self.members()
+
+        sources = [s for s in load_active_sources(storage)
+                   if rendezvous_owner(s.id, members) == self.worker_id]
+        current = {s.id for s in sources}
+        gained, lost = current - self.owned, self.owned - current
+        if gained or lost:
+            print(f"⚖️ [{self.worker_id}] {len(members)} workers | fuentes: {len(current)} "
+                  f"(+{len(gained)} / -{len(lost)})")
+        self._cold = (self._cold | gained) & current
+        self.owned = current
+        self._sync_clusters()
+        return sources
+
+    def _sync_clusters(self):
+        if time.time() - self._clusters_synced < CLUSTER_SYNC_INTERVAL:
+            return
+        self._clusters_synced = time.time()
+        try:
+            added = self.poller.engine.cluster_index.sync(self.storage)
+            if added:
+                print(f"   🧬 [{self.worker_id}] {added} hallazgos de otros workers en el índice de grupos")
+        except Exception as e:
+            print(f"⚠️ [{self.worker_id}] Error sincronizando el índice de grupos: {e}")
+
+    # --- Arrendamientos por fuente ---
+    def claim(self, sources: List[Source]) -> List[Source]:
+        # Reparto recalculado justo antes de consultar: si acaba de entrar otro worker,
+        # las fuentes que ya no nos tocan no se consultan aunque aún no hayamos refrescado
+        members = self.members()
+        claimed = []
+        for source in sources:
+            if rendezvous_owner(source.id, members) != self.worker_id:
+                continue
+            if not self.storage.leases.acquire(SOURCE_PREFIX + source.id, self.worker_id, self.lease_ttl):
+                continue
+            if source.id in self._cold:
+                # Con el arrendamiento tomado, el dueño anterior ya terminó de escribir:
+                # se precarga ahora para no tratar sus hallazgos como nuevos
+                loaded = self.seen.warm(self.storage, [source.id])
+                self._cold.discard(source.id)
+                print(f"   📥 {source.name}: {loaded} hallazgos precargados del dueño anterior")
+            claimed.append(source)
+        return claimed
+
+    def release(self, sources: List[Source]):
+        for source in sources:
+            try:
+                self.storage.leases.release(SOURCE_PREFIX + source.id, self.worker_id)
+            except Exception as e:
+                # Si no se libera, caduca sola en lease_ttl
+                print(f"⚠️ No se pudo liberar {source.id}: {e}")
+
+    # --- Bucle ---
+    def _heartbeat_loop(self):
+        # Hilo aparte: un ciclo largo no debe hacer caducar el latido
+        while not self._stop.wait(self.heartbeat_interval):
+            try:
+                self.heartbeat()
+            except Exception as e:
+                print(f"⚠️ [{self.worker_id}] Error en el latido: {e}")
+
+    def run(self):
+        self.heartbeat()
+        print(f"👷 Worker {self.worker_id} iniciado ({self.storage.name})")
+        threading.Thread(target=self._heartbeat_loop, daemon=True).start()
+        try:
+            while not self._stop.is_set():
+                self.poller.tick()
+                self._stop.wait(self.tick_seconds)
+        finally:
+            self.leave()
+
+    def stop(self):
+        self._stop.set()
+
+    def leave(self):
+        """Salida ordenada: el resto de workers recibe sus fuentes en su próximo refresco."""
+        self._stop.set()
+        try:
+            self.storage.leases.release(WORKER_PREFIX + self.worker_id, self.worker_id)
+        except Exception as e:
+            print(f"⚠️ [{self.worker_id}] No se pudo dar de baja: {e}")
+        print(f"👋 Worker {self.worker_id} detenido")
@@ -1,78 +1,263 @@
+import asyncio
 import logging
-import time
-import requests
 import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import httpx
 from dotenv import load_dotenv
 
 # Cargamos variables de entorno (.env)
 load_dotenv()
 
+CAPTCHA_API_URL = os.getenv("CAPTCHA_API_URL", "http://2captcha.com").rstrip("/")
+# Un token de reCAPTCHA caduca a los 120 s: se reutiliza con margen
+TOKEN_TTL = float(os.getenv("SENTINEL_CAPTCHA_TOKEN_TTL", "110"))
+
+DEMO_TOKEN = "SENTINEL_DEMO_BYPASS_TOKEN_OK"
+FALLBACK_TOKEN = "SENTINEL_FALLBACK_TOKEN"
+TIMEOUT_TOKEN = "SENTINEL_TIMEOUT_TOKEN"
+ERROR_TOKEN = "SENTINEL_ERROR_TOKEN"
+
+MAX_IDS_PER_POLL = 100      # la API admite hasta 100 ids por res.php?action=get&ids=
+NOT_READY = "CAPCHA_NOT_READY"
+NO_SLOT = "ERROR_NO_SLOT_AVAILABLE"
+
+
+class TokenCache:
+    """Tokens resueltos por (site_key, page_url) hasta que caducan. Compartida por todo el proceso."""
+
+    def __init__(self, ttl: float = TOKEN_TTL):
+        self.ttl = ttl
+        self._tokens: Dict[Tuple[str, str], Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str]) -> Optional[str]:
+        with self._lock:
+            entry = self._tokens.get(key)
+            if entry and entry[1] > time.monotonic():
+                return entry[0]
+            self._tokens.pop(key, None)
+            return None
+
+    def put(self, key: Tuple[str, str], token: str):
+        with self._lock:
+            self._tokens[key] = (token, time.monotonic() + self.ttl)
+
+    def invalidate(self, key: Tuple[str, str]):
+        with self._lock:
+            self._tokens.pop(key, None)
+
+
+token_cache = TokenCache()
+
+
+class AsyncCaptchaSolver:
+    """
+    Resolución concurrente de desafíos con un cliente HTTP compartido.
+
+    Cada solve() envía su desafío (in.php) y espera a un futuro; un único bucle
+    consulta todas las tareas pendientes a la vez (res.php?action=get&ids=...)
+    con espera creciente mientras ninguna está lista. Los tokens se guardan en
+    TokenCache y dos peticiones simultáneas del mismo (site_key, page_url)
+    comparten la misma tarea.
+
+    Uso:
+        async with AsyncCaptchaSolver() as solver:
+            tokens = await solver.solve_many([(site_key, url), ...])
+    """
+
+    def __init__(self, api_key: Optional[str] = None, base_url: str = CAPTCHA_API_URL,
+                 cache: TokenCache = token_cache, first_poll: float = 15.0, poll_interval: float = 5.0,
+                 max_poll_interval: float = 20.0, max_wait: float = 120.0, max_submits: int = 10):
+        self.api_key = api_key if api_key is not None else os.getenv("CAPTCHA_API_KEY", "")
+        self.base_url = base_url.rstrip("/")
+        self.cache = cache
+        self.first_poll = first_poll
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.max_wait = max_wait
+        self.logger = logging.getLogger("sentinel.captcha")
+
+        self.submitted = 0
+        self.polls = 0
+        self._client: Optional[httpx.AsyncClient] = None
+        self._submit_limit = asyncio.Semaphore(max_submits)
+        # task_id -> (futuro, clave, instante de envío)
+        self._pending: Dict[str, Tuple[asyncio.Future, Tuple[str, str], float]] = {}
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._poller: Optional[asyncio.Task] = None
+
+    @property
+    def simulated(self) -> bool:
+        return not self.api_key or "TU_API_KEY" in self.api_key
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        if self._poller is not None:
+            self._poller.cancel()
+            self._poller = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=10.0, limits=httpx.Limits(max_connections=20))
+        return self._client
+
+    # --- API pública ---
+    async def solve(self, site_key: str, page_url: str) -> str:
+        if self.simulated:
+            self.logger.warning("🛡️ Modo Simulación: API Key no configurada. Generando bypass de cortesía.")
+            return DEMO_TOKEN
+
+        key = (site_key, page_url)
+        token = self.cache.get(key)
+        if token:
+            self.logger.info("♻️ Token CAPTCHA reutilizado (aún no caduca).")
+            return token
+        if key in self._inflight:
+            return await asyncio.shield(self._inflight[key])
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            token = await self._submit_and_wait(key, future)
+        finally:
+            self._inflight.pop(key, None)
+            if not future.done():
+                future.cancel()
+        if not token.startswith("SENTINEL_"):
+            self.cache.put(key, token)
+        return token
+
+    async def solve_many(self, challenges: List[Tuple[str, str]]) -> List[str]:
+        return await asyncio.gather(*(self.solve(site_key, url) for site_key, url in challenges))
+
+    def invalidate(self, site_key: str, page_url: str):
+        """El sitio rechazó el token: la próxima vez se pide otro."""
+        self.cache.invalidate((site_key, page_url))
+
+    # --- Envío ---
+    async def _submit_and_wait(self, key: Tuple[str, str], future: asyncio.Future) -> str:
+        try:
+            task_id = await self._submit(*key)
+        except Exception as e:
+            self.logger.error(f"🔥 Error crítico en el módulo de Captcha: {e}")
+            task_id, error = None, ERROR_TOKEN
+        else:
+            error = FALLBACK_TOKEN
+        if task_id is None:
+            future.set_result(error)
+            return error
+
+        self._pending[task_id] = (future, key, time.monotonic())
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.create_task(self._poll_loop())
+        return await asyncio.shield(future)
+
+    async def _submit(self, site_key: str, page_url: str) -> Optional[str]:
+        payload = {"key": self.api_key, "method": "userrecaptcha", "googlekey": site_key,
+                   "pageurl": page_url, "json": 1}
+        delay = self.poll_interval
+        async with self._submit_limit:
+            for _ in range(5):
+                response = await self._http().post(f"{self.base_url}/in.php", data=payload)
+                result = response.json()
+                if result.get("status") == 1:
+                    self.submitted += 1
+                    self.logger.info(f"⏳ Tarea {result['request']} creada. Esperando resolución...")
+                    return str(result["request"])
+                if result.get("request") != NO_SLOT:
+                    self.logger.error(f"❌ Fallo al enviar a 2Captcha: {result.get('request')}")
+                    return None
+                # Proveedor saturado: reintento con espera creciente
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_poll_interval)
+        self.logger.error("❌ Fallo al enviar a 2Captcha: sin huecos disponibles")
+        return None
+
+    # --- Consulta por lotes ---
+    async def _poll_loop(self):
+        # Ninguna tarea está lista antes de first_poll: la primera consulta espera a esa altura
+        interval = self.poll_interval
+        await asyncio.sleep(self.first_poll)
+        while self._pending:
+            ready = 0
+            try:
+                ids = list(self._pending)
+                for start in range(0, len(ids), MAX_IDS_PER_POLL):
+                    ready += await self._poll_batch(ids[start:start + MAX_IDS_PER_POLL])
+            except Exception as e:
+                self.logger.warning(f"⚠️ Error consultando CAPTCHAs pendientes: {e}")
+            self._expire()
+            if not self._pending:
+                break
+            # Sin progreso (o con errores) se espacian las consultas; si se resolvió algo, ritmo normal
+            interval = self.poll_interval if ready else min(interval * 1.5, self.max_poll_interval)
+            await asyncio.sleep(interval)
+
+    async def _poll_batch(self, ids: List[str]) -> int:
+        params = {"key": self.api_key, "action": "get", "ids": ",".join(ids)}
+        response = await self._http().get(f"{self.base_url}/res.php", params=params)
+        self.polls += 1
+        body = response.text.strip()
+        # Una respuesta por id, separadas por "|" y en el mismo orden
+        answers = body.split("|")
+        if len(answers) != len(ids):
+            raise ValueError(f"Respuesta inesperada del proveedor: {body[:80]}")
+        ready = 0
+        for task_id, answer in zip(ids, answers):
+            if answer == NOT_READY:
+                continue
+            future, _, _ = self._pending.pop(task_id)
+            if answer.startswith("ERROR"):
+                self.logger.error(f"❌ Error en resolución: {answer}")
+                future.set_result(ERROR_TOKEN)
+            else:
+                self.logger.info("✅ CAPTCHA resuelto exitosamente por el proveedor.")
+                future.set_result(answer)
+                ready += 1
+        return ready
+
+    def _expire(self):
+        now = time.monotonic()
+        for task_id, (future, _, submitted) in list(self._pending.items()):
+            if now - submitted > self.max_wait:
+                del self._pending[task_id]
+                future.set_result(TIMEOUT_TOKEN)
+
+
 class CaptchaSolver:
     """
     Gestor Híbrido de resolución de desafíos CAPTCHA (ReCaptcha v2/v3, hCaptcha).
     Funciona con la API real de 2Captcha o en modo simulación si no hay credenciales.
+    Interfaz síncrona sobre AsyncCaptchaSolver (comparte su caché de tokens).
     """
 
     def __init__(self, provider="2captcha"):
         self.provider = provider
         self.api_key = os.getenv("CAPTCHA_API_KEY", "TU_API_KEY_REAL_AQUI")
         self.logger = logging.getLogger("sentinel.captcha")
-        self.base_url = "http://2captcha.com"
+        self.base_url = CAPTCHA_API_URL
 
     def solve(self, site_key, page_url):
         """
-        Flujo de trabajo: 
+        Flujo de trabajo:
         Detecta si existe una API Key válida. Si no, devuelve un token simulado.
         """
-        if not self.api_key or "TU_API_KEY" in self.api_key:
-            self.logger.warning("🛡️ Modo Simulación: API Key no configurada. Generando bypass de cortesía.")
-            return "SENTINEL_DEMO_BYPASS_TOKEN_OK"
-
-        try: 
-            payload = {
-                'key': self.api_key,
-                'method': 'userrecaptcha',
-                'googlekey': site_key,
-                'pageurl': page_url,
-                'json': 1
-            }
-            
-            self.logger.info(f"🚀 Enviando desafío a {self.provider}...")
-            response = requests.post(f"{self.base_url}/in.php", data=payload, timeout=10)
-            res_json = response.json()
-
-            if res_json.get("status") != 1:
-                error_msg = res_json.get("request")
-                self.logger.error(f"❌ Fallo al enviar a 2Captcha: {error_msg}")
-                return "SENTINEL_FALLBACK_TOKEN"
-            
-            request_id = res_json.get("request")
-            self.logger.info(f"⏳ Tarea {request_id} creada. Esperando resolución de un humano...")
-            
-            #  ESPERAR LA RESPUESTA 
-            for i in range(20): # Máximo 100 segundos (20 intentos * 5 seg)
-                time.sleep(5)
-                check_url = f"{self.base_url}/res.php?key={self.api_key}&action=get&id={request_id}&json=1"
-                
-                try:
-                    result = requests.get(check_url, timeout=5).json()
-                except Exception:
-                    continue
-
-                if result.get("status") == 1:
-                    token = result.get("request")
-                    self.logger.info("✅ CAPTCHA resuelto exitosamente por el proveedor.")
-                    return token
-                
-                if result.get("request") == "CAPCHA_NOT_READY":
-                    self.logger.info(f"  [ Intento {i+1} ] El CAPTCHA aún no está listo...")
-                    continue
-                else:
-                    self.logger.error(f"❌ Error en resolución: {result.get('request')}")
-                    break
-            
-            return "SENTINEL_TIMEOUT_TOKEN"
+        return self.solve_many([(site_key, page_url)])[0]
 
-        except Exception as e:
-            self.logger.error(f"🔥 Error crítico en el módulo de Captcha: {e}")
-            return "SENTINEL_ERROR_TOKEN"
\ No newline at end of file
+    def solve_many(self, challenges):
+        """Varios desafíos a la vez: se envían juntos y se consultan en un solo bucle."""
+        async def run():
+            async with AsyncCaptchaSolver(api_key=self.api_key, base_url=self.base_url) as solver:
+                return await solver.solve_many(challenges)
+        return asyncio.run(run())
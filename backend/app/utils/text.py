@@ -0,0 +1,38 @@
+import re
+import html
+
+def clean_text(text):
+    """
+    Limpia el texto para que sea 100% compatible con FPDF (Latin-1)
+    y elimina etiquetas HTML (divs, br, p).
+    """
+    if text is None:
+        return ""
+    
+    text = str(text)
+
+    # 1. ELIMINAR ETIQUETAS HTML
+    text = re.sub('<[^<]+?>', '', text)
+
+    # 2. LIMPIAR ENTIDADES HTML
+    text = html.unescape(text)
+
+    # 3. REEMPLAZAR CARACTERES RAROS
+    replacements = {
+        '\u2018': "'",  
+        '\u2019': "'",  
+        '\u201c': '"',  
+        '\u201d': '"',  
+        '\u2013': '-',  
+        '\u2014': '-', 
+        '…': '...'      
+    }
+    
+    for k, v in replacements.items():
+        text = text.replace(k, v)
+
+    # 4. LIMPIAR ESPACIOS EXTRA Y SALTOS DE LINEA
+    text = " ".join(text.split())
+
+    # 5. ENCODING FINAL PARA FPDF
+    return text.encode('latin-1', 'replace').decode('latin-1')
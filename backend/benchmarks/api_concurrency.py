@@ -0,0 +1,175 @@
+"""
+Latencia de la API bajo una exportación pesada.
+
+Arranca la API (uvicorn en un hilo) contra un SQLite temporal con N hallazgos
+y mide la latencia de peticiones ligeras (lista paginada, detalle, stats) con
+varios clientes concurrentes en dos fases: sola y mientras otros clientes
+descargan el CSV completo en bucle. Con el trabajo bloqueante fuera del event
+loop (core/executors.py) el p99 de la segunda fase debe quedar cerca del de
+la primera. Termina con código 1 si el p99 crece más de lo tolerado.
+
+La autenticación se sustituye por un usuario fijo (dependency_overrides).
+
+Uso (desde backend/):
+    python -m benchmarks.api_concurrency --findings 50000 --clients 16 --exports 2 --duration 15
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from benchmarks.ingestion_bench import summarize
+
+RISK_LEVELS = ["critical", "high", "medium", "low"]
+
+
+def seed_findings(storage, count: int, batch: int = 1000) -> List[str]:
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    ids = []
+    for start in range(0, count, batch):
+        docs = [{
+            "title": f"Synthetic finding {n}",
+            "content": "lorem ipsum " * 40,
+            "summary": "lorem ipsum " * 10,
+            "url": f"https://bench.local/{n}",
+            "risk_level": rng.choice(RISK_LEVELS),
+            "status": "new",
+            "source_id": f"bench-{n % 20}",
+            "sentiment": 0.0,
+            "published_date": now - timedelta(minutes=n),
+        } for n in range(start, min(start + batch, count))]
+        ids.extend(storage.findings.create_many(docs))
+    return ids
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_api(port: int):
+    import uvicorn
+    from app.auth import User, get_current_user
+    from app.main import app
+
+    app.dependency_overrides[get_current_user] = lambda: User(username="bench")
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def light_client(client, ids: List[str], deadline: float, latencies: List[float], errors: List[str]):
+    rng = random.Random()
+    while time.perf_counter() < deadline:
+        choice = rng.random()
+        if choice < 0.5:
+            url = "/api/v1/findings?limit=50"
+        elif choice < 0.9:
+            url = f"/api/v1/findings/{rng.choice(ids)}"
+        else:
+            url = "/api/v1/admin/stats"
+        t0 = time.perf_counter()
+        response = await client.get(url)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        if response.status_code != 200:
+            errors.append(f"{url}: {response.status_code}")
+
+
+async def export_client(client, deadline: float, exports: List[float]):
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        async with client.stream("GET", "/api/v1/export/csv") as response:
+            async for _ in response.aiter_bytes():
+                pass
+        exports.append((time.perf_counter() - t0) * 1000)
+
+
+async def run_phase(base_url: str, ids: List[str], clients: int, exports: int, duration: float) -> Dict:
+    import httpx
+
+    latencies: List[float] = []
+    errors: List[str] = []
+    export_times: List[float] = []
+    limits = httpx.Limits(max_connections=clients + exports + 4)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0, limits=limits) as client:
+        deadline = time.perf_counter() + duration
+        tasks = [light_client(client, ids, deadline, latencies, errors) for _ in range(clients)]
+        tasks += [export_client(client, deadline, export_times) for _ in range(exports)]
+        await asyncio.gather(*tasks)
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / duration, 1),
+        "latency_ms": summarize(latencies),
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "exports": len(export_times),
+        "export_ms": summarize(export_times),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="p99 de la API con y sin una exportación pesada en curso")
+    parser.add_argument("--findings", type=int, default=50000)
+    parser.add_argument("--clients", type=int, default=16, help="clientes con peticiones ligeras")
+    parser.add_argument("--exports", type=int, default=2, help="clientes descargando el CSV en bucle")
+    parser.add_argument("--duration", type=float, default=15.0, help="segundos por fase")
+    parser.add_argument("--max-ratio", type=float, default=2.0, help="p99 con exportación / p99 sin ella")
+    parser.add_argument("--slack-ms", type=float, default=10.0, help="margen absoluto para p99 muy bajos")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="sentinel-api-")
+    os.environ.update(SENTINEL_STORAGE="sqlite", SENTINEL_SQLITE_PATH=os.path.join(workdir, "api.db"),
+                      SENTINEL_DATA_DIR=workdir, SENTINEL_SEARCH_INDEX="0")
+
+    from app.core.storage import get_storage
+    print(f"🌱 Generando {args.findings} hallazgos en {workdir}...")
+    ids = seed_findings(get_storage(), args.findings)
+
+    port = free_port()
+    server = start_api(port)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        print(f"🧪 Fase 1: {args.clients} clientes, sin exportaciones ({args.duration:.0f} s)")
+        baseline = asyncio.run(run_phase(base_url, ids, args.clients, 0, args.duration))
+        print(f"🧪 Fase 2: {args.clients} clientes + {args.exports} exportaciones CSV en bucle")
+        loaded = asyncio.run(run_phase(base_url, ids, args.clients, args.exports, args.duration))
+    finally:
+        server.should_exit = True
+
+    for name, phase in (("sin exportación", baseline), ("con exportación", loaded)):
+        lat = phase["latency_ms"]
+        print(f"   {name:16} {phase['rps']:7.1f} req/s  p50={lat['p50']:7.1f}  p95={lat['p95']:7.1f}  "
+              f"p99={lat['p99']:7.1f}  max={lat['max']:7.1f} ms  errores={phase['errors']}")
+    if loaded["exports"]:
+        print(f"   📤 {loaded['exports']} CSV completos, p50 {loaded['export_ms']['p50'] / 1000:.1f} s")
+
+    failures = []
+    allowed = baseline["latency_ms"]["p99"] * args.max_ratio + args.slack_ms
+    if loaded["latency_ms"]["p99"] > allowed:
+        failures.append(f"p99 {loaded['latency_ms']['p99']:.1f} ms > {allowed:.1f} ms permitido")
+    if baseline["errors"] or loaded["errors"]:
+        failures.append(f"respuestas con error: {(baseline['error_samples'] + loaded['error_samples'])[:5]}")
+    if args.exports and not loaded["exports"]:
+        failures.append("ninguna exportación terminó durante la fase 2")
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        return 1
+    print("✅ La latencia de las peticiones ligeras se mantiene durante la exportación.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
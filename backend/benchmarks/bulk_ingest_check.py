@@ -0,0 +1,168 @@
+"""
+Comprobación de POST /api/v1/findings/bulk.
+
+Arranca la API (uvicorn en un hilo) contra un SQLite temporal y envía un
+cuerpo NDJSON comprimido con gzip generado al vuelo (el cliente tampoco lo
+tiene entero en memoria), con algunas líneas inválidas y otras repetidas.
+Comprueba que:
+
+  1. hay un resultado por línea, en orden, y los conteos cuadran
+     (creados / duplicados / inválidos) con lo guardado;
+  2. reenviar el mismo cuerpo no crea nada (todo duplicado);
+  3. la memoria no depende del tamaño del cuerpo: el reenvío recorre las
+     mismas líneas sin que crezcan los índices, así que el pico de memoria
+     del proceso no debe subir en esa pasada.
+
+La autenticación se sustituye por un usuario fijo (dependency_overrides).
+
+Uso (desde backend/):
+    python -m benchmarks.bulk_ingest_check --items 20000 --max-rss-mb 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Tuple
+
+from benchmarks.api_concurrency import free_port, start_api
+
+INVALID_EVERY = 997
+DUPLICATE_EVERY = 101
+# Vocabulario amplio: textos distintos entre sí, como los de colectores reales (no se agrupan)
+VOCABULARY = [f"{a}{b}" for a in ("cred", "leak", "dump", "host", "key", "mail", "vpn", "db", "repo", "bot")
+              for b in range(300)]
+
+
+def _text(item: int, words: int) -> str:
+    rng = random.Random(item)
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+
+def ndjson_lines(count: int) -> Iterator[bytes]:
+    """Hallazgos sintéticos: uno inválido cada INVALID_EVERY, una repetición cada DUPLICATE_EVERY."""
+    now = datetime.utcnow()
+    for n in range(count):
+        if n % INVALID_EVERY == INVALID_EVERY - 1:
+            yield b'{"title": "missing fields"}\n'
+            continue
+        item = n - 1 if n % DUPLICATE_EVERY == DUPLICATE_EVERY - 1 else n
+        yield (json.dumps({
+            "source_id": f"collector-{item % 5}",
+            "title": f"Paste {item}: {_text(-item - 1, 6)}",
+            "content": _text(item, 60),
+            "url": f"https://paste.bench/{item}",
+            "published_date": (now - timedelta(seconds=item)).isoformat(),
+        }) + "\n").encode("utf-8")
+
+
+def expected_counts(count: int) -> Dict[str, int]:
+    invalid = sum(1 for n in range(count) if n % INVALID_EVERY == INVALID_EVERY - 1)
+    # La repetición solo es duplicado si la línea anterior era válida
+    duplicate = sum(1 for n in range(count) if n % DUPLICATE_EVERY == DUPLICATE_EVERY - 1
+                    and n % INVALID_EVERY != INVALID_EVERY - 1 and (n - 1) % INVALID_EVERY != INVALID_EVERY - 1)
+    return {"invalid": invalid, "duplicate": duplicate, "created": count - invalid - duplicate}
+
+
+async def gzip_body(count: int, chunk_lines: int = 500):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    pending = []
+    for line in ndjson_lines(count):
+        pending.append(line)
+        if len(pending) >= chunk_lines:
+            yield compressor.compress(b"".join(pending))
+            pending = []
+    yield compressor.compress(b"".join(pending)) + compressor.flush()
+
+
+async def send(base_url: str, count: int) -> Tuple[List[Dict], float]:
+    import httpx
+
+    results = []
+    t0 = time.perf_counter()
+    async with httpx.AsyncClient(base_url=base_url, timeout=600.0) as client:
+        async with client.stream("POST", "/api/v1/findings/bulk", content=gzip_body(count),
+                                 headers={"Content-Type": "application/x-ndjson", "Content-Encoding": "gzip"}) as response:
+            if response.status_code != 200:
+                raise RuntimeError(f"HTTP {response.status_code}: {(await response.aread())[:200]}")
+            async for line in response.aiter_lines():
+                if line.strip():
+                    results.append(json.loads(line))
+    return results, time.perf_counter() - t0
+
+
+def max_rss_mb() -> float:
+    # ru_maxrss en KB (Linux)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Alta en bloque NDJSON/gzip contra la API con SQLite")
+    parser.add_argument("--items", type=int, default=20000, help="líneas del cuerpo")
+    parser.add_argument("--max-rss-mb", type=float, default=50.0, help="crecimiento máximo del pico de memoria en el reenvío")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="sentinel-bulk-")
+    os.environ.update(SENTINEL_STORAGE="sqlite", SENTINEL_SQLITE_PATH=os.path.join(workdir, "bulk.db"),
+                      SENTINEL_DATA_DIR=workdir, SENTINEL_SEARCH_INDEX="0")
+    from app.core.storage import get_storage
+    from app.core.storage.cached import uncached
+
+    port = free_port()
+    server = start_api(port)
+    base_url = f"http://127.0.0.1:{port}"
+    failures = []
+    rss_before = max_rss_mb()
+    try:
+        print(f"📦 Enviando {args.items} líneas NDJSON (gzip, en streaming)...")
+        results, elapsed = asyncio.run(send(base_url, args.items))
+        rss_first = max_rss_mb()
+        print("🔁 Reenviando el mismo cuerpo...")
+        again, _ = asyncio.run(send(base_url, args.items))
+        rss_growth = max_rss_mb() - rss_first
+    finally:
+        server.should_exit = True
+
+    lines = [r for r in results if "line" in r]
+    summary = next((r["summary"] for r in results if "summary" in r), {})
+    counts = Counter(r["status"] for r in lines)
+    expected = expected_counts(args.items)
+    stored = sum(1 for _ in uncached(get_storage()).findings.stream(fields=["content_hash"]))
+    print(f"   {len(lines)} resultados en {elapsed:.1f} s ({len(lines) / elapsed:.0f} líneas/s): {dict(counts)}")
+    print(f"   Guardados: {stored}  |  Pico de memoria: +{rss_first - rss_before:.0f} MB en la primera pasada "
+          f"(índices y almacenamiento incluidos)")
+
+    if [r["line"] for r in lines] != list(range(1, args.items + 1)):
+        failures.append("los resultados no cubren todas las líneas en orden")
+    for status, count in expected.items():
+        if counts[status] != count:
+            failures.append(f"{status}: {counts[status]} (esperados {count})")
+    if summary.get("lines") != args.items or summary.get("created") != counts["created"]:
+        failures.append(f"resumen incoherente: {summary}")
+    if stored != expected["created"]:
+        failures.append(f"{stored} hallazgos guardados (esperados {expected['created']})")
+
+    again_counts = Counter(r["status"] for r in again if "line" in r)
+    print(f"   Reenvío: {dict(again_counts)}  |  Pico de memoria: +{rss_growth:.0f} MB")
+    if again_counts["created"] or again_counts["updated"]:
+        failures.append(f"el reenvío escribió {again_counts['created'] + again_counts['updated']} hallazgos")
+    if rss_growth > args.max_rss_mb:
+        failures.append(f"el pico de memoria subió {rss_growth:.0f} MB en el reenvío (> {args.max_rss_mb:.0f} MB)")
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        return 1
+    print("✅ Resultados por línea, deduplicación y memoria acotada correctos.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
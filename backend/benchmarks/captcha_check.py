@@ -0,0 +1,101 @@
+"""
+Comprobación del resolvedor de CAPTCHA contra el proveedor falso (benchmarks/captcha_fake.py).
+
+  1. Concurrencia: N desafíos se envían a la vez y se resuelven en poco más
+     de lo que tarda uno; las consultas a res.php van por lotes (una por
+     ronda, no una por tarea).
+  2. Reutilización: volver a pedir el mismo (site_key, page_url) antes de que
+     caduque no crea otra tarea.
+  3. Deduplicación: peticiones simultáneas del mismo desafío comparten tarea.
+  4. Saturación: con pocos huecos en el proveedor, los envíos se reintentan
+     y todos terminan resueltos.
+
+Uso (desde backend/):
+    python -m benchmarks.captcha_check --challenges 50 --solve-seconds 1
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from benchmarks.captcha_fake import CaptchaFake
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Resolvedor de CAPTCHA contra un proveedor falso")
+    parser.add_argument("--challenges", type=int, default=50, help="desafíos distintos a la vez")
+    parser.add_argument("--solve-seconds", type=float, default=1.0, help="lo que tarda el proveedor en resolver")
+    args = parser.parse_args(argv)
+
+    from app.utils.captcha import AsyncCaptchaSolver, TokenCache
+
+    fake = CaptchaFake(solve_seconds=args.solve_seconds).start()
+    challenges = [(f"site-key-{n}", f"https://gate.example/{n}") for n in range(args.challenges)]
+    failures = []
+
+    def solver(cache: TokenCache, **kwargs) -> AsyncCaptchaSolver:
+        options = dict(first_poll=args.solve_seconds, poll_interval=0.2, max_poll_interval=1.0, max_wait=30)
+        options.update(kwargs)
+        return AsyncCaptchaSolver(api_key="fake-key", base_url=fake.url, cache=cache, **options)
+
+    cache = TokenCache(ttl=60)
+
+    # 1 y 2. Concurrencia y reutilización con la misma caché
+    async def solve_twice():
+        async with solver(cache) as s:
+            t0 = time.perf_counter()
+            first = await s.solve_many(challenges)
+            elapsed = time.perf_counter() - t0
+            submits, polls = fake.submits, fake.polls
+            second = await s.solve_many(challenges)
+            return first, second, elapsed, submits, polls
+
+    first, second, elapsed, submits, polls = asyncio.run(solve_twice())
+    print(f"🧩 {args.challenges} desafíos en {elapsed:.2f}s: {submits} envíos, {polls} consultas a res.php")
+    if any(t.startswith("SENTINEL_") for t in first):
+        failures.append(f"{sum(t.startswith('SENTINEL_') for t in first)} desafíos sin resolver")
+    if elapsed > args.solve_seconds * 3 + 1:
+        failures.append(f"resolución lenta: {elapsed:.2f}s para tareas de {args.solve_seconds}s")
+    if polls >= args.challenges:
+        failures.append(f"{polls} consultas para {args.challenges} tareas: no se agrupan")
+    print(f"♻️ Segunda pasada: {fake.submits - submits} envíos nuevos")
+    if fake.submits != submits or second != first:
+        failures.append("los tokens vigentes no se reutilizaron")
+
+    # 3. Deduplicación de peticiones simultáneas
+    async def duplicated():
+        async with solver(TokenCache(ttl=60)) as s:
+            return await s.solve_many([("site-key-dup", "https://gate.example/dup")] * 20)
+
+    before = fake.submits
+    tokens = asyncio.run(duplicated())
+    print(f"🔁 20 peticiones del mismo desafío: {fake.submits - before} envío(s)")
+    if fake.submits - before != 1 or len(set(tokens)) != 1:
+        failures.append(f"deduplicación: {fake.submits - before} envíos, {len(set(tokens))} tokens")
+    fake.stop()
+
+    # 4. Proveedor saturado
+    busy = CaptchaFake(solve_seconds=0.3, slots=5).start()
+
+    async def saturated():
+        async with AsyncCaptchaSolver(api_key="fake-key", base_url=busy.url, cache=TokenCache(ttl=60),
+                                      first_poll=0.3, poll_interval=0.2, max_poll_interval=0.5, max_wait=30) as s:
+            return await s.solve_many(challenges[:15])
+
+    tokens = asyncio.run(saturated())
+    print(f"🚦 15 desafíos con 5 huecos: {busy.rejected_submits} envíos rechazados, "
+          f"{sum(not t.startswith('SENTINEL_') for t in tokens)} resueltos")
+    if any(t.startswith("SENTINEL_") for t in tokens):
+        failures.append("con el proveedor saturado quedaron desafíos sin resolver")
+    busy.stop()
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        return 1
+    print("✅ Envío concurrente, consulta por lotes, reutilización y deduplicación correctos.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+Proveedor CAPTCHA falso (lo mínimo de la API de 2Captcha que usa utils/captcha.py):
+
+  POST /in.php                       crea una tarea -> {"status": 1, "request": "<id>"}
+  GET  /res.php?action=get&ids=a,b   respuestas separadas por "|" en el orden pedido
+                                      (CAPCHA_NOT_READY hasta que pasa `solve_seconds`)
+
+Con `slots` limitado, in.php responde ERROR_NO_SLOT_AVAILABLE mientras haya
+tantas tareas sin resolver. Cuenta las peticiones para comparar estrategias.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+NOT_READY = "CAPCHA_NOT_READY"
+
+
+class CaptchaFake:
+    def __init__(self, solve_seconds: float = 1.0, slots: Optional[int] = None):
+        self.solve_seconds = solve_seconds
+        self.slots = slots
+        self.submits = 0
+        self.rejected_submits = 0
+        self.polls = 0
+        self.polled_ids = 0
+        self._tasks: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._httpd: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address
+        return f"http://{host}:{port}"
+
+    def _create(self, params: Dict[str, str]) -> Dict:
+        with self._lock:
+            now = time.time()
+            busy = sum(1 for t in self._tasks.values() if t["ready_at"] > now)
+            if self.slots is not None and busy >= self.slots:
+                self.rejected_submits += 1
+                return {"status": 0, "request": "ERROR_NO_SLOT_AVAILABLE"}
+            self.submits += 1
+            task_id = str(1000 + len(self._tasks))
+            self._tasks[task_id] = {"ready_at": now + self.solve_seconds,
+                                    "token": f"03AG-{params.get('googlekey', '')}-{task_id}"}
+            return {"status": 1, "request": task_id}
+
+    def _answers(self, ids) -> str:
+        with self._lock:
+            self.polls += 1
+            self.polled_ids += len(ids)
+            now = time.time()
+            answers = []
+            for task_id in ids:
+                task = self._tasks.get(task_id)
+                if task is None:
+                    answers.append("ERROR_WRONG_CAPTCHA_ID")
+                elif task["ready_at"] > now:
+                    answers.append(NOT_READY)
+                else:
+                    answers.append(task["token"])
+            return "|".join(answers)
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send(self, body: str, content_type: str = "text/plain"):
+                payload = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                raw = self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode("utf-8")
+                params = {k: v[0] for k, v in parse_qs(raw).items()}
+                if urlparse(self.path).path != "/in.php":
+                    self._send("ERROR_PAGE_NOT_FOUND")
+                    return
+                self._send(json.dumps(fake._create(params)), "application/json")
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                if parsed.path != "/res.php" or params.get("action") != "get" or not params.get("ids"):
+                    self._send("ERROR_WRONG_REQUEST")
+                    return
+                self._send(fake._answers(params["ids"].split(",")))
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "CaptchaFake":
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
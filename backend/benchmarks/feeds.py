@@ -0,0 +1,225 @@
+"""
+Feeds RSS/Atom sintéticos y un servidor HTTP local que los sirve con latencia
+inyectada. Lo usan los benchmarks para no depender de fuentes reales.
+"""
+import hashlib
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from xml.sax.saxutils import escape
+
+WORDS = (
+    "network server patch update vendor report analyst campaign actor infrastructure "
+    "domain certificate firmware router cloud endpoint module library release advisory "
+    "incident response team customer service access account credential token session"
+).split()
+# Una parte de los items lleva palabras de urgencia para que el análisis haga todo su trabajo
+URGENT_WORDS = ["ransomware", "exploit", "zero-day", "breach", "hack", "ataque", "urgente"]
+# Fecha de publicación fija por item (no depende de cuándo se genera el feed):
+# los parsers con marca de agua comparan fechas entre consultas
+BASE_TIME = datetime.now(timezone.utc).replace(microsecond=0) - timedelta(days=1)
+
+
+def _sentence(rng: random.Random, length: int, urgent_ratio: float) -> str:
+    words = [rng.choice(WORDS) for _ in range(length)]
+    if rng.random() < urgent_ratio:
+        words[rng.randrange(length)] = rng.choice(URGENT_WORDS)
+    return " ".join(words).capitalize()
+
+
+def make_items(feed_index: int, count: int, seed: int = 0, urgent_ratio: float = 0.3,
+               content_words: int = 60, start: int = 0) -> List[Dict]:
+    """
+    Items deterministas para un feed (mismo seed e índice, mismo contenido).
+    `start` desplaza la ventana: simula un feed que publica items nuevos.
+    """
+    items = []
+    for i in range(start + count - 1, start - 1, -1):
+        rng = random.Random(f"{seed}-{feed_index}-{i}")
+        items.append({
+            "guid": f"bench-{seed}-{feed_index}-{i}",
+            "title": f"[{feed_index}:{i}] " + _sentence(rng, 8, urgent_ratio),
+            "summary": _sentence(rng, content_words, urgent_ratio),
+            "link": f"https://bench.local/{seed}/{feed_index}/{i}",
+            "published": BASE_TIME + timedelta(seconds=i),
+        })
+    return items
+
+
+def render_rss(items: List[Dict], title: str) -> bytes:
+    entries = "".join(
+        "<item>"
+        f"<title>{escape(it['title'])}</title>"
+        f"<link>{escape(it['link'])}</link>"
+        f"<guid>{escape(it['guid'])}</guid>"
+        f"<pubDate>{format_datetime(it['published'])}</pubDate>"
+        f"<description>{escape(it['summary'])}</description>"
+        "</item>"
+        for it in items
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<rss version="2.0"><channel><title>{escape(title)}</title>'
+        f"<link>https://bench.local/</link><description>Feed sintético</description>"
+        f"{entries}</channel></rss>"
+    ).encode("utf-8")
+
+
+def render_atom(items: List[Dict], title: str) -> bytes:
+    entries = "".join(
+        "<entry>"
+        f"<title>{escape(it['title'])}</title>"
+        f'<link href="{escape(it["link"])}"/>'
+        f"<id>{escape(it['guid'])}</id>"
+        f"<updated>{it['published'].isoformat()}</updated>"
+        f"<summary>{escape(it['summary'])}</summary>"
+        "</entry>"
+        for it in items
+    )
+    updated = items[0]["published"].isoformat() if items else datetime.now(timezone.utc).isoformat()
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<feed xmlns="http://www.w3.org/2005/Atom"><title>{escape(title)}</title>'
+        f"<id>https://bench.local/</id><updated>{updated}</updated>"
+        f"{entries}</feed>"
+    ).encode("utf-8")
+
+
+def build_feeds(count: int, items_per_feed: int, fmt: str = "mixed", seed: int = 0,
+                **item_options) -> Dict[str, bytes]:
+    """{ruta: cuerpo} para `count` feeds. fmt: rss | atom | mixed (alterna)."""
+    feeds = {}
+    for n in range(count):
+        items = make_items(n, items_per_feed, seed=seed, **item_options)
+        kind = fmt if fmt != "mixed" else ("rss" if n % 2 == 0 else "atom")
+        render = render_rss if kind == "rss" else render_atom
+        feeds[f"/feeds/{n}.xml"] = render(items, f"Bench feed {n}")
+    return feeds
+
+
+class FeedServer:
+    """
+    Servidor HTTP local con los feeds en memoria. Simula la latencia del origen
+    (base + jitter aleatorio) y responde 304 a If-None-Match, como un CDN real.
+    Puede escuchar en varias IPs de loopback para simular hosts distintos
+    (el motor aplica un límite de conexiones por host).
+    """
+
+    def __init__(self, feeds: Dict[str, bytes], latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 hosts: int = 1):
+        self.feeds = feeds
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.hosts = max(1, hosts)
+        self.requests = 0
+        # Por ruta: peticiones atendidas y máximo de peticiones simultáneas observado
+        self.hits: Dict[str, int] = {}
+        self.max_in_flight: Dict[str, int] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._etags = {path: self._etag(body) for path, body in feeds.items()}
+        self._servers: List[ThreadingHTTPServer] = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _etag(body: bytes) -> str:
+        return '"%s"' % hashlib.sha1(body).hexdigest()[:16]
+
+    def update(self, feeds: Dict[str, bytes]):
+        """Publica contenido nuevo (cambia también el ETag)."""
+        with self._lock:
+            for path, body in feeds.items():
+                self.feeds[path] = body
+                self._etags[path] = self._etag(body)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                path = self.path
+                with server._lock:
+                    server.requests += 1
+                    server.hits[path] = server.hits.get(path, 0) + 1
+                    server._in_flight[path] = server._in_flight.get(path, 0) + 1
+                    server.max_in_flight[path] = max(server.max_in_flight.get(path, 0), server._in_flight[path])
+                try:
+                    self._respond()
+                finally:
+                    with server._lock:
+                        server._in_flight[path] -= 1
+
+            def _respond(self):
+                delay = server.latency_ms + random.uniform(0, server.jitter_ms)
+                if delay:
+                    time.sleep(delay / 1000)
+
+                with server._lock:
+                    body = server.feeds.get(self.path)
+                    etag = server._etags.get(self.path)
+                if body is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/xml; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FeedServer":
+        handler = self._handler()
+        for n in range(self.hosts):
+            # Todo 127.0.0.0/8 es loopback en Linux: cada IP cuenta como un host distinto
+            httpd = ThreadingHTTPServer((f"127.0.0.{n + 1}", 0), handler)
+            httpd.daemon_threads = True
+            threading.Thread(target=httpd.serve_forever, daemon=True).start()
+            self._servers.append(httpd)
+        return self
+
+    def stop(self):
+        for httpd in self._servers:
+            httpd.shutdown()
+            httpd.server_close()
+        self._servers = []
+
+    def urls(self) -> List[str]:
+        """URL de cada feed, repartidas entre los hosts."""
+        urls = []
+        for n, path in enumerate(sorted(self.feeds, key=lambda p: int(p.rsplit("/", 1)[1].split(".")[0]))):
+            host, port = self._servers[n % len(self._servers)].server_address[:2]
+            urls.append(f"http://{host}:{port}{path}")
+        return urls
+
+    def __enter__(self) -> "FeedServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def feed_sources(urls: List[str], name_prefix: str = "bench", config: Optional[Dict] = None) -> List[Dict]:
+    """Documentos de fuente listos para storage.sources.add()."""
+    return [
+        {"url": url, "type": "rss", "name": f"{name_prefix}-{n}", "status": "active", "config": dict(config or {})}
+        for n, url in enumerate(urls)
+    ]
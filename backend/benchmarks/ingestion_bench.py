@@ -0,0 +1,274 @@
+"""
+Benchmark de extremo a extremo del ciclo de ingestión.
+
+Genera feeds RSS/Atom sintéticos, los sirve desde un servidor HTTP local con
+latencia inyectada y ejecuta run_ingestion_cycle() contra un almacenamiento
+local (memory o sqlite). Mide items/s, percentiles por etapa y RSS máximo, y
+guarda el resultado en JSON para comparar ejecuciones.
+
+Uso (desde backend/):
+    python -m benchmarks.ingestion_bench --feeds 200 --items 10 --latency-ms 80
+    python -m benchmarks.ingestion_bench --compare data/benchmarks/base.json --threshold 0.15
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from benchmarks.feeds import FeedServer, build_feeds, feed_sources
+
+RESULTS_DIR = os.path.join("data", "benchmarks")
+STAGES = ["fetch_ms", "parse_ms", "analyze_ms", "total_ms"]
+# Métrica -> True si "más alto es mejor"
+COMPARED_METRICS = {
+    "items_per_sec": True,
+    "cycle_ms": False,
+    "persist_ms": False,
+    "fetch_ms.p95": False,
+    "parse_ms.p95": False,
+    "analyze_ms.p95": False,
+    "total_ms.p95": False,
+    "peak_rss_mb": False,
+}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentil con interpolación lineal (como numpy.percentile por defecto)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        "p50": round(percentile(values, 50), 2),
+        "p95": round(percentile(values, 95), 2),
+        "p99": round(percentile(values, 99), 2),
+        "max": round(max(values), 2) if values else 0.0,
+    }
+
+
+def peak_rss_mb() -> Dict[str, float]:
+    # ru_maxrss: KB en Linux, bytes en macOS. Los hijos solo cuentan cuando terminan
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return {"self": round(own, 1), "children": round(children, 1)}
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def create_bench_storage(backend: str, workdir: str):
+    from app.core.storage import create_storage
+    if backend == "sqlite":
+        return create_storage("sqlite", path=os.path.join(workdir, "bench.db"))
+    return create_storage("memory")
+
+
+def run_cycle(storage, engine, quiet: bool) -> Dict:
+    """Un ciclo completo. El tiempo de persistencia se mide envolviendo persist_results."""
+    from app.services import scheduler
+
+    timings = {}
+    original = scheduler.persist_results
+
+    def timed_persist(*args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            timings["persist_ms"] = (time.perf_counter() - t0) * 1000
+
+    scheduler.persist_results = timed_persist
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output) if quiet else contextlib.nullcontext():
+            t0 = time.perf_counter()
+            results = scheduler.run_ingestion_cycle(storage=storage, engine=engine)
+            cycle_ms = (time.perf_counter() - t0) * 1000
+    finally:
+        scheduler.persist_results = original
+
+    ok = [r for r in results if r.status == "ok"]
+    items = sum(len(r.findings) for r in ok)
+    statuses: Dict[str, int] = {}
+    for r in results:
+        statuses[r.status] = statuses.get(r.status, 0) + 1
+
+    cycle = {
+        "cycle_ms": round(cycle_ms, 2),
+        "persist_ms": round(timings.get("persist_ms", 0.0), 2),
+        "items": items,
+        "items_per_sec": round(items / (cycle_ms / 1000), 2) if cycle_ms else 0.0,
+        "duplicates": sum(r.duplicates for r in results),
+        "bytes_downloaded": sum(r.bytes_downloaded for r in results),
+        "statuses": statuses,
+        "errors": sorted({r.error for r in results if r.error})[:5],
+    }
+    for stage in STAGES:
+        # Solo fuentes procesadas: un 304 no tiene parse/analyze y sesgaría los percentiles
+        cycle[stage] = summarize([getattr(r, stage) for r in ok])
+    return cycle
+
+
+def run_benchmark(args) -> Dict:
+    workdir = tempfile.mkdtemp(prefix="sentinel-bench-")
+    # El índice local de vistos y demás ficheros van al directorio temporal, no a data/
+    os.environ["SENTINEL_DATA_DIR"] = workdir
+
+    from app.services.ingestion import IngestionEngine
+
+    feeds = build_feeds(args.feeds, args.items, fmt=args.format, seed=args.seed,
+                        content_words=args.content_words)
+    storage = create_bench_storage(args.backend, workdir)
+
+    with FeedServer(feeds, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, hosts=args.hosts) as server:
+        for doc in feed_sources(server.urls()):
+            storage.sources.add(doc)
+
+        engine = IngestionEngine(max_concurrency=args.concurrency, per_host_limit=args.per_host,
+                                 source_timeout=args.timeout, workers=args.workers)
+        cycles = []
+        for n in range(args.cycles):
+            cycle = run_cycle(storage, engine, quiet=not args.verbose)
+            cycle["cycle"] = n + 1
+            cycles.append(cycle)
+            print(f"🔁 Ciclo {n + 1}: {cycle['items']} items en {cycle['cycle_ms']:.0f} ms "
+                  f"({cycle['items_per_sec']:.1f} items/s) | estados: {cycle['statuses']}")
+        http_requests = server.requests
+
+    # El primer ciclo (todo nuevo) es la referencia; los siguientes miden el camino 304
+    summary = dict(cycles[0])
+    summary.pop("cycle")
+    summary["peak_rss_mb"] = peak_rss_mb()["self"]
+
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "http_requests": http_requests,
+        },
+        "config": {
+            "feeds": args.feeds, "items": args.items, "format": args.format,
+            "content_words": args.content_words, "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms, "hosts": args.hosts, "backend": args.backend,
+            "concurrency": args.concurrency, "per_host": args.per_host,
+            "workers": args.workers, "timeout": args.timeout, "cycles": args.cycles,
+            "seed": args.seed,
+        },
+        "summary": summary,
+        "cycles": cycles,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _metric(summary: Dict, name: str) -> Optional[float]:
+    value = summary
+    for part in name.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Imprime la diferencia con una ejecución anterior. Devuelve las métricas que empeoraron."""
+    if current["config"] != baseline.get("config"):
+        print("⚠️ La configuración difiere de la línea base: la comparación es orientativa.")
+
+    regressions = []
+    print(f"\n📈 Comparación con {baseline['meta'].get('git') or 'línea base'} "
+          f"({baseline['meta'].get('timestamp')}):")
+    for name, higher_is_better in COMPARED_METRICS.items():
+        new, old = _metric(current["summary"], name), _metric(baseline["summary"], name)
+        if new is None or old is None or old == 0:
+            continue
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        flag = "✅"
+        if worse > threshold:
+            flag = "❌"
+            regressions.append(name)
+        print(f"   {flag} {name:16} {old:10.2f} -> {new:10.2f} ({change:+.1%})")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del ciclo de ingestión con feeds sintéticos")
+    parser.add_argument("--feeds", type=int, default=50, help="número de feeds")
+    parser.add_argument("--items", type=int, default=10, help="items por feed")
+    parser.add_argument("--format", choices=["rss", "atom", "mixed"], default="mixed")
+    parser.add_argument("--content-words", type=int, default=60, help="palabras por item")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="latencia base del servidor")
+    parser.add_argument("--jitter-ms", type=float, default=25.0, help="latencia aleatoria añadida")
+    parser.add_argument("--hosts", type=int, default=8, help="IPs de loopback entre las que se reparten los feeds")
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--per-host", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--cycles", type=int, default=2, help="el 2º ciclo y siguientes miden el camino 304")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="fichero JSON de salida (por defecto data/benchmarks/<fecha>.json)")
+    parser.add_argument("--compare", help="JSON de una ejecución anterior")
+    parser.add_argument("--threshold", type=float, default=0.15, help="empeoramiento tolerado (0.15 = 15%%)")
+    parser.add_argument("--verbose", action="store_true", help="muestra la salida del ciclo")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    print(f"🏁 Benchmark: {args.feeds} feeds x {args.items} items, latencia {args.latency_ms}+{args.jitter_ms} ms, "
+          f"backend {args.backend}")
+
+    report = run_benchmark(args)
+    summary = report["summary"]
+    print(f"\n📊 {summary['items']} items en {summary['cycle_ms']:.0f} ms -> {summary['items_per_sec']:.1f} items/s "
+          f"| persistencia {summary['persist_ms']:.0f} ms | RSS máx {summary['peak_rss_mb']:.0f} MB")
+    for stage in STAGES:
+        s = summary[stage]
+        print(f"   {stage:11} p50={s['p50']:8.1f} p95={s['p95']:8.1f} p99={s['p99']:8.1f} max={s['max']:8.1f}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"ingestion-{datetime.utcnow():%Y%m%dT%H%M%S}.json")
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"💾 Resultado guardado en {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"❌ Regresión en: {', '.join(regressions)}")
+            return 1
+        print("✅ Sin regresiones.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+Comprobación de las fuentes de Reddit contra el stub local (benchmarks/reddit_stub.py).
+
+  1. Búsqueda: N queries de vigilancia se agrupan en pocas búsquedas combinadas
+     y cada post se atribuye a su query.
+  2. Marca de agua: la segunda consulta solo trae lo publicado después.
+  3. Presupuesto: con una cuota pequeña por ventana, el token bucket espera en
+     lugar de provocar 429.
+  4. Stream: el hilo de /new acumula los posts nuevos que encajan con las
+     queries y el ciclo los recoge.
+
+No toca el almacenamiento ni el análisis: prueba el scraper aislado.
+
+Uso (desde backend/):
+    python -m benchmarks.reddit_check --queries 40 --quota 20 --window 5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+from benchmarks.reddit_stub import RedditStub
+
+
+def make_source(source_id: str, queries, stream: bool = False, high_water=None, subreddits: str = "netsec"):
+    return SimpleNamespace(id=source_id, name=source_id, url=f"https://www.reddit.com/r/{subreddits}",
+                           type="reddit", config={"queries": queries, "stream": stream},
+                           high_water=high_water)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Fuentes de Reddit contra un stub local")
+    parser.add_argument("--queries", type=int, default=40, help="queries de vigilancia")
+    parser.add_argument("--quota", type=int, default=20, help="peticiones por ventana del stub")
+    parser.add_argument("--window", type=float, default=5.0, help="segundos de la ventana del stub")
+    args = parser.parse_args(argv)
+
+    stub = RedditStub(window_requests=args.quota, window_seconds=args.window).start()
+    os.environ.update(SENTINEL_REDDIT_API_URL=stub.url, SENTINEL_REDDIT_AUTH_URL=stub.url,
+                      SENTINEL_REDDIT_STREAM_INTERVAL="0.5")
+    import httpx
+    from app.scrapers import reddit_scraper as reddit
+
+    keywords = [f"leak{n}" for n in range(args.queries)]
+    stub.publish(300, keywords=keywords)
+    failures = []
+
+    async def poll(source):
+        scraper = reddit.RedditScraper(source)
+        async with httpx.AsyncClient() as client:
+            findings = await scraper.fetch(client)
+        return scraper, findings
+
+    # 1. Búsquedas combinadas
+    source = make_source("reddit-search", keywords)
+    sent = len(stub.requests)
+    scraper, findings = asyncio.run(poll(source))
+    searches = len(stub.requests) - sent
+    batches = len(reddit.combine_queries(keywords))
+    print(f"🔎 {args.queries} queries -> {batches} búsquedas combinadas, {searches} peticiones, {len(findings)} posts")
+    if searches > batches:
+        failures.append(f"primera consulta: {searches} peticiones para {batches} búsquedas")
+    if not findings:
+        failures.append("la primera consulta no trajo posts")
+    mark = scraper.high_water()
+    if not mark or len(mark["queries"]) < min(args.queries, len(findings)) // 2:
+        failures.append(f"marcas por query incompletas: {mark}")
+
+    # 2. Marca de agua: solo lo nuevo
+    fresh = stub.publish(15, keywords=keywords)
+    source.high_water = mark
+    _, findings = asyncio.run(poll(source))
+    expected = {f"https://reddit.stub/r/netsec/comments/{p['id']}" for p in fresh}
+    got = {f.url for f in findings}
+    print(f"💧 Segunda consulta: {len(findings)} posts (publicados {len(fresh)})")
+    if got != expected:
+        failures.append(f"segunda consulta: {len(got - expected)} de más, {len(expected - got)} perdidos")
+
+    # 3. Presupuesto: ráfaga de consultas sin 429
+    t0 = time.perf_counter()
+    burst = [make_source(f"reddit-burst-{n}", [f"leak{n}"]) for n in range(args.quota * 2)]
+
+    async def burst_poll():
+        async with httpx.AsyncClient() as client:
+            await asyncio.gather(*(reddit.RedditScraper(s).fetch(client) for s in burst))
+
+    asyncio.run(burst_poll())
+    elapsed = time.perf_counter() - t0
+    print(f"🪣 {len(burst)} consultas con cuota {args.quota}/{args.window:.0f}s: {elapsed:.1f}s, "
+          f"429 recibidos: {stub.rejected}")
+    if stub.rejected:
+        failures.append(f"{stub.rejected} respuestas 429: el presupuesto no siguió las cabeceras")
+
+    # 4. Stream
+    stream_source = make_source("reddit-stream", ["zeroday"], stream=True)
+    _, findings = asyncio.run(poll(stream_source))      # registra la fuente y arranca el hilo
+    stub.publish(5, keywords=["zeroday"])
+    stub.publish(5, keywords=["unrelated"])
+    deadline = time.time() + 10
+    collected = []
+    while time.time() < deadline and len(collected) < 5:
+        time.sleep(0.5)
+        scraper, findings = asyncio.run(poll(stream_source))
+        collected += findings
+        if scraper.high_water():
+            stream_source.high_water = scraper.high_water()
+    print(f"📡 Stream: {len(collected)} posts recogidos (esperados 5)")
+    if len(collected) != 5 or not all("zeroday" in f.title.lower() for f in collected):
+        failures.append(f"stream: {len(collected)} posts recogidos")
+
+    stub.stop()
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        return 1
+    print("✅ Búsquedas combinadas, marcas por query, presupuesto y stream correctos.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
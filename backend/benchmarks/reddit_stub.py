@@ -0,0 +1,163 @@
+"""
+Stub local de la API de Reddit (lo mínimo que usa scrapers/reddit_scraper.py):
+
+  POST /api/v1/access_token        token OAuth de aplicación
+  GET  /r/<subs>/search?q=&sort=new listado de búsqueda ("(a) OR (b)", términos en AND)
+  GET  /r/<subs>/new                posts más nuevos primero
+
+Paginación con limit/after (fullname "t3_<id>") y cabeceras X-Ratelimit-*
+con una ventana fija de `window_requests` peticiones cada `window_seconds`;
+pasada la cuota responde 429, como la API real.
+"""
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+WORDS = ("server patch vendor report analyst campaign domain firmware router cloud endpoint "
+         "library release advisory incident response account credential token session").split()
+
+
+class RedditStub:
+    def __init__(self, window_requests: int = 60, window_seconds: float = 60.0, seed: int = 0):
+        self.window_requests = window_requests
+        self.window_seconds = window_seconds
+        self.posts: List[Dict] = []
+        self.requests: List[str] = []      # "GET /r/all/search q=..." en orden de llegada
+        self.rejected = 0
+        self._window_start = time.time()
+        self._window_used = 0
+        self._clock = time.time() - 3600
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address
+        return f"http://{host}:{port}"
+
+    def publish(self, count: int, subreddit: str = "netsec", keywords: Optional[List[str]] = None) -> List[Dict]:
+        """Añade `count` posts (cada uno un segundo más nuevo), con alguna de `keywords` en el título."""
+        added = []
+        with self._lock:
+            for _ in range(count):
+                self._clock += 1
+                post_id = f"{len(self.posts) + 1:x}"
+                words = [self._rng.choice(WORDS) for _ in range(8)]
+                if keywords:
+                    words.insert(self._rng.randrange(len(words)), self._rng.choice(keywords))
+                post = {
+                    "id": post_id, "name": f"t3_{post_id}", "subreddit": subreddit,
+                    "title": " ".join(words).capitalize(),
+                    "selftext": " ".join(self._rng.choice(WORDS) for _ in range(30)),
+                    "url": f"https://reddit.stub/r/{subreddit}/comments/{post_id}",
+                    "permalink": f"/r/{subreddit}/comments/{post_id}/",
+                    "created_utc": self._clock,
+                }
+                self.posts.append(post)
+                added.append(post)
+        return added
+
+    # --- API ---
+    @staticmethod
+    def _matches(q: str, post: Dict) -> bool:
+        words = set(re.findall(r"[\w\-]+", f"{post['title']} {post['selftext']}".lower()))
+        for part in q.split(" OR "):
+            terms = [t for t in re.findall(r"[\w\-]+", part.lower()) if t not in ("and", "or", "not")]
+            if terms and all(t in words for t in terms):
+                return True
+        return False
+
+    def _listing(self, subs: str, params: Dict[str, str], q: Optional[str]) -> Dict:
+        wanted = None if subs == "all" else set(subs.split("+"))
+        with self._lock:
+            posts = [p for p in reversed(self.posts)
+                     if (wanted is None or p["subreddit"] in wanted) and (q is None or self._matches(q, p))]
+        if params.get("after"):
+            names = [p["name"] for p in posts]
+            start = names.index(params["after"]) + 1 if params["after"] in names else len(posts)
+            posts = posts[start:]
+        limit = int(params.get("limit", 25))
+        page = posts[:limit]
+        return {"kind": "Listing", "data": {
+            "children": [{"kind": "t3", "data": p} for p in page],
+            "after": page[-1]["name"] if len(posts) > limit else None,
+        }}
+
+    def _take_quota(self) -> Dict[str, str]:
+        with self._lock:
+            now = time.time()
+            if now - self._window_start >= self.window_seconds:
+                self._window_start, self._window_used = now, 0
+            self._window_used += 1
+            remaining = self.window_requests - self._window_used
+            reset = self.window_seconds - (now - self._window_start)
+            return {"X-Ratelimit-Used": str(self._window_used),
+                    "X-Ratelimit-Remaining": str(max(remaining, 0)),
+                    "X-Ratelimit-Reset": str(max(math.ceil(reset), 1)),
+                    "_over": remaining < 0}
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send(self, status: int, body: Dict, headers: Optional[Dict] = None):
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if self.path.startswith("/api/v1/access_token"):
+                    self._send(200, {"access_token": "stub-token", "token_type": "bearer", "expires_in": 3600})
+                else:
+                    self._send(404, {})
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                match = re.match(r"^/r/([\w+]+)/(search|new)(?:\.json)?$", parsed.path)
+                if not match:
+                    self._send(404, {})
+                    return
+                quota = stub._take_quota()
+                over = quota.pop("_over")
+                with stub._lock:
+                    stub.requests.append(f"GET {parsed.path} {params.get('q', '')}".strip())
+                    if over:
+                        stub.rejected += 1
+                if over:
+                    self._send(429, {"message": "Too Many Requests"}, quota)
+                    return
+                subs, kind = match.groups()
+                body = stub._listing(subs, params, params.get("q") if kind == "search" else None)
+                self._send(200, body, quota)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "RedditStub":
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
@@ -0,0 +1,129 @@
+"""
+Prueba de reparto entre workers con varios procesos locales.
+
+Arranca N procesos `run_scanner.py --worker` contra un mismo fichero SQLite y
+un servidor de feeds local que publica items nuevos periódicamente. A mitad
+de la prueba mata un worker (kill -9) y arranca otro. Comprueba que:
+
+  - nunca hay dos consultas simultáneas al mismo feed (arrendamientos),
+  - todas las fuentes se siguen consultando tras la caída (rebalanceo),
+  - ningún hallazgo se da de alta dos veces (contadores == documentos).
+
+Uso (desde backend/):
+    python -m benchmarks.sharding_check --workers 3 --feeds 40 --duration 30
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.feeds import FeedServer, build_feeds, feed_sources
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_worker(worker_id: str, env: Dict, logdir: str, tick: float, heartbeat: float) -> subprocess.Popen:
+    # Arrendamiento corto: si el kill -9 llega en mitad de una consulta, la fuente se libera pronto
+    log = open(os.path.join(logdir, f"{worker_id}.log"), "w")
+    return subprocess.Popen(
+        [sys.executable, "run_scanner.py", "--worker", "--worker-id", worker_id,
+         "--tick", str(tick), "--heartbeat", str(heartbeat), "--lease-ttl", str(heartbeat * 5)],
+        cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Reparto de fuentes entre varios workers")
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--feeds", type=int, default=40)
+    parser.add_argument("--items", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=30.0, help="segundos de cada fase")
+    parser.add_argument("--publish-every", type=float, default=3.0, help="segundos entre items nuevos")
+    parser.add_argument("--tick", type=float, default=0.5)
+    parser.add_argument("--heartbeat", type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="sentinel-shard-")
+    env = dict(os.environ,
+               SENTINEL_STORAGE="sqlite",
+               SENTINEL_SQLITE_PATH=os.path.join(workdir, "shared.db"),
+               SENTINEL_DATA_DIR=workdir,
+               PYTHONUNBUFFERED="1")
+    os.environ.update({k: env[k] for k in ("SENTINEL_STORAGE", "SENTINEL_SQLITE_PATH", "SENTINEL_DATA_DIR")})
+
+    from app.core.storage import create_storage
+    storage = create_storage("sqlite", path=env["SENTINEL_SQLITE_PATH"])
+
+    generation = 0
+    server = FeedServer(build_feeds(args.feeds, args.items, start=generation), hosts=4).start()
+    # Intervalos cortos para que la prueba dure segundos y no horas
+    for doc in feed_sources(server.urls(), config={"min_interval": 1, "max_interval": 3}):
+        storage.sources.add(doc)
+
+    print(f"🧪 {args.workers} workers, {args.feeds} feeds, logs en {workdir}")
+    workers: List[subprocess.Popen] = [
+        start_worker(f"w{n}", env, workdir, args.tick, args.heartbeat) for n in range(args.workers)
+    ]
+
+    def run_phase(seconds: float):
+        nonlocal generation
+        end = time.time() + seconds
+        while time.time() < end:
+            time.sleep(args.publish_every)
+            generation += 1
+            server.update(build_feeds(args.feeds, args.items, start=generation))
+
+    try:
+        run_phase(args.duration)
+        before_kill = dict(server.hits)
+
+        victim = workers.pop(0)
+        print(f"💀 kill -9 de w0 (pid {victim.pid}) y alta de w{args.workers}")
+        victim.send_signal(signal.SIGKILL)
+        victim.wait()
+        workers.append(start_worker(f"w{args.workers}", env, workdir, args.tick, args.heartbeat))
+
+        run_phase(args.duration)
+    finally:
+        for proc in workers:
+            proc.send_signal(signal.SIGTERM)
+        for proc in workers:
+            try:
+                proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        server.stop()
+
+    failures = []
+
+    overlapping = {p: n for p, n in server.max_in_flight.items() if n > 1}
+    if overlapping:
+        failures.append(f"consultas simultáneas al mismo feed: {overlapping}")
+
+    stale = [p for p in server.feeds if server.hits.get(p, 0) <= before_kill.get(p, 0)]
+    if stale:
+        failures.append(f"{len(stale)} feeds sin consultar tras la caída de un worker: {stale[:5]}")
+
+    documents = sum(1 for _ in storage.findings.stream(fields=["status"]))
+    counted = (storage.findings.get_stats() or {}).get("total", 0)
+    if documents != counted:
+        failures.append(f"contadores ({counted}) != documentos ({documents}): altas duplicadas")
+
+    hits = sorted(server.hits.values())
+    print(f"📊 {documents} hallazgos, {server.requests} peticiones "
+          f"(por feed: min {hits[0] if hits else 0}, max {hits[-1] if hits else 0}), "
+          f"{generation} publicaciones")
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        return 1
+    print("✅ Reparto correcto: sin solapes, rebalanceo tras la caída y sin duplicados.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Presupuesto de arranque de la API: cuánto tarda `import app.main` en un
+intérprete limpio (lo que pagan uvicorn --reload, un contenedor nuevo o cada
+worker al escalar).
+
+Se importa `--runs` veces con `python -X importtime` y se toma la mejor
+(la menos afectada por ruido). Falla si:
+  - el tiempo acumulado de app.main supera `--budget-ms`, o
+  - al terminar el import están cargadas dependencias pesadas que solo se
+    usan en algunas rutas (pandas, fpdf, passlib, textblob, praw...): esas
+    se importan en su primer uso.
+
+Muestra los módulos que más pesan para saber por dónde empezar si falla.
+
+Uso (desde backend/):
+    python -m benchmarks.startup_budget --budget-ms 1500 --runs 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Paquetes que no deben cargarse al importar la API. bcrypt no está: firebase_admin lo
+# importa al arrancar (google.auth.crypt, cryptography); el de la app llega con passlib
+LAZY_MODULES = ["pandas", "numpy", "fpdf", "passlib", "textblob", "nltk", "praw", "feedparser"]
+
+PROBE = (
+    "import json, sys\n"
+    "import app.main\n"
+    f"lazy = {LAZY_MODULES!r}\n"
+    "print('@@' + json.dumps(sorted(m for m in lazy if m in sys.modules)))\n"
+)
+
+
+def parse_importtime(stderr: str) -> Dict[str, Tuple[int, int]]:
+    """'import time: self [us] | cumulative | paquete' -> {paquete: (self_us, cumulative_us)}."""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            times[parts[2].strip()] = (int(parts[0]), int(parts[1]))
+        except ValueError:
+            continue
+    return times
+
+
+def measure() -> Tuple[int, Dict[str, Tuple[int, int]], List[str]]:
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", PROBE], capture_output=True,
+                            text=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    if result.returncode != 0:
+        raise RuntimeError(f"import app.main falló:\n{result.stderr[-2000:]}")
+    times = parse_importtime(result.stderr)
+    if "app.main" not in times:
+        raise RuntimeError("no aparece app.main en la salida de -X importtime")
+    marker = [line for line in result.stdout.splitlines() if line.startswith("@@")]
+    loaded = json.loads(marker[-1][2:]) if marker else []
+    return times["app.main"][1], times, loaded
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Tiempo de importación de app.main")
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="máximo para import app.main")
+    parser.add_argument("--runs", type=int, default=5, help="importaciones (se toma la mejor)")
+    parser.add_argument("--top", type=int, default=15, help="módulos más pesados a mostrar")
+    args = parser.parse_args(argv)
+
+    best = None
+    for _ in range(max(1, args.runs)):
+        try:
+            run = measure()
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            return 1
+        if best is None or run[0] < best[0]:
+            best = run
+    total_us, times, loaded = best
+
+    # Paquetes de primer nivel por tiempo acumulado (sin contar submódulos dos veces)
+    top_level = sorted(((cum, name) for name, (_, cum) in times.items() if "." not in name),
+                       reverse=True)[:args.top]
+    print(f"⏱️ import app.main: {total_us / 1000:.0f} ms (mejor de {args.runs}, presupuesto {args.budget_ms:.0f} ms)")
+    for cum, name in top_level:
+        print(f"   {cum / 1000:8.1f} ms  {name}")
+
+    failures = []
+    if total_us / 1000 > args.budget_ms:
+        failures.append(f"import app.main tarda {total_us / 1000:.0f} ms (> {args.budget_ms:.0f} ms)")
+    if loaded:
+        failures.append(f"dependencias pesadas cargadas al arrancar: {', '.join(loaded)}")
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        return 1
+    print("✅ Arranque dentro del presupuesto y sin dependencias pesadas cargadas.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
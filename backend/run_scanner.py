@@ -1,6 +1,11 @@
-import firebase_admin
-from firebase_admin import credentials, firestore
+import argparse
+import signal
+from app.core.storage import get_storage
 from app.scrapers.rss_scraper import RSSScraper 
+from app.services.findings_query import make_summary
+from app.services.identity import SeenIndex, content_hash, finding_id
+from app.services.persistence import FindingWriter
+from app.services.stats import counter_delta
 from datetime import datetime
 
 class SourceObject:
@@ -9,39 +14,87 @@ class SourceObject:
         self.url = url
 
 def run_global_scanner():
-    # 1. Inicializar Firebase 
-    if not firebase_admin._apps:
-        cred = credentials.Certificate("serviceAccountKey.json")
-        firebase_admin.initialize_app(cred)
+    # 1. Inicializar almacenamiento (Firestore por defecto, ver SENTINEL_STORAGE)
+    storage = get_storage()
     
-    db = firestore.client()
+    # 2. Leer fuentes
+    print("🔍 Obteniendo fuentes...")
+    sources = storage.sources.list()
     
-    # 2. Leer fuentes desde Firestore 
-    print("🔍 Obteniendo fuentes desde Firestore...")
-    sources_ref = db.collection("sources").stream()
-    
-    for doc in sources_ref:
-        data = doc.to_dict()
-        source_obj = SourceObject(doc.id, data['url'])
+    seen = SeenIndex.load(storage)
+    writer = FindingWriter(storage)
+
+    for data in sources:
+        source_obj = SourceObject(data['id'], data['url'])
         
         # 3. Usar tu Scraper para cada fuente
         scraper = RSSScraper(source=source_obj)
         findings = scraper.scrape()
         
-        # 4. Guardar hallazgos en Firestore
+        # 4. Encolar hallazgos (se escriben en batches)
         for f in findings:
-            doc_id = f.url.replace("/", "_").replace(":", "")
+            doc_id = finding_id(f.url, f.title, f.source_id)
+            digest = content_hash(f.title, f.content)
+            # Ya guardado con el mismo contenido: ni se vuelve a escribir
+            if not seen.claim(doc_id, digest):
+                continue
+
             finding_data = {
                 "title": f.title,
                 "content": f.content,
+                "summary": make_summary(f.content),
                 "url": f.url,
                 "source_id": f.source_id,
-                "risk_level": "medium", # Por defecto
-                "status": "new",
-                "created_at": datetime.utcnow()
+                "published_date": f.published_date,
+                "content_hash": digest,
             }
-            db.collection("findings").document(doc_id).set(finding_data, merge=True)
-            print(f"📌 Guardado: {f.title[:50]}...")
+            delta = {}
+            if doc_id not in seen:
+                finding_data.update({
+                    "risk_level": "medium", # Por defecto
+                    "status": "new",
+                    "created_at": datetime.utcnow()
+                })
+                delta = counter_delta(None, finding_data)
+                seen.record_risk(doc_id, "medium")
+            writer.set(doc_id, finding_data, stats_delta=delta)
+            print(f"📌 En cola: {f.title[:50]}...")
+
+    writer.flush()
+    seen.commit(exclude=writer.failed_ids)
+    print(writer.summary())
+
+def run_worker(worker_id=None, tick_seconds=None, heartbeat_interval=None, lease_ttl=None):
+    """Modo worker: este proceso consulta solo su parte de las fuentes (ver services/workers.py)."""
+    from app.services.workers import ShardedWorker
+
+    options = {}
+    if tick_seconds:
+        options["tick_seconds"] = tick_seconds
+    if heartbeat_interval:
+        options.update(heartbeat_interval=heartbeat_interval, heartbeat_ttl=heartbeat_interval * 3)
+    if lease_ttl:
+        options["lease_ttl"] = lease_ttl
+    worker = ShardedWorker(get_storage(), worker_id=worker_id, **options)
+
+    # SIGTERM (docker stop, kill) = salida ordenada: se libera el latido y se rebalancea al momento
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        worker.leave()
 
 if __name__ == "__main__":
-    run_global_scanner()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Escáner de fuentes de SENTINEL")
+    parser.add_argument("--worker", action="store_true",
+                        help="modo worker continuo; varias copias se reparten las fuentes")
+    parser.add_argument("--worker-id", help="identificador estable del worker (por defecto host-pid)")
+    parser.add_argument("--tick", type=float, help="segundos entre revisiones de la cola")
+    parser.add_argument("--heartbeat", type=float, help="segundos entre latidos")
+    parser.add_argument("--lease-ttl", type=float, help="caducidad del arrendamiento de una fuente en consulta")
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker_id, args.tick, args.heartbeat, args.lease_ttl)
+    else:
+        run_global_scanner()
\ No newline at end of file
@@ -37,6 +37,7 @@ function App() {
   const [msg, setMsg] = useState({ type: '', text: '' });
 
   const [findings, setFindings] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [sources, setSources] = useState([]);
   
   // MODALES
@@ -169,14 +170,17 @@ function App() {
 
   //  DATA FETCHING 
 
-  const fetchData = async () => {
+  const fetchData = async (after = null) => {
     if (!token) return;
     setLoading(true);
     try {
-      const response = await axios.get(`${API_URL}/api/v1/findings?t=${new Date().getTime()}`, {
-        headers: { Authorization: `Bearer ${token}` }
+      const response = await axios.get(`${API_URL}/api/v1/findings`, {
+        headers: { Authorization: `Bearer ${token}` },
+        params: { limit: 100, after: after || undefined, t: new Date().getTime() }
       });
-      const sorted = response.data.sort((a, b) => {
+      setNextCursor(response.data.next_cursor);
+      const items = after ? [...findings, ...response.data.items] : response.data.items;
+      const sorted = items.sort((a, b) => {
         if (a.status === 'new' && b.status !== 'new') return -1;
         if (a.status !== 'new' && b.status === 'new') return 1;
         const riskOrder = { critical: 3, high: 2, medium: 1, low: 0 };
@@ -364,7 +368,7 @@ function App() {
           <div className="h-8 w-px bg-gray-300 mx-2 hidden md:block"></div>
           <button onClick={() => downloadReport('pdf')} className="bg-red-50 hover:bg-red-100 text-red-700 border border-red-200 px-4 py-2 rounded-lg flex items-center gap-2 text-sm transition"><FileText size={16} /> PDF</button>
           <button onClick={() => downloadReport('csv')} className="bg-green-50 hover:bg-green-100 text-green-700 border border-green-200 px-4 py-2 rounded-lg flex items-center gap-2 text-sm transition"><FileSpreadsheet size={16} /> Excel</button>
-          <button onClick={fetchData} className="bg-blue-600 hover:bg-blue-700 text-white px-6 py-2 rounded-lg flex items-center gap-2 transition shadow-md"><RefreshCw size={18} className={loading ? "animate-spin" : ""} /></button>
+          <button onClick={() => fetchData()} className="bg-blue-600 hover:bg-blue-700 text-white px-6 py-2 rounded-lg flex items-center gap-2 transition shadow-md"><RefreshCw size={18} className={loading ? "animate-spin" : ""} /></button>
         </div>
       </header>
 
@@ -617,14 +621,27 @@ function App() {
                 </button>
 
                 <div className="flex justify-between items-start mb-4 pr-6">
-                  <span className={`px-2 py-1 rounded text-[10px] font-bold uppercase border tracking-wider ${
-                    item.risk_level === 'critical' ? 'bg-red-100 text-red-800 border-red-200' :
-                    item.risk_level === 'high' ? 'bg-orange-100 text-orange-800 border-orange-200' :
-                    item.risk_level === 'medium' ? 'bg-yellow-100 text-yellow-800 border-yellow-200' :
-                    'bg-green-100 text-green-800 border-green-200'
-                  }`}>
-                    {item.risk_level}
-                  </span>
+                  <div className="flex items-center gap-2">
+                    <span className={`px-2 py-1 rounded text-[10px] font-bold uppercase border tracking-wider ${
+                      item.risk_level === 'critical' ? 'bg-red-100 text-red-800 border-red-200' :
+                      item.risk_level === 'high' ? 'bg-orange-100 text-orange-800 border-orange-200' :
+                      item.risk_level === 'medium' ? 'bg-yellow-100 text-yellow-800 border-yellow-200' :
+                      'bg-green-100 text-green-800 border-green-200'
+                    }`}>
+                      {item.risk_level}
+                    </span>
+                    {/* Misma noticia en varias fuentes (agrupación de casi-duplicados) */}
+                    {item.cluster_size > 1 && (
+                      <span className="text-[10px] font-bold bg-purple-100 text-purple-800 border border-purple-200 px-2 py-1 rounded" title="Reported by several sources">
+                        x{item.cluster_size} SOURCES
+                      </span>
+                    )}
+                    {item.cluster_id && item.cluster_id !== item.id && (
+                      <span className="text-[10px] font-bold bg-gray-100 text-gray-600 border border-gray-200 px-2 py-1 rounded" title={`Duplicate of ${item.cluster_id}`}>
+                        DUPLICATE
+                      </span>
+                    )}
+                  </div>
                   
                   {item.status === 'new' ? (
                     <span className="flex items-center gap-1 bg-blue-600 text-white text-[10px] font-bold px-2 py-1 rounded-full animate-pulse shadow-sm border border-blue-400">
@@ -642,7 +659,7 @@ function App() {
                   <a href={item.url} target="_blank" rel="noopener noreferrer">{item.title}</a>
                 </h3>
                 <p className="text-gray-600 text-sm line-clamp-3 mb-6 flex-grow leading-relaxed">
-                  {stripHtml(item.content)}
+                  {stripHtml(item.summary ?? item.content)}
                 </p>
 
                 <div className="grid grid-cols-2 gap-2 mb-4">
@@ -684,6 +701,13 @@ function App() {
             ))}
           </div>
         }
+        {nextCursor && (
+          <div className="text-center mt-8">
+            <button onClick={() => fetchData(nextCursor)} disabled={loading} className="px-6 py-2 rounded-lg bg-white border border-gray-300 text-gray-700 text-sm font-bold hover:border-blue-500 hover:text-blue-700 transition disabled:opacity-50">
+              {loading ? 'Loading...' : 'Load more'}
+            </button>
+          </div>
+        )}
       </main>
     </div>
   );